@@ -6,7 +6,7 @@ from .io.carto import read_carto, to_carto, list_tables, has_table, delete_table
 
 # Check installed packages versions
 check_package('carto', '>=1.11.2')
-check_package('pandas', '>=0.25.0')
+check_package('pandas', '>=1.0.0')
 check_package('geopandas', '>=0.6.0')
 
 
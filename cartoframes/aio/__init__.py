@@ -0,0 +1,14 @@
+"""Async API of CARTOframes. It requires the `aiohttp` package."""
+
+from .batch import BatchJob
+from .carto import read_carto_async, to_carto_async
+from .client import close_sessions
+from .context_manager import AsyncContextManager
+
+__all__ = [
+    'read_carto_async',
+    'to_carto_async',
+    'close_sessions',
+    'AsyncContextManager',
+    'BatchJob'
+]
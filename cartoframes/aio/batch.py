@@ -0,0 +1,67 @@
+import asyncio
+
+from carto.exceptions import CartoException
+from carto.sql import BATCH_JOBS_FAILED_STATUSES, BATCH_JOBS_PENDING_STATUSES
+
+from ..io.managers.batch_job import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, POLL_BACKOFF
+
+
+class BatchJob:
+    """Handle of a Batch SQL job created by :py:meth:`AsyncContextManager.create_batch_job`.
+    Awaiting it waits for the completion of the job.
+
+    Example:
+        >>> job = await context_manager.create_batch_job('CREATE TABLE ...')
+        >>> data = await job
+
+    """
+
+    def __init__(self, client, data):
+        self._client = client
+        self.data = data
+
+    @property
+    def job_id(self):
+        return self.data['job_id']
+
+    async def status(self):
+        """Request the current status of the job: 'pending', 'running', 'done', 'failed',
+        'canceled' or 'unknown'."""
+        self.data = await self._client.read_job(self.job_id)
+        return self.data['status']
+
+    async def cancel(self):
+        self.data = await self._client.cancel_job(self.job_id)
+        return self.data['status']
+
+    async def wait(self, timeout=None):
+        """Wait for the completion of the job, reading its status with the growing interval
+        of :py:func:`wait_all <cartoframes.data.clients.wait_all>`. It returns the job data, or
+        raises a CartoException if the job does not succeed. Several jobs can be waited
+        together with `asyncio.gather`.
+
+        Args:
+            timeout (float, optional): maximum number of seconds to wait. By default, it waits
+                until the job is finished.
+
+        Raises:
+            CartoException: if the job fails or it is canceled.
+            asyncio.TimeoutError: if the job is not finished after `timeout` seconds.
+
+        """
+        await asyncio.wait_for(self._poll(), timeout)
+
+        if self.data['status'] in BATCH_JOBS_FAILED_STATUSES:
+            raise CartoException('Batch SQL job failed with result: {data}'.format(data=self.data))
+
+        return self.data
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    async def _poll(self):
+        interval = MIN_POLL_INTERVAL
+        while self.data['status'] in BATCH_JOBS_PENDING_STATUSES:
+            await asyncio.sleep(interval)
+            await self.status()
+            interval = min(interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
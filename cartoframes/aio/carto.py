@@ -0,0 +1,127 @@
+"""Async functions to interact with the CARTO platform"""
+
+import asyncio
+
+from .context_manager import AsyncContextManager
+from ..io.carto import (IF_EXISTS_OPTIONS, MAX_UPLOAD_SIZE_BYTES, _check_quota, _check_read_carto_params,
+                        _check_to_carto_params, _from_arrow, _is_arrow_data, _prepare_gdf, _to_geodataframe)
+from ..utils.logger import log
+
+
+async def read_carto_async(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None,
+                           decode_geom=True, null_geom_value=None, format='csv', compress=True, columns=None,
+                           bbox=None, where=None, simplify=None, precision=None, lazy_geom=False):
+    """Async version of :py:func:`read_carto <cartoframes.read_carto>`. The requests do not
+    block the event loop, and the data is decoded in the default executor. It requires the
+    `aiohttp` package.
+
+    Args:
+        source (str): table name or SQL query.
+        credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
+            instance of Credentials (username, api_key, etc).
+        limit (int, optional):
+            The number of rows to download. Default is to download all rows.
+        retry_times (int or :py:class:`RetryPolicy <cartoframes.utils.RetryPolicy>`, optional):
+            Number of attempts of each COPY request when it is rate-limited, or the policy of the
+            retries. The retries wait with a jittered exponential backoff. Default is 3.
+        schema (str, optional): prefix of the table. By default, it gets the
+            `current_schema()` using the credentials.
+        index_col (str, optional): name of the column to be loaded as index. It can be used also to set the index name.
+        decode_geom (bool, optional): convert the "the_geom" column into a valid geometry column.
+        null_geom_value (Object, optional): value for the `the_geom` column when it's null.
+            Defaults to None
+        format (str, optional): 'csv', 'binary'. Format of the COPY stream used to download the data.
+            Default is 'csv'.
+        compress (bool, optional): request the data compressed with gzip. Default is True.
+        columns (list of str, optional): names of the columns to download. By default, it
+            downloads all the columns.
+        bbox (tuple, optional): (west, south, east, north) coordinates in EPSG:4326 to filter
+            the rows by their geometry.
+        where (str, optional): SQL condition to filter the rows.
+        simplify (float, optional): tolerance to simplify the geometries before they are downloaded.
+        precision (int, optional): number of decimal digits of the coordinates of the geometries.
+        lazy_geom (bool, optional): keep the geometries as WKB bytes until they are used.
+
+    Returns:
+        geopandas.GeoDataFrame
+
+    Raises:
+        ValueError: if the source is not a valid table_name or SQL query.
+
+    Example:
+        >>> gdf = await read_carto_async('table_name', credentials)
+
+    """
+    _check_read_carto_params(source, format=format, columns=columns, bbox=bbox, where=where, simplify=simplify,
+                             precision=precision)
+
+    context_manager = AsyncContextManager(credentials)
+    df = await context_manager.copy_to(source, schema, limit, retry_times, format, compress, columns, bbox, where,
+                                       simplify, precision)
+
+    return await asyncio.get_event_loop().run_in_executor(
+        None, _to_geodataframe, df, index_col, decode_geom, null_geom_value, lazy_geom)
+
+
+async def to_carto_async(dataframe, table_name, credentials=None, if_exists='fail', geom_col=None, index=False,
+                         index_label=None, cartodbfy=True, log_enabled=True, retry_times=3,
+                         max_upload_size=MAX_UPLOAD_SIZE_BYTES, skip_quota_warning=False, format='csv',
+                         compress=True):
+    """Async version of :py:func:`to_carto <cartoframes.to_carto>`. The requests do not block
+    the event loop, and the data is encoded and compressed in the default executor. It requires
+    the `aiohttp` package.
+
+    Args:
+        dataframe (pandas.DataFrame, geopandas.GeoDataFrame, pyarrow.Table or str): data to be uploaded,
+            or the path of a Parquet file (.parquet).
+        table_name (str): name of the table to upload the data.
+        credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
+            instance of Credentials (username, api_key, etc).
+        if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        geom_col (str, optional): name of the geometry column of the dataframe.
+        index (bool, optional): write the index in the table. Default is False.
+        index_label (str, optional): name of the index column in the table. By default it
+            uses the name of the index from the dataframe.
+        cartodbfy (bool, optional): convert the table to CARTO format. Default True.
+        log_enabled (bool, optional): enable the logging mechanism. Default is True.
+        retry_times (int or :py:class:`RetryPolicy <cartoframes.utils.RetryPolicy>`, optional):
+            Number of attempts of each COPY request when it is rate-limited, or the policy of the
+            retries. The retries wait with a jittered exponential backoff. Default is 3.
+        max_upload_size (int, optional): defines the maximum size in bytes of each COPY stream.
+            Default is 2GB.
+        skip_quota_warning (bool, optional): skip the quota exceeded check and force the upload.
+            Default is False.
+        format (str, optional): 'csv', 'binary'. Format of the COPY stream used to upload the data.
+            Default is 'csv'.
+        compress (bool, optional): compress the uploaded data with gzip. Default is True.
+
+    Returns:
+        string: the table name normalized.
+
+    Raises:
+        ValueError: if the dataframe or table name provided are wrong or the if_exists param is not valid.
+
+    Example:
+        >>> table_name = await to_carto_async(gdf, 'table_name', credentials)
+
+    """
+    if _is_arrow_data(dataframe):
+        dataframe, geom_col = _from_arrow(dataframe, geom_col)
+
+    _check_to_carto_params(dataframe, table_name, if_exists, 1, format, if_exists_options=IF_EXISTS_OPTIONS)
+
+    context_manager = AsyncContextManager(credentials)
+    loop = asyncio.get_event_loop()
+
+    gdf = await loop.run_in_executor(None, _prepare_gdf, dataframe, geom_col, index, index_label)
+
+    if not skip_quota_warning:
+        await loop.run_in_executor(None, _check_quota, context_manager.credentials, gdf)
+
+    table_name = await context_manager.copy_from(
+        gdf, table_name, if_exists, cartodbfy, retry_times, format, compress, max_upload_size)
+
+    if log_enabled:
+        log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
+
+    return table_name
@@ -0,0 +1,164 @@
+"""Non-blocking client of the CARTO SQL, COPY and Batch SQL APIs, built on aiohttp.
+
+The aiohttp sessions are pooled by event loop and base URL, so the concurrent requests to
+the same server share the connections of one connector.
+"""
+
+import asyncio
+import json
+
+from collections import namedtuple
+
+from carto.exceptions import CartoException, CartoRateLimitException
+from carto.sql import SQL_API_URL, SQL_BATCH_API_URL, MAX_GET_QUERY_LEN
+
+from .. import __version__
+from ..io.managers.copy_client import compress_chunks
+from ..utils.session_pool import session_pool
+from ..utils.utils import check_package
+
+API_VERSION = 'v2'
+CLIENT_ID = 'cartoframes_{}'.format(__version__)
+
+# Fields of the responses used by `CartoRateLimitException`
+ResponseInfo = namedtuple('ResponseInfo', ['status_code', 'headers', 'text'])
+
+_sessions = {}
+_END = object()
+
+
+def get_async_session(base_url):
+    """Returns the aiohttp session of the base URL for the running event loop. Its connector
+    keeps the `pool_size` and `keep_alive` options set by `setup_session_pool`."""
+    check_package('aiohttp', is_optional=True)
+    import aiohttp
+
+    loop = asyncio.get_event_loop()
+    for key in [key for key in _sessions if key[0].is_closed()]:
+        del _sessions[key]
+
+    session = _sessions.get((loop, base_url))
+    if session is None or session.closed:
+        if session_pool.keep_alive == 0:
+            keep_alive_options = {'force_close': True}
+        else:
+            keep_alive_options = {'keepalive_timeout': session_pool.keep_alive}
+        connector = aiohttp.TCPConnector(limit=session_pool.pool_size, **keep_alive_options)
+        session = aiohttp.ClientSession(connector=connector, headers={'User-Agent': CLIENT_ID})
+        _sessions[(loop, base_url)] = session
+
+    return session
+
+
+async def close_sessions():
+    """Close the aiohttp sessions of the running event loop. Call it before closing the loop
+    to release its connections."""
+    loop = asyncio.get_event_loop()
+    for key in [key for key in _sessions if key[0] is loop]:
+        await _sessions.pop(key).close()
+
+
+class AsyncClient:
+    """Sends the requests of the credentials to the SQL API without blocking the event loop.
+
+    Args:
+        credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`): A Credentials instance.
+        api_key (str, optional): API key used instead of the one of the credentials.
+
+    """
+
+    def __init__(self, credentials, api_key=None):
+        self.base_url = credentials.base_url.rstrip('/')
+        self.api_key = api_key or credentials.api_key
+        self.sql_api_url = '{}/{}'.format(self.base_url, SQL_API_URL.format(api_version=API_VERSION))
+        self.batch_api_url = '{}/{}'.format(self.base_url, SQL_BATCH_API_URL.format(api_version=API_VERSION))
+
+    async def send(self, query, do_post=True, format=None):
+        """Same as `carto.sql.SQLClient.send`. It returns the parsed JSON response."""
+        params = {'q': query}
+        if format:
+            params['format'] = format
+
+        if len(query) < MAX_GET_QUERY_LEN and not do_post:
+            return await self._request('GET', self.sql_api_url, params=params)
+        return await self._request('POST', self.sql_api_url, data=params)
+
+    async def copyto(self, query, compress=True):
+        """Returns the data of the COPY TO query. aiohttp accepts the gzip encoding by default and
+        decodes the response, so only the uncompressed response is requested explicitly."""
+        headers = None if compress else {'Accept-Encoding': 'identity'}
+        if len(query) < MAX_GET_QUERY_LEN:
+            return await self._request('GET', self.sql_api_url + '/copyto', parse_json=False,
+                                       params={'q': query}, headers=headers)
+        return await self._request('POST', self.sql_api_url + '/copyto', parse_json=False,
+                                   data={'q': query}, headers=headers)
+
+    async def copyfrom(self, query, chunks, compress=True):
+        """Uploads the chunks of the COPY FROM query. The chunks are encoded and compressed
+        in the default executor, so the event loop is not blocked."""
+        headers = {'Content-Type': 'application/octet-stream'}
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+            chunks = compress_chunks(chunks)
+
+        return await self._request('POST', self.sql_api_url + '/copyfrom', params={'q': query},
+                                   data=ExecutorIterator(chunks), headers=headers)
+
+    async def create_job(self, query):
+        return await self._request('POST', self.batch_api_url, json={'query': query})
+
+    async def read_job(self, job_id):
+        return await self._request('GET', self.batch_api_url + job_id)
+
+    async def cancel_job(self, job_id):
+        return await self._request('DELETE', self.batch_api_url + job_id)
+
+    async def _request(self, method, url, parse_json=True, params=None, **request_args):
+        session = get_async_session(self.base_url)
+        params = dict(params or {}, api_key=self.api_key, client=CLIENT_ID)
+
+        try:
+            async with session.request(method, url, params=params, **request_args) as response:
+                body = await response.read()
+                # The data of the successful COPY TO requests is not decoded as text
+                text = body.decode('utf-8', 'replace') if parse_json or response.status >= 400 else ''
+                response_info = ResponseInfo(response.status, response.headers, text)
+        except CartoException:
+            raise
+        except Exception as e:
+            raise CartoException(e)
+
+        if CartoRateLimitException.is_rate_limited(response_info):
+            raise CartoRateLimitException(response_info)
+
+        if response_info.status_code >= 400:
+            raise CartoException(_error_message(response_info))
+
+        if parse_json:
+            return json.loads(response_info.text) if body else None
+        return body
+
+
+class ExecutorIterator:
+    """Async iterator over a blocking iterator. Its items are computed in the default executor."""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await asyncio.get_event_loop().run_in_executor(None, next, self._iterator, _END)
+        if item is _END:
+            raise StopAsyncIteration
+        return item
+
+
+def _error_message(response_info):
+    try:
+        reason = json.loads(response_info.text)['error'][0]
+    except (ValueError, KeyError, IndexError, TypeError):
+        reason = response_info.text
+    kind = 'Client' if response_info.status_code < 500 else 'Server'
+    return '{} {} Error: {}'.format(response_info.status_code, kind, reason)
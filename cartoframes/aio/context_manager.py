@@ -0,0 +1,163 @@
+import asyncio
+
+from io import BytesIO
+
+from carto.exceptions import CartoException
+
+from .batch import BatchJob
+from .client import AsyncClient
+from ..io.managers.context_manager import (DEFAULT_RETRY_TIMES, CopyData, get_context_manager, _copy_from_query,
+                                           _cartodbfy_query, _column_encoders, _copy_to_query, _filter_query,
+                                           _parse_setup_table_output, _read_copy_data, _select_columns,
+                                           _setup_table_copy_format, _setup_table_needs_cartodbfy,
+                                           _setup_table_query)
+from ..io.managers.metadata_cache import metadata_cache
+from ..utils.columns import get_dataframe_columns_info, get_query_columns_info
+from ..utils.logger import log
+from ..utils.retry_policy import get_retry_policy
+from ..utils.utils import is_sql_query
+
+
+class AsyncContextManager:
+    """Async version of the ContextManager operations used by `read_carto_async`, `to_carto_async`
+    and the async methods of `SQLClient`. The requests do not block the event loop, and the
+    decoding and encoding of the data runs in the default executor.
+
+    The queries are built by the ContextManager of the credentials, and the cached metadata
+    is shared with it.
+    """
+
+    def __init__(self, credentials=None):
+        self._context_manager = get_context_manager(credentials)
+        self.credentials = self._context_manager.credentials
+        self.client = AsyncClient(self.credentials)
+
+    async def execute_query(self, query, do_post=True, format=None):
+        try:
+            return await self.client.send(query.strip(), do_post, format)
+        finally:
+            # Any query can create, alter or drop tables, even a SELECT: `SELECT CDB_DropTable(...)`
+            self._context_manager._invalidate_table_metadata()
+
+    async def _execute_read_query(self, query, do_post=True):
+        """Execute a query that does not modify the tables, keeping the cached table metadata.
+        It is only used for the metadata queries that do not run the source query."""
+        return await self.client.send(query.strip(), do_post)
+
+    async def create_batch_job(self, query):
+        """Create a Batch SQL job and return its :py:class:`BatchJob <cartoframes.aio.BatchJob>` handle
+        without waiting for its completion."""
+        data = await self.client.create_job(query.strip())
+        return BatchJob(self.client, data)
+
+    async def execute_long_running_query(self, query):
+        try:
+            job = await self.create_batch_job(query)
+            return await job
+        finally:
+            self._context_manager._invalidate_table_metadata()
+
+    async def get_schema(self):
+        """Get user schema from current credentials"""
+        return await self._cached('schema', None, self._get_schema)
+
+    async def _get_schema(self):
+        result = await self._execute_read_query('SELECT current_schema()', do_post=False)
+        return result['rows'][0]['current_schema']
+
+    async def compute_query(self, source, schema=None):
+        if is_sql_query(source):
+            return source
+        schema = schema or await self.get_schema()
+        return self._context_manager._compute_query_from_table(source, schema)
+
+    async def has_table(self, table_name, schema=None):
+        query = await self.compute_query(table_name, schema)
+        return await self._cached('has_table', query, lambda: self._check_exists(query))
+
+    async def copy_to(self, source, schema=None, limit=None, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                      compress=True, columns=None, bbox=None, where=None, simplify=None, precision=None):
+        query = _filter_query(await self.compute_query(source, schema), bbox, where)
+        columns = _select_columns(await self._get_query_columns_info(query), columns)
+        copy_query = _copy_to_query(
+            self._context_manager._get_copy_query(query, columns, limit, format, simplify, precision), format)
+
+        log.debug('COPY TO')
+        data = await _retry(lambda: self.client.copyto(copy_query, compress), retry_times)
+        return await asyncio.get_event_loop().run_in_executor(
+            None, _read_copy_data, BytesIO(data), columns, None, format)
+
+    async def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True, retry_times=DEFAULT_RETRY_TIMES,
+                        format='csv', compress=True, max_upload_size=None):
+        table_name = self._context_manager.normalize_table_name(table_name)
+        df_columns = get_dataframe_columns_info(gdf)
+
+        setup = await self._setup_table(table_name, df_columns, if_exists)
+        format = _setup_table_copy_format(table_name, df_columns, setup, format)
+
+        await self._copy_from(gdf, table_name, df_columns, retry_times, format, compress, max_upload_size)
+
+        if cartodbfy and _setup_table_needs_cartodbfy(setup):
+            log.debug('CARTODBFY table "{}"'.format(table_name))
+            await self.execute_long_running_query(_cartodbfy_query(table_name, setup['schema']))
+        return table_name
+
+    async def _copy_from(self, dataframe, table_name, columns, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                         compress=True, max_bytes=None):
+        query = _copy_from_query(table_name, columns, format)
+        encoders = _column_encoders(dataframe, columns) if format != 'binary' else None
+
+        async def copy_range(start):
+            # The retries create a new stream of the same range of rows
+            log.debug('COPY FROM (row {})'.format(start))
+            data = CopyData(dataframe, columns, format, start, max_bytes, encoders)
+            await self.client.copyfrom(query, data, compress)
+            return data.end
+
+        start = 0
+        while True:
+            end = await _retry(lambda: copy_range(start), retry_times)
+            if end >= len(dataframe):
+                break
+            if end == start:
+                raise CartoException('The COPY FROM data was not read by the client.')
+            start = end
+
+    async def _setup_table(self, table_name, columns, if_exists):
+        log.debug('SETUP table "{}"'.format(table_name))
+        output = await self.execute_query(_setup_table_query(table_name, columns, if_exists))
+
+        setup = _parse_setup_table_output(output)
+        if setup['action'] == 'fail':
+            raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
+                            'Please choose a different `table_name` or use '
+                            'if_exists="replace" to overwrite it.'.format(
+                                table_name=table_name, schema=setup['schema']))
+        return setup
+
+    async def _check_exists(self, query):
+        try:
+            await self._execute_read_query('EXPLAIN {}'.format(query), do_post=False)
+            return True
+        except CartoException:
+            return False
+
+    async def _get_query_columns_info(self, query):
+        return list(await self._cached('columns', query, lambda: self._request_query_columns_info(query)))
+
+    async def _request_query_columns_info(self, query):
+        table_info = await self._execute_read_query('SELECT * FROM ({}) _q LIMIT 0'.format(query))
+        return get_query_columns_info(table_info['fields'])
+
+    async def _cached(self, kind, key, request):
+        cache_key = (self._context_manager.cache_namespace, kind, key)
+        value = metadata_cache.get(cache_key)
+        if value is None:
+            value = await request()
+            metadata_cache.set(cache_key, value)
+        return value
+
+
+async def _retry(request, retry_times=DEFAULT_RETRY_TIMES):
+    """Same as `retry_copy`, awaiting the coroutine returned by `request` on each attempt."""
+    return await get_retry_policy(retry_times).call_async(request)
@@ -9,6 +9,7 @@ from carto.do_token import DoTokenManager
 
 from .. import __version__
 from ..utils.logger import log
+from ..utils.session_pool import get_session
 from ..utils.utils import is_valid_str, check_do_enabled, save_in_config, read_from_config, default_config_path
 
 from warnings import filterwarnings
@@ -281,7 +282,7 @@ class Credentials:
             self._api_key_auth_client = APIKeyAuthClient(
                 base_url=self._base_url,
                 api_key=self.api_key,
-                session=self.session,
+                session=get_session(self),
                 client_id='cartoframes_{}'.format(__version__),
                 user_agent='cartoframes_{}'.format(__version__)
             )
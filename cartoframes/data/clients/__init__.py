@@ -1,7 +1,10 @@
 from .sql_client import SQLClient
 from .data_obs_client import DataObsClient
+from ...io.managers.batch_job import BatchJob, wait_all
 
 __all__ = [
     'SQLClient',
-    'DataObsClient'
+    'DataObsClient',
+    'BatchJob',
+    'wait_all'
 ]
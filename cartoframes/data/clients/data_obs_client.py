@@ -10,7 +10,7 @@ from carto.exceptions import CartoException
 from ...io.carto import read_carto, to_carto
 from ...utils import utils
 from ...utils.utils import deprecated
-from ...io.managers.context_manager import ContextManager
+from ...io.managers.context_manager import get_context_manager
 
 
 @deprecated(message='The Data Observatory v1 is being deprecated. Use the `data.observatory` package instead')
@@ -33,7 +33,7 @@ class DataObsClient:
     def __init__(self, credentials=None):
         self._verbose = 0
         self._credentials = credentials
-        self._manager = ContextManager(credentials)
+        self._manager = get_context_manager(credentials)
 
     @deprecated(message='The Data Observatory v1 is being deprecated. Use the `data.observatory` package instead')
     def boundaries(self, boundary=None, region=None, decode_geom=False,
@@ -1,4 +1,5 @@
-from ...io.managers.context_manager import ContextManager
+from ...aio.context_manager import AsyncContextManager
+from ...io.managers.context_manager import get_context_manager
 
 
 class SQLClient:
@@ -15,10 +16,12 @@ class SQLClient:
         >>> sql.execute('DROP TABLE table_name')
         >>> sql.distinct('table_name', 'column_name')
         >>> sql.count('table_name')
+        >>> await sql.query_async('SELECT * FROM table_name')
 
     """
     def __init__(self, credentials=None):
-        self._context_manager = ContextManager(credentials)
+        self._context_manager = get_context_manager(credentials)
+        self._async_context_manager = None
 
     def query(self, query, verbose=False):
         """Run a SQL query. It returns a `list` with content of the response.
@@ -50,6 +53,58 @@ class SQLClient:
         """
         return self._context_manager.execute_long_running_query(query.strip())
 
+    def submit(self, query):
+        """Create a long running query without waiting for its completion. It returns a
+        :py:class:`BatchJob <cartoframes.data.clients.BatchJob>` to check its status, cancel it
+        or wait for it. Several jobs can be waited together with
+        :py:func:`wait_all <cartoframes.data.clients.wait_all>`.
+
+        Args:
+            query (str): SQL query.
+
+        Example:
+            >>> jobs = [sql.submit(query) for query in queries]
+            >>> wait_all(jobs, timeout=600)
+
+        """
+        return self._context_manager.create_batch_job(query.strip())
+
+    async def query_async(self, query, verbose=False):
+        """Async version of :py:meth:`query <cartoframes.data.clients.SQLClient.query>`.
+        It requires the `aiohttp` package.
+
+        Args:
+            query (str): SQL query.
+            verbose (bool, optional): flag to return all the response. Default False.
+
+        """
+        response = await self._get_async_context_manager().execute_query(query.strip())
+        if not verbose:
+            return response.get('rows')
+        else:
+            return response
+
+    async def execute_async(self, query):
+        """Async version of :py:meth:`execute <cartoframes.data.clients.SQLClient.execute>`.
+        It requires the `aiohttp` package.
+
+        Args:
+            query (str): SQL query.
+
+        """
+        return await self._get_async_context_manager().execute_long_running_query(query.strip())
+
+    async def submit_async(self, query):
+        """Create a long running query without waiting for its completion. It returns a
+        :py:class:`BatchJob <cartoframes.aio.BatchJob>`, that can be awaited to wait for it.
+        It requires the `aiohttp` package.
+
+        Args:
+            query (str): SQL query.
+
+        """
+        return await self._get_async_context_manager().create_batch_job(query.strip())
+
     def distinct(self, table_name, column_name):
         """Get the distict values and their count in a table
         for a specific column.
@@ -252,3 +307,8 @@ class SQLClient:
             print('-' * len(header))
         for row in rows:
             print(row_format.format(*row))
+
+    def _get_async_context_manager(self):
+        if self._async_context_manager is None:
+            self._async_context_manager = AsyncContextManager(self._context_manager.credentials)
+        return self._async_context_manager
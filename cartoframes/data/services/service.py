@@ -1,7 +1,7 @@
 import uuid
 from collections import namedtuple
 
-from ...io.managers.context_manager import ContextManager
+from ...io.managers.context_manager import get_context_manager
 
 SERVICE_KEYS = ('hires_geocoder', 'isolines')
 QUOTA_INFO_KEYS = ('monthly_quota', 'used_quota', 'soft_limit', 'provider')
@@ -13,7 +13,7 @@ Result = namedtuple('Result', ['data', 'metadata'])
 class Service:
 
     def __init__(self, credentials=None, quota_service=None):
-        self._context_manager = ContextManager(credentials)
+        self._context_manager = get_context_manager(credentials)
         self._credentials = self._context_manager.credentials
         self._quota_service = quota_service
         if self._quota_service not in SERVICE_KEYS:
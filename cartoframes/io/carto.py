@@ -1,20 +1,25 @@
 """Functions to interact with the CARTO platform"""
-import math
+
+from numbers import Number
 
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 
 from carto.exceptions import CartoException
 
-from .managers.context_manager import ContextManager, _compute_copy_data, get_dataframe_columns_info
-from ..utils.geom_utils import check_crs, has_geometry, set_geometry
+from .managers.context_manager import get_context_manager, _compute_copy_data, get_dataframe_columns_info
+from ..utils.geom_utils import check_crs, decode_ewkb_hex_to_wkb, decode_geometry_lazy, has_geometry, set_geometry
 from ..utils.logger import log
-from ..utils.utils import is_valid_str, is_sql_query
+from ..utils.utils import check_package, is_valid_str, is_sql_query
 from ..utils.metrics import send_metrics
 
 
 GEOM_COLUMN_NAME = 'the_geom'
 IF_EXISTS_OPTIONS = ['fail', 'replace', 'append']
+TO_CARTO_IF_EXISTS_OPTIONS = IF_EXISTS_OPTIONS + ['upsert']
+FORMAT_OPTIONS = ['csv', 'binary']
+OUTPUT_OPTIONS = ['geodataframe', 'arrow']
+PARQUET_EXTENSION = '.parquet'
 
 MAX_UPLOAD_SIZE_BYTES = 2000000000  # 2GB
 SAMPLE_ROWS_NUMBER = 100
@@ -23,7 +28,9 @@ CSV_TO_CARTO_RATIO = 1.4
 
 @send_metrics('data_downloaded')
 def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None, decode_geom=True,
-               null_geom_value=None):
+               null_geom_value=None, chunksize=None, parallel=1, partition_column=None, format='csv',
+               compress=True, columns=None, bbox=None, where=None, simplify=None, precision=None, cache=False,
+               output='geodataframe', lazy_geom=False):
     """Read a table or a SQL query from the CARTO account.
 
     Args:
@@ -32,30 +39,174 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
             instance of Credentials (username, api_key, etc).
         limit (int, optional):
             The number of rows to download. Default is to download all rows.
-        retry_times (int, optional):
-            Number of time to retry the download in case it fails. Default is 3.
+        retry_times (int or :py:class:`RetryPolicy <cartoframes.utils.RetryPolicy>`, optional):
+            Number of attempts of each COPY request when it is rate-limited, or the policy of the
+            retries. The retries wait with a jittered exponential backoff. Default is 3.
         schema (str, optional): prefix of the table. By default, it gets the
             `current_schema()` using the credentials.
         index_col (str, optional): name of the column to be loaded as index. It can be used also to set the index name.
         decode_geom (bool, optional): convert the "the_geom" column into a valid geometry column.
         null_geom_value (Object, optional): value for the `the_geom` column when it's null.
             Defaults to None
+        lazy_geom (bool, optional): keep the geometries as WKB bytes until they are used, instead of
+            decoding them when the data is read. The rows can be filtered and uploaded again with
+            `to_carto` without decoding the geometries. Default is False.
+        chunksize (int, optional): number of rows of each chunk. If it is set, an iterator of
+            GeoDataFrames is returned and every chunk is decoded while the rest of the data
+            is being downloaded. Default is to download all rows in a single GeoDataFrame.
+        parallel (int, optional): number of concurrent COPY streams used to download the data.
+            When it is greater than 1, the data is split in disjoint ranges of the `partition_column`
+            and every range is downloaded (and retried) independently. Default is 1.
+        partition_column (str, optional): numeric column used to split the data when `parallel` is
+            greater than 1. Default is "cartodb_id".
+        format (str, optional): 'csv', 'binary'. Format of the COPY stream used to download the data.
+            The binary format transfers the numbers and the geometries without encoding them as text,
+            which reduces the downloaded bytes. Default is 'csv'.
+        compress (bool, optional): request the data compressed with gzip. It reduces the
+            downloaded bytes at the cost of decompressing them. Default is True.
+        columns (list of str, optional): names of the columns to download. By default, it
+            downloads all the columns.
+        bbox (tuple, optional): (west, south, east, north) coordinates in EPSG:4326. Only the rows
+            whose geometry intersects the bounding box are downloaded.
+        where (str, optional): SQL condition to filter the rows, e.g. "population > 1000".
+        simplify (float, optional): tolerance, in the units of the geometries, to simplify them
+            with `ST_SimplifyPreserveTopology` before they are downloaded.
+        precision (int, optional): number of decimal digits of the coordinates of the geometries.
+            The rest of digits are zeroed with `ST_QuantizeCoordinates`, so the downloaded data
+            is compressed better.
+        cache (bool, optional): store the downloaded data in a persistent cache on disk, so it is
+            loaded locally the next time the same data is read, as long as the tables of the source
+            have not been updated. It requires the optional package `pyarrow`. The cache is configured
+            with :py:func:`setup_result_cache <cartoframes.utils.setup_result_cache>`. Default is False.
+        output (str, optional): 'geodataframe', 'arrow'. Type of the returned data. With 'arrow',
+            it returns a `pyarrow.Table` with the "the_geom" column as WKB bytes, so the geometries
+            are not decoded. The `index_col` is stored as the pandas index of the table, and the
+            `decode_geom` and `null_geom_value` params are not used. It requires the optional
+            package `pyarrow`. Default is 'geodataframe'.
 
     Returns:
-        geopandas.GeoDataFrame
+        geopandas.GeoDataFrame or pyarrow.Table, or an iterator of them if `chunksize` is set.
 
     Raises:
         ValueError: if the source is not a valid table_name or SQL query.
 
     """
+    _check_read_carto_params(source, chunksize, parallel, format, columns, bbox, where, simplify, precision, cache,
+                             output)
+
+    context_manager = get_context_manager(credentials)
+    pushdown = dict(columns=columns, bbox=bbox, where=where, simplify=simplify, precision=precision)
+
+    if chunksize is not None:
+        chunks = context_manager.copy_to_chunks(
+            source, schema, limit, retry_times, chunksize, format, compress, **pushdown)
+        return (_to_output(df, output, index_col, decode_geom, null_geom_value, lazy_geom) for df in chunks)
+
+    if parallel > 1:
+        df = context_manager.parallel_copy_to(
+            source, schema, limit, retry_times, parallel, partition_column, format, compress, cache=cache,
+            **pushdown)
+    else:
+        df = context_manager.copy_to(source, schema, limit, retry_times, format, compress, cache=cache, **pushdown)
+
+    return _to_output(df, output, index_col, decode_geom, null_geom_value, lazy_geom)
+
+
+def _check_read_carto_params(source, chunksize=None, parallel=1, format='csv', columns=None, bbox=None, where=None,
+                             simplify=None, precision=None, cache=False, output='geodataframe'):
     if not is_valid_str(source):
         raise ValueError('Wrong source. You should provide a valid table_name or SQL query.')
 
-    context_manager = ContextManager(credentials)
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize < 1):
+        raise ValueError('Wrong chunksize. You should provide an integer greater than 0.')
+
+    if not isinstance(parallel, int) or parallel < 1:
+        raise ValueError('Wrong parallel. You should provide an integer greater than 0.')
+
+    if chunksize is not None and parallel > 1:
+        raise ValueError('The `chunksize` and `parallel` params can not be used together.')
+
+    if chunksize is not None and cache:
+        raise ValueError('The `chunksize` and `cache` params can not be used together.')
+
+    if format not in FORMAT_OPTIONS:
+        raise ValueError('Wrong option for the `format` param. You should provide: {}.'.format(
+            ', '.join(FORMAT_OPTIONS)))
+
+    if columns is not None and (not isinstance(columns, (list, tuple)) or
+                                not all(is_valid_str(column) for column in columns)):
+        raise ValueError('Wrong columns. You should provide a list of column names.')
+
+    if bbox is not None and (not isinstance(bbox, (list, tuple)) or len(bbox) != 4 or
+                             not all(_is_number(value) for value in bbox)):
+        raise ValueError('Wrong bbox. You should provide a list of 4 numbers: west, south, east, north.')
+
+    if where is not None and not is_valid_str(where):
+        raise ValueError('Wrong where. You should provide a valid SQL condition.')
+
+    if simplify is not None and (not _is_number(simplify) or simplify <= 0):
+        raise ValueError('Wrong simplify. You should provide a positive number.')
+
+    if precision is not None and (not isinstance(precision, int) or isinstance(precision, bool)):
+        raise ValueError('Wrong precision. You should provide an integer.')
+
+    if output not in OUTPUT_OPTIONS:
+        raise ValueError('Wrong option for the `output` param. You should provide: {}.'.format(
+            ', '.join(OUTPUT_OPTIONS)))
+
+
+def _is_number(value):
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _to_output(df, output, index_col, decode_geom, null_geom_value, lazy_geom=False):
+    if output == 'arrow':
+        return _to_arrow(df, index_col)
+    return _to_geodataframe(df, index_col, decode_geom, null_geom_value, lazy_geom)
+
+
+def _to_arrow(df, index_col=None):
+    check_package('pyarrow', is_optional=True)
+    import pyarrow as pa
+
+    if GEOM_COLUMN_NAME in df:
+        # The geometries are converted from hexadecimal EWKB to WKB without decoding them
+        df[GEOM_COLUMN_NAME] = decode_ewkb_hex_to_wkb(df[GEOM_COLUMN_NAME])
+
+    if index_col and index_col in df:
+        return pa.Table.from_pandas(df.set_index(index_col))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _is_arrow_data(data):
+    return (is_valid_str(data) and data.endswith(PARQUET_EXTENSION)) or \
+        (type(data).__module__.startswith('pyarrow') and type(data).__name__ == 'Table')
+
+
+def _from_arrow(data, geom_col=None):
+    """Returns the DataFrame of a `pyarrow.Table` or a Parquet file, and its geometry column.
+    A binary geometry column is renamed to "the_geom" and uploaded as WKB, without decoding it."""
+    check_package('pyarrow', is_optional=True)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pandas import BooleanDtype, Int16Dtype, Int32Dtype, Int64Dtype
 
-    df = context_manager.copy_to(source, schema, limit, retry_times)
+    table = pq.read_table(data) if isinstance(data, str) else data
 
-    gdf = GeoDataFrame(df, crs='epsg:4326')
+    # The integer and boolean columns with nulls are not converted to float or object
+    nullable_types = {pa.int16(): Int16Dtype(), pa.int32(): Int32Dtype(), pa.int64(): Int64Dtype(),
+                      pa.bool_(): BooleanDtype()}
+    df = table.to_pandas(types_mapper=nullable_types.get)
+
+    if geom_col in df and geom_col != GEOM_COLUMN_NAME and pa.types.is_binary(table.schema.field(geom_col).type):
+        df = df.drop(columns=[GEOM_COLUMN_NAME], errors='ignore').rename(columns={geom_col: GEOM_COLUMN_NAME})
+        geom_col = None
+
+    return df, geom_col
+
+
+def _to_geodataframe(df, index_col, decode_geom, null_geom_value, lazy_geom=False):
+    gdf = GeoDataFrame(df)
 
     if index_col:
         if index_col in gdf:
@@ -64,8 +215,13 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
             gdf.index.name = index_col
 
     if decode_geom and GEOM_COLUMN_NAME in gdf:
-        # Decode geometry column
-        set_geometry(gdf, GEOM_COLUMN_NAME, inplace=True)
+        if lazy_geom:
+            # The geometries are decoded when they are used
+            gdf[GEOM_COLUMN_NAME] = decode_geometry_lazy(gdf[GEOM_COLUMN_NAME])
+            gdf.set_geometry(GEOM_COLUMN_NAME, inplace=True, crs='epsg:4326')
+        else:
+            # Decode geometry column
+            set_geometry(gdf, GEOM_COLUMN_NAME, inplace=True, crs='epsg:4326')
 
         if null_geom_value is not None:
             gdf[GEOM_COLUMN_NAME].fillna(null_geom_value, inplace=True)
@@ -76,15 +232,22 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
 @send_metrics('data_uploaded')
 def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col=None, index=False, index_label=None,
              cartodbfy=True, log_enabled=True, retry_times=3, max_upload_size=MAX_UPLOAD_SIZE_BYTES,
-             skip_quota_warning=False):
+             skip_quota_warning=False, parallel_uploads=1, format='csv', compress=True, key=None):
     """Upload a DataFrame to CARTO. The geometry's CRS must be WGS 84 (EPSG:4326) so you can use it on CARTO.
 
     Args:
-        dataframe (pandas.DataFrame, geopandas.GeoDataFrame`): data to be uploaded.
+        dataframe (pandas.DataFrame, geopandas.GeoDataFrame, pyarrow.Table or str): data to be uploaded,
+            or the path of a Parquet file (.parquet). The binary "the_geom" column, or `geom_col`, of
+            an Arrow table or a Parquet file is uploaded as WKB without decoding the geometries.
+            The Arrow data requires the optional package `pyarrow`.
         table_name (str): name of the table to upload the data.
         credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
             instance of Credentials (username, api_key, etc).
-        if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        if_exists (str, optional): 'fail', 'replace', 'append', 'upsert'. Default is 'fail'.
+            With 'upsert', only the new and modified rows are uploaded, identified by the `key`
+            column, and the rows of the table whose key is not in the dataframe are removed.
+            The table stores a hash of the values of every row in the `cartoframes_hash` column,
+            which is added to the existing tables without it.
         geom_col (str, optional): name of the geometry column of the dataframe.
         index (bool, optional): write the index in the table. Default is False.
         index_label (str, optional): name of the index column in the table. By default it
@@ -92,21 +255,65 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
         cartodbfy (bool, optional): convert the table to CARTO format. Default True. More info
             `here <https://carto.com/developers/sql-api/guides/creating-tables/#create-tables>`.
         log_enabled (bool, optional): enable the logging mechanism. Default is True.
-        retry_times (int, optional):
-            Number of time to retry the upload in case it fails. Default is 3.
-        max_upload_size (int, optional): defines the maximum size of the dataframe to be uploaded.
+        retry_times (int or :py:class:`RetryPolicy <cartoframes.utils.RetryPolicy>`, optional):
+            Number of attempts of each COPY request when it is rate-limited, or the policy of the
+            retries. The retries wait with a jittered exponential backoff. Default is 3.
+        max_upload_size (int, optional): defines the maximum size in bytes of each COPY stream.
+            When the encoded data reaches it, the rest of the data is uploaded in a new stream.
             Default is 2GB.
         skip_quota_warning (bool, optional): skip the quota exceeded check and force the upload.
             (The upload will still fail if the size of the dataset exceeds the remaining DB quota).
             Default is False.
+        parallel_uploads (int, optional): number of concurrent COPY streams used to upload the data.
+            When it is greater than 1, the data is loaded into a staging table and moved to the
+            target table at the end, so the table is not modified if any stream fails. Default is 1.
+        format (str, optional): 'csv', 'binary'. Format of the COPY stream used to upload the data.
+            The binary format transfers the numbers and the geometries without encoding them as text.
+            It falls back to CSV when the columns of an existing table have other types. Default is 'csv'.
+        compress (bool, optional): compress the uploaded data with gzip. The compression runs in a
+            background thread while the data is encoded. Default is True.
+        key (str, optional): name of the column with the unique identifier of every row. It is
+            required when `if_exists` is 'upsert'.
 
     Returns:
         string: the table name normalized.
 
     Raises:
-        ValueError: if the dataframe or table name provided are wrong or the if_exists param is not valid.
+        ValueError: if the dataframe or table name provided are wrong or the if_exists param is not valid,
+            or if the table to upsert does not have the columns of the dataframe.
 
     """
+    if _is_arrow_data(dataframe):
+        dataframe, geom_col = _from_arrow(dataframe, geom_col)
+
+    _check_to_carto_params(dataframe, table_name, if_exists, parallel_uploads, format, key)
+
+    context_manager = get_context_manager(credentials)
+
+    gdf = _prepare_gdf(dataframe, geom_col, index, index_label)
+
+    if not skip_quota_warning:
+        _check_quota(context_manager.credentials, gdf)
+
+    # The data is encoded while it is uploaded, starting a new COPY stream every `max_upload_size` bytes
+    if if_exists == 'upsert':
+        table_name = context_manager.upsert_from(
+            gdf, table_name, key, cartodbfy, retry_times, format, compress, max_upload_size)
+    elif parallel_uploads > 1:
+        table_name = context_manager.parallel_copy_from(
+            gdf, table_name, if_exists, cartodbfy, retry_times, parallel_uploads, format, compress, max_upload_size)
+    else:
+        table_name = context_manager.copy_from(
+            gdf, table_name, if_exists, cartodbfy, retry_times, format, compress, max_upload_size)
+
+    if log_enabled:
+        log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
+
+    return table_name
+
+
+def _check_to_carto_params(dataframe, table_name, if_exists, parallel_uploads, format, key=None,
+                           if_exists_options=TO_CARTO_IF_EXISTS_OPTIONS):
     if not isinstance(dataframe, DataFrame):
         raise ValueError('Wrong dataframe. You should provide a valid DataFrame instance.')
 
@@ -116,25 +323,26 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    if if_exists not in IF_EXISTS_OPTIONS:
+    if if_exists not in if_exists_options:
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
-            ', '.join(IF_EXISTS_OPTIONS)))
+            ', '.join(if_exists_options)))
 
-    context_manager = ContextManager(credentials)
+    if not isinstance(parallel_uploads, int) or parallel_uploads < 1:
+        raise ValueError('Wrong parallel_uploads. You should provide an integer greater than 0.')
 
-    if not skip_quota_warning:
-        me_data = context_manager.credentials.me_data
-        if me_data is not None and me_data.get('user_data'):
-            n = min(SAMPLE_ROWS_NUMBER, len(dataframe))
-            estimated_byte_size = len(dataframe.sample(n=n).to_csv(header=False)) * len(dataframe) \
-                / n / CSV_TO_CARTO_RATIO
-            remaining_byte_quota = me_data.get('user_data').get('remaining_byte_quota')
-
-            if remaining_byte_quota is not None and estimated_byte_size > remaining_byte_quota:
-                raise CartoException('DB Quota will be exceeded. '
-                                     'The remaining quota is {} bytes and the dataset size is {} bytes.'.format(
-                                        remaining_byte_quota, estimated_byte_size))
+    if if_exists == 'upsert':
+        if not is_valid_str(key):
+            raise ValueError('Wrong key. You should provide the name of the column to upsert the data.')
 
+        if parallel_uploads > 1:
+            raise ValueError('The `parallel_uploads` param can not be used with if_exists="upsert".')
+
+    if format not in FORMAT_OPTIONS:
+        raise ValueError('Wrong option for the `format` param. You should provide: {}.'.format(
+            ', '.join(FORMAT_OPTIONS)))
+
+
+def _prepare_gdf(dataframe, geom_col, index, index_label):
     gdf = GeoDataFrame(dataframe, copy=True)
 
     if index:
@@ -154,25 +362,26 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
         if GEOM_COLUMN_NAME in gdf and dataframe.geometry.name != GEOM_COLUMN_NAME:
             gdf.drop(columns=[GEOM_COLUMN_NAME], inplace=True)
 
-        # Prepare geometry column for the upload
-        gdf.rename_geometry(GEOM_COLUMN_NAME, inplace=True)
+        if gdf.geometry.name != GEOM_COLUMN_NAME:
+            # Prepare geometry column for the upload
+            gdf.rename_geometry(GEOM_COLUMN_NAME, inplace=True)
 
     elif isinstance(dataframe, GeoDataFrame):
         log.warning('Geometry column not found in the GeoDataFrame.')
 
-    chunk_count = math.ceil(estimate_csv_size(gdf) / max_upload_size)
-    chunk_row_size = int(math.ceil(len(gdf) / chunk_count))
-    chunked_gdf = [gdf[i:i + chunk_row_size] for i in range(0, gdf.shape[0], chunk_row_size)]
+    return gdf
 
-    for i, chunk in enumerate(chunked_gdf):
-        if i > 0:
-            if_exists = 'append'
-        table_name = context_manager.copy_from(chunk, table_name, if_exists, cartodbfy, retry_times)
 
-    if log_enabled:
-        log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
+def _check_quota(credentials, gdf):
+    me_data = credentials.me_data
+    if me_data is not None and me_data.get('user_data'):
+        estimated_byte_size = estimate_csv_size(gdf) / CSV_TO_CARTO_RATIO
+        remaining_byte_quota = me_data.get('user_data').get('remaining_byte_quota')
 
-    return table_name
+        if remaining_byte_quota is not None and estimated_byte_size > remaining_byte_quota:
+            raise CartoException('DB Quota will be exceeded. '
+                                 'The remaining quota is {} bytes and the dataset size is {} bytes.'.format(
+                                    remaining_byte_quota, estimated_byte_size))
 
 
 def list_tables(credentials=None):
@@ -186,7 +395,7 @@ def list_tables(credentials=None):
         DataFrame: A DataFrame with all the table names for the given credentials.
 
     """
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     return context_manager.list_tables()
 
 
@@ -210,7 +419,7 @@ def has_table(table_name, credentials=None, schema=None):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     return context_manager.has_table(table_name, schema)
 
 
@@ -230,7 +439,7 @@ def delete_table(table_name, credentials=None, log_enabled=True):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     result = context_manager.delete_table(table_name)
 
     if log_enabled:
@@ -266,7 +475,7 @@ def rename_table(table_name, new_table_name, credentials=None, if_exists='fail',
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
             ', '.join(IF_EXISTS_OPTIONS)))
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     new_table_name = context_manager.rename_table(table_name, new_table_name, if_exists)
 
     if log_enabled:
@@ -300,7 +509,7 @@ def copy_table(table_name, new_table_name, credentials=None, if_exists='fail', l
 
     query = 'SELECT * FROM {}'.format(table_name)
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     new_table_name = context_manager.create_table_from_query(query, new_table_name, if_exists)
 
     if log_enabled:
@@ -332,7 +541,7 @@ def create_table_from_query(query, new_table_name, credentials=None, if_exists='
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
             ', '.join(IF_EXISTS_OPTIONS)))
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     new_table_name = context_manager.create_table_from_query(query, new_table_name, if_exists)
 
     if log_enabled:
@@ -359,7 +568,7 @@ def describe_table(table_name, credentials=None, schema=None):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     query = context_manager.compute_query(table_name, schema)
 
     try:
@@ -399,7 +608,7 @@ def update_privacy_table(table_name, privacy, credentials=None, log_enabled=True
     if privacy.upper() not in valid_privacy_values:
         raise ValueError('Wrong privacy. Valid names are {}'.format(', '.join(valid_privacy_values)))
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     context_manager.update_privacy_table(table_name, privacy)
 
     if log_enabled:
@@ -0,0 +1,129 @@
+"""Handles of Batch SQL jobs. The jobs are created without waiting for their completion,
+so several jobs can run at the same time and be waited together with `wait_all`."""
+
+import time
+
+from carto.exceptions import CartoException
+from carto.sql import BATCH_JOBS_FAILED_STATUSES, BATCH_JOBS_PENDING_STATUSES
+
+# The status of the pending jobs is read every interval, which grows from the min to the
+# max interval, so the short jobs finish soon and the long ones do not flood the API
+MIN_POLL_INTERVAL = 0.5  # seconds
+MAX_POLL_INTERVAL = 10  # seconds
+POLL_BACKOFF = 1.5
+
+
+class BatchJob:
+    """Handle of a Batch SQL job.
+
+    Args:
+        batch_sql_client (carto.sql.BatchSQLClient): client used to read and cancel the job.
+        data (dict): data of the job returned by the Batch SQL API.
+        on_finish (callable, optional): function called when the job is finished.
+
+    Example:
+        >>> job = sql_client.submit('UPDATE table_name SET ...')
+        >>> job.status()
+        'running'
+        >>> job.wait(timeout=60)
+
+    """
+
+    def __init__(self, batch_sql_client, data, on_finish=None):
+        self._client = batch_sql_client
+        self._on_finish = on_finish
+        self.data = data
+        self._check_finished()
+
+    @property
+    def job_id(self):
+        return self.data['job_id']
+
+    def done(self):
+        """Returns True if the last status read is not 'pending' or 'running'. It does not
+        request the current status."""
+        return self.data['status'] not in BATCH_JOBS_PENDING_STATUSES
+
+    def status(self):
+        """Request the current status of the job: 'pending', 'running', 'done', 'failed',
+        'canceled' or 'unknown'."""
+        if not self.done():
+            self.data = self._client.read(self.job_id)
+            self._check_finished()
+        return self.data['status']
+
+    def cancel(self):
+        """Cancel the job if it is not finished. It returns the status of the job."""
+        if not self.done():
+            self.data = dict(self.data, status=self._client.cancel(self.job_id))
+            self._check_finished()
+        return self.data['status']
+
+    def wait(self, timeout=None):
+        """Wait for the completion of the job.
+
+        Args:
+            timeout (float, optional): maximum number of seconds to wait. By default, it waits
+                until the job is finished.
+
+        Returns:
+            dict: the data of the job.
+
+        Raises:
+            CartoException: if the job fails or it is canceled.
+            TimeoutError: if the job is not finished after `timeout` seconds.
+
+        """
+        return wait_all([self], timeout)[0]
+
+    def result(self):
+        """Returns the data of the finished job, or raises a CartoException if it has not succeeded."""
+        if self.data['status'] in BATCH_JOBS_FAILED_STATUSES:
+            raise CartoException('Batch SQL job failed with result: {data}'.format(data=self.data))
+        return self.data
+
+    def _check_finished(self):
+        if self._on_finish is not None and self.done():
+            on_finish, self._on_finish = self._on_finish, None
+            on_finish()
+
+
+def wait_all(jobs, timeout=None):
+    """Wait for the completion of several Batch SQL jobs. The status of the pending jobs
+    is read in each round, with an interval that grows while they are running.
+
+    Args:
+        jobs (list of :py:class:`BatchJob <cartoframes.data.clients.BatchJob>`): jobs to wait for.
+        timeout (float, optional): maximum number of seconds to wait. By default, it waits
+            until all the jobs are finished.
+
+    Returns:
+        list: the data of the jobs, in the same order.
+
+    Raises:
+        CartoException: if any job fails or it is canceled, after all the jobs are finished.
+        TimeoutError: if any job is not finished after `timeout` seconds.
+
+    Example:
+        >>> jobs = [sql_client.submit(query) for query in queries]
+        >>> wait_all(jobs)
+
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    interval = MIN_POLL_INTERVAL
+    pending = [job for job in jobs if not job.done()]
+
+    while pending:
+        sleep = interval
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('The Batch SQL jobs {} are not finished after {} seconds.'.format(
+                    ', '.join(job.job_id for job in pending), timeout))
+            sleep = min(interval, remaining)
+
+        time.sleep(sleep)
+        pending = [job for job in pending if job.status() in BATCH_JOBS_PENDING_STATUSES]
+        interval = min(interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+
+    return [job.result() for job in jobs]
@@ -0,0 +1,321 @@
+"""Encoding and decoding of PostgreSQL binary COPY streams.
+
+A binary COPY stream is a header, a tuple per row and a trailer. Each tuple is the number
+of fields (int16) followed by every field as its length (int32, -1 for nulls) and its
+value in network byte order. Geometries are transferred as raw EWKB.
+"""
+
+import struct
+import binascii as ba
+
+import numpy as np
+import pandas as pd
+
+from pandas.arrays import BooleanArray, IntegerArray
+
+from ...utils.utils import encode_row
+from ...utils.geom_utils import encode_geometries_ewkb
+
+BINARY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+BINARY_HEADER = BINARY_SIGNATURE + struct.pack('>ii', 0, 0)
+BINARY_TRAILER = struct.pack('>h', -1)
+BINARY_BATCH_ROWS = 10000
+BINARY_READ_SIZE = 2 ** 20
+FIXED_TYPES = {
+    'smallint': '>i2', 'int2': '>i2',
+    'integer': '>i4', 'int4': '>i4', 'int': '>i4',
+    'bigint': '>i8', 'int8': '>i8',
+    'real': '>f4', 'float4': '>f4',
+    'double precision': '>f8', 'float8': '>f8',
+    'boolean': 'u1', 'bool': 'u1',
+    'date': '>i4',
+    'timestamp': '>i8',
+    'timestamptz': '>i8'
+}
+DATETIME_UNITS = {
+    'date': 86400 * 10 ** 9,
+    'timestamp': 1000,
+    'timestamptz': 1000
+}
+POSTGRES_EPOCH = pd.Timestamp('2000-01-01').value
+# Table types with the same binary representation, by prefix of their `format_type`
+COMPATIBLE_TYPES = {
+    'timestamp': ('timestamp',),
+    'timestamptz': ('timestamp with time zone',),
+    'text': ('text', 'character'),
+    'geometry': ('geometry',)
+}
+
+_INT16 = struct.Struct('>h')
+_INT32 = struct.Struct('>i')
+
+
+def binary_type(column):
+    """Returns the PostgreSQL type used to transfer a column in binary format."""
+    if column.is_geom:
+        return 'geometry'
+    if column.dbtype in FIXED_TYPES:
+        return column.dbtype
+    return 'text'
+
+
+def is_binary_compatible(column, table_type):
+    """Checks if a column can be copied in binary format into a column of `table_type`."""
+    if table_type is None:
+        return False
+    kind = binary_type(column)
+    if kind in COMPATIBLE_TYPES:
+        return table_type.startswith(COMPATIBLE_TYPES[kind])
+    return table_type == column.dbtype
+
+
+def encode_binary_copy(df, columns):
+    """Encodes a DataFrame as a binary COPY stream, yielding a buffer per batch of rows."""
+    yield BINARY_HEADER
+    for start in range(0, len(df), BINARY_BATCH_ROWS):
+        yield _encode_binary_batch(df.iloc[start:start + BINARY_BATCH_ROWS], columns)
+    yield BINARY_TRAILER
+
+
+def decode_binary_copy(stream, columns, chunksize=None):
+    """Decodes a binary COPY stream into a DataFrame. With `chunksize` it returns an
+    iterator of DataFrames of `chunksize` rows decoded while the stream is read."""
+    if chunksize:
+        return _decode_binary_chunks(stream, columns, chunksize)
+
+    buffer = stream.read()
+    position = _read_header(buffer)
+    offsets, lengths, position, finished = _scan_rows(buffer, position, len(columns))
+    if not finished:
+        raise ValueError('The binary COPY stream is incomplete.')
+    return _decode_binary_rows(buffer, offsets, lengths, columns)
+
+
+def _decode_binary_chunks(stream, columns, chunksize):
+    buffer = b''
+    position = None
+    finished = False
+    frames = []
+    rows = 0
+    index = 0
+
+    while not finished:
+        block = _read_block(stream, BINARY_READ_SIZE)
+        buffer += block
+
+        if position is None:
+            if len(buffer) < len(BINARY_HEADER) and block:
+                continue
+            position = _read_header(buffer)
+
+        offsets, lengths, position, finished = _scan_rows(buffer, position, len(columns))
+        if not finished and not block:
+            raise ValueError('The binary COPY stream is incomplete.')
+
+        if len(offsets):
+            frame = _decode_binary_rows(buffer, offsets, lengths, columns)
+            frames.append(frame)
+            rows += len(frame)
+
+        # Keep only the incomplete row for the next block
+        buffer = buffer[position:]
+        position = 0
+
+        while rows >= chunksize or (finished and rows > 0):
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+            chunk = df.iloc[:chunksize]
+            chunk.index = pd.RangeIndex(index, index + len(chunk))
+            index += len(chunk)
+            yield chunk
+            frames = [df.iloc[chunksize:]] if len(df) > chunksize else []
+            rows = len(df) - len(chunk)
+
+
+def _read_block(stream, size):
+    # Raw streams return short reads, so the reads are repeated until the block is full
+    parts = []
+    remaining = size
+    while remaining > 0:
+        part = stream.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b''.join(parts)
+
+
+def _read_header(buffer):
+    if buffer[:len(BINARY_SIGNATURE)] != BINARY_SIGNATURE:
+        raise ValueError('The binary COPY stream has a wrong signature.')
+    extension_length = _INT32.unpack_from(buffer, len(BINARY_SIGNATURE) + 4)[0]
+    return len(BINARY_HEADER) + extension_length
+
+
+def _scan_rows(buffer, position, columns_count):
+    """Scans the complete rows of the buffer from `position`. It returns the offsets and
+    lengths of the fields, the position after the last complete row and whether the
+    trailer has been read."""
+    offsets = []
+    lengths = []
+    append_offset = offsets.append
+    append_length = lengths.append
+    unpack_int16 = _INT16.unpack_from
+    unpack_int32 = _INT32.unpack_from
+    size = len(buffer)
+    finished = False
+
+    while position + 2 <= size:
+        fields_count = unpack_int16(buffer, position)[0]
+        if fields_count == -1:
+            position += 2
+            finished = True
+            break
+        if fields_count != columns_count:
+            raise ValueError('The binary COPY stream has {} fields, expected {}.'.format(fields_count, columns_count))
+
+        scanned = len(offsets)
+        cursor = position + 2
+        for _ in range(fields_count):
+            if cursor + 4 > size:
+                cursor = size + 1
+                break
+            length = unpack_int32(buffer, cursor)[0]
+            cursor += 4
+            append_offset(cursor)
+            append_length(length)
+            if length > 0:
+                cursor += length
+
+        if cursor > size:
+            # Incomplete row, it is scanned again with the next block
+            del offsets[scanned:]
+            del lengths[scanned:]
+            break
+
+        position = cursor
+
+    return _fields_array(offsets, columns_count), _fields_array(lengths, columns_count), position, finished
+
+
+def _fields_array(values, columns_count):
+    return np.array(values, dtype=np.int64).reshape(-1, columns_count)
+
+
+def _decode_binary_rows(buffer, offsets, lengths, columns):
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    return pd.DataFrame({
+        column.name: _decode_binary_column(buffer, data, offsets[:, i], lengths[:, i], column)
+        for i, column in enumerate(columns)
+    })
+
+
+def _decode_binary_column(buffer, data, offsets, lengths, column):
+    kind = binary_type(column)
+    nulls = lengths < 0
+
+    if kind == 'geometry':
+        # Geometries are returned as hexadecimal EWKB, as in the CSV format
+        return np.array([
+            None if length < 0 else ba.hexlify(buffer[offset:offset + length]).decode('ascii').upper()
+            for offset, length in zip(offsets.tolist(), lengths.tolist())
+        ], dtype=object)
+
+    if kind == 'text':
+        return np.array([
+            None if length < 0 else buffer[offset:offset + length].decode('utf-8')
+            for offset, length in zip(offsets.tolist(), lengths.tolist())
+        ], dtype=object)
+
+    dtype = np.dtype(FIXED_TYPES[kind])
+    # Null fields have no value, so their offsets are not read
+    positions = np.where(nulls, 0, offsets)[:, None] + np.arange(dtype.itemsize)
+    values = data[positions].copy().view(dtype).ravel()
+
+    if dtype.kind == 'f':
+        values = values.astype(dtype.newbyteorder('='))
+        values[nulls] = np.nan
+        return values
+    if kind in DATETIME_UNITS:
+        # Infinite dates and timestamps are decoded as NaT
+        nulls |= (values == np.iinfo(dtype).max) | (values == np.iinfo(dtype).min)
+        values = values.astype(np.int64) * DATETIME_UNITS[kind] + POSTGRES_EPOCH
+        values[nulls] = np.iinfo(np.int64).min
+        if kind == 'timestamptz':
+            # The values are UTC timestamps, as the ones parsed from the CSV format
+            return pd.arrays.DatetimeArray(values.view('datetime64[ns]'), dtype=pd.DatetimeTZDtype(tz='UTC'))
+        return values.view('datetime64[ns]')
+    if dtype.kind == 'u':
+        return BooleanArray(values.astype(bool), nulls)
+    return IntegerArray(values.astype(np.int64), nulls)
+
+
+def _encode_binary_batch(df, columns):
+    rows = len(df)
+    fields = [_encode_binary_column(df[column.name], column) for column in columns]
+
+    # Every row is the fields count followed by the length and the value of each field
+    row_sizes = 2 + sum(4 + np.maximum(lengths, 0) for lengths, _ in fields)
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    buffer = np.empty(int(row_sizes.sum()), dtype=np.uint8)
+
+    _write_segments(buffer, row_starts, np.full(rows, 2), np.full(rows, len(columns), dtype='>i2').view(np.uint8))
+    positions = row_starts + 2
+
+    for lengths, values in fields:
+        _write_segments(buffer, positions, np.full(rows, 4), lengths.astype('>i4').view(np.uint8))
+        positions = positions + 4
+        sizes = np.maximum(lengths, 0)
+        _write_segments(buffer, positions, sizes, values)
+        positions = positions + sizes
+
+    return buffer.tobytes()
+
+
+def _write_segments(buffer, starts, lengths, values):
+    """Copies the consecutive segments of `values` to the `starts` positions of the buffer."""
+    shifts = starts - (np.cumsum(lengths) - lengths)
+    buffer[np.repeat(shifts, lengths) + np.arange(len(values))] = values
+
+
+def _encode_binary_column(values, column):
+    """Returns the length of each field (-1 for nulls) and the bytes of the non-null values."""
+    kind = binary_type(column)
+
+    if kind == 'geometry':
+        return _encode_variable_values(encode_geometries_ewkb(values, hex=False))
+
+    if kind == 'text':
+        return _encode_variable_values([_encode_text_value(value) for value in values])
+
+    dtype = np.dtype(FIXED_TYPES[kind])
+
+    if kind in DATETIME_UNITS:
+        nulls = values.isna().to_numpy()
+        array = (pd.DatetimeIndex(values).asi8 - POSTGRES_EPOCH) // DATETIME_UNITS[kind]
+    elif dtype.kind == 'f':
+        # NaN is a valid float value, as in the CSV format
+        nulls = np.zeros(len(values), dtype=bool)
+        array = values.to_numpy(dtype=np.float64)
+    else:
+        nulls = values.isna().to_numpy()
+        array = values.to_numpy(dtype=np.int64, na_value=0)
+
+    lengths = np.where(nulls, -1, dtype.itemsize)
+    return lengths, array[~nulls].astype(dtype).view(np.uint8)
+
+
+def _encode_variable_values(values):
+    lengths = np.array([-1 if value is None else len(value) for value in values], dtype=np.int64)
+    data = b''.join(value for value in values if value is not None)
+    return lengths, np.frombuffer(data, dtype=np.uint8)
+
+
+def _encode_text_value(value):
+    # Same text as the CSV format, without the CSV quoting
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    if isinstance(value, bytes):
+        return value
+    return encode_row(value)
@@ -1,45 +1,65 @@
-import time
+import json
+import uuid
+import inspect
+import functools
 
+import numpy as np
 import pandas as pd
 
-from warnings import warn
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 from carto.auth import APIKeyAuthClient
 from carto.datasets import DatasetManager
-from carto.exceptions import CartoException, CartoRateLimitException
-from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
+from carto.exceptions import CartoException
+from carto.sql import SQLClient, BatchSQLClient
+from pandas.api.types import infer_dtype, is_bool_dtype, is_float_dtype, is_integer_dtype
 from pyrestcli.exceptions import NotFoundException
 
 from ..dataset_info import DatasetInfo
 from ... import __version__
 from ...auth.defaults import get_default_credentials
 from ...utils.logger import log
-from ...utils.geom_utils import encode_geometry_ewkb
-from ...utils.utils import is_sql_query, check_credentials, encode_row, map_geom_type, PG_NULL, double_quote
-from ...utils.columns import (get_dataframe_columns_info, get_query_columns_info, obtain_converters, date_columns_names,
-                              normalize_name)
-
-DEFAULT_RETRY_TIMES = 3
+from ...utils.retry_policy import DEFAULT_RETRY_TIMES, get_retry_policy
+from ...utils.result_cache import result_cache
+from ...utils.session_pool import get_session, get_worker_session
+from .batch_job import BatchJob
+from .binary_copy import (BINARY_HEADER, BINARY_TRAILER, binary_type, decode_binary_copy, is_binary_compatible,
+                          _encode_binary_batch)
+from .copy_client import CopyClient
+from .metadata_cache import metadata_cache
+from ...utils.geom_utils import encode_geometries_ewkb
+from ...utils.utils import (is_sql_query, check_credentials, encode_value, get_hash, map_geom_type, PG_NULL,
+                            double_quote)
+from ...utils.columns import (ColumnInfo, get_dataframe_columns_info, get_query_columns_info, obtain_dtypes,
+                              obtain_na_values, date_columns_names, int_columns_names, bool_columns_names,
+                              text_columns_names, normalize_name, MAX_LENGTH, INT_DBTYPES, FLOAT_DBTYPES)
+
+COPY_BATCH_ROWS = 10000
+# Maximum number of ContextManager instances kept, the least recently used ones are released
+MAX_CONTEXT_MANAGERS = 32
+DEFAULT_PARTITION_COLUMN = 'cartodb_id'
+BOOL_VALUES = {'t': True, 'f': False}
+# Cached metadata that changes when the tables are created, dropped, renamed or altered
+TABLE_METADATA = ('has_table', 'columns')
+RESERVED_COLUMNS = ['cartodb_id', 'the_geom', 'the_geom_webmercator']
+ROW_HASH_COLUMN = 'cartoframes_hash'
+GEOM_COLUMN = 'the_geom'
+SETUP_NOTICE_PREFIX = 'cartoframes_setup '
 
 
 def retry_copy(func):
+    """Retry the rate-limited calls with the policy of the `retry_times` param, which can be
+    passed by position or keyword."""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        m_retry_times = kwargs.get('retry_times', DEFAULT_RETRY_TIMES)
-        while m_retry_times >= 1:
-            try:
-                return func(*args, **kwargs)
-            except CartoRateLimitException as err:
-                m_retry_times -= 1
-
-                if m_retry_times <= 0:
-                    warn(('Read call was rate-limited. '
-                          'This usually happens when there are multiple queries being read at the same time.'))
-                    raise err
-
-                warn('Read call rate limited. Waiting {s} seconds'.format(s=err.retry_after))
-                time.sleep(err.retry_after)
-                warn('Retrying...')
-        return func(*args, **kwargs)
+        bound_args = signature.bind_partial(*args, **kwargs)
+        bound_args.apply_defaults()
+        retry_times = bound_args.arguments.get('retry_times')
+        return get_retry_policy(retry_times).call(lambda: func(*args, **kwargs))
     return wrapper
 
 
@@ -66,51 +86,232 @@ class ContextManager:
 
         self.auth_client = _create_auth_client(self.credentials)
         self.sql_client = SQLClient(self.auth_client)
-        self.copy_client = CopySQLClient(self.auth_client)
+        self.copy_client = CopyClient(self.auth_client)
         self.batch_sql_client = BatchSQLClient(self.auth_client)
+        self.cache_namespace = (self.credentials.base_url, self.credentials.api_key)
+        self._public_sql_client = None
 
     @not_found
     def execute_query(self, query, parse_json=True, do_post=True, format=None, **request_args):
-        return self.sql_client.send(query.strip(), parse_json, do_post, format, **request_args)
+        try:
+            return self.sql_client.send(query.strip(), parse_json, do_post, format, **request_args)
+        finally:
+            # Any query can create, alter or drop tables, even a SELECT: `SELECT CDB_DropTable(...)`
+            self._invalidate_table_metadata()
+
+    @not_found
+    def _execute_read_query(self, query, do_post=True):
+        """Execute a query that does not modify the tables, keeping the cached table metadata.
+        It is only used for the metadata queries that do not run the source query."""
+        return self.sql_client.send(query.strip(), do_post=do_post)
 
     @not_found
     def execute_long_running_query(self, query):
-        return self.batch_sql_client.create_and_wait_for_completion(query.strip())
+        try:
+            return self.create_batch_job(query).wait()
+        finally:
+            self._invalidate_table_metadata()
 
-    def copy_to(self, source, schema=None, limit=None, retry_times=DEFAULT_RETRY_TIMES):
-        query = self.compute_query(source, schema)
-        columns = self._get_query_columns_info(query)
-        copy_query = self._get_copy_query(query, columns, limit)
-        return self._copy_to(copy_query, columns, retry_times)
+    @not_found
+    def create_batch_job(self, query):
+        """Create a Batch SQL job and return its handle without waiting for its completion.
+        The cached table metadata is invalidated when the job is finished."""
+        data = self.batch_sql_client.create(query.strip())
+        return BatchJob(self.batch_sql_client, data, self._invalidate_table_metadata)
+
+    def clear_cache(self):
+        """Remove the cached metadata (schema, table existence and column info) of the credentials."""
+        metadata_cache.invalidate(self.cache_namespace)
+
+    def copy_to(self, source, schema=None, limit=None, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                compress=True, columns=None, bbox=None, where=None, simplify=None, precision=None, cache=False):
+        """Download the data of the source. The `columns`, `bbox`, `where`, `simplify` and
+        `precision` options are applied by the COPY query, so only the requested data is
+        transferred. With `cache`, the data is stored in the persistent result cache."""
+        query = _filter_query(self.compute_query(source, schema), bbox, where)
+        query_columns = _select_columns(self._get_query_columns_info(query), columns)
+        copy_query = self._get_copy_query(query, query_columns, limit, format, simplify, precision)
+
+        def download():
+            return self._copy_to(copy_query, query_columns, retry_times=retry_times, format=format,
+                                 compress=compress)
+
+        if cache:
+            return self._cached_copy_to(query, copy_query, format, download)
+        return download()
+
+    def copy_to_chunks(self, source, schema=None, limit=None, retry_times=DEFAULT_RETRY_TIMES, chunksize=None,
+                       format='csv', compress=True, columns=None, bbox=None, where=None, simplify=None,
+                       precision=None):
+        """Return an iterator of DataFrames of `chunksize` rows decoded while the data is downloaded."""
+        query = _filter_query(self.compute_query(source, schema), bbox, where)
+        query_columns = _select_columns(self._get_query_columns_info(query), columns)
+        copy_query = self._get_copy_query(query, query_columns, limit, format, simplify, precision)
+        return self._copy_to(copy_query, query_columns, retry_times=retry_times, chunksize=chunksize, format=format,
+                             compress=compress)
+
+    def parallel_copy_to(self, source, schema=None, limit=None, retry_times=DEFAULT_RETRY_TIMES,
+                         parallel_downloads=2, partition_column=None, format='csv', compress=True, columns=None,
+                         bbox=None, where=None, simplify=None, precision=None, cache=False):
+        """Download the data through several concurrent COPY streams, one per range of
+        values of the partition column (`cartodb_id` by default)."""
+        query = _filter_query(self.compute_query(source, schema), bbox, where)
+        source_columns = self._get_query_columns_info(query)
+        query_columns = _select_columns(source_columns, columns)
+        copy_query = self._get_copy_query(query, query_columns, limit, format, simplify, precision)
+        partition_column = partition_column or DEFAULT_PARTITION_COLUMN
+
+        # The partition column is not required in the selected columns
+        column = next((c for c in source_columns if c.name == partition_column), None)
+        if column is None or column.dbtype not in INT_DBTYPES + FLOAT_DBTYPES:
+            raise ValueError('Wrong partition column. "{}" must be a numeric column of the source.'.format(
+                partition_column))
+
+        def download():
+            if limit is not None:
+                log.debug('Parallel download is not available with limit')
+                return self._copy_to(copy_query, query_columns, retry_times=retry_times, format=format,
+                                     compress=compress)
+
+            bounds = self._get_partition_bounds(query, partition_column)
+            if bounds is None:
+                return self._copy_to(copy_query, query_columns, retry_times=retry_times, format=format,
+                                     compress=compress)
+
+            ranges = _compute_partition_ranges(*bounds, parallel_downloads, column.dbtype in INT_DBTYPES)
+            partition_queries = [
+                self._get_copy_query(_partition_query(query, partition_column, start, end,
+                                                      last=(i == len(ranges) - 1)),
+                                     query_columns, None, format, simplify, precision)
+                for i, (start, end) in enumerate(ranges)
+            ]
+
+            return self._parallel_copy_to(partition_queries, query_columns, retry_times, parallel_downloads,
+                                          format, compress)
+
+        if cache:
+            # The whole result is cached, not the partitions
+            return self._cached_copy_to(query, copy_query, format, download)
+        return download()
+
+    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True, retry_times=DEFAULT_RETRY_TIMES,
+                  format='csv', compress=True, max_upload_size=None):
+        """Upload the data through one or more COPY streams. A new stream is started when
+        the encoded data of the current one reaches `max_upload_size` bytes. The table is
+        prepared before the upload in a single request (see `_setup_table`), and it is
+        cartodbfied once all the data is uploaded, unless it already was and its layout
+        has not changed."""
+        table_name = self.normalize_table_name(table_name)
+        df_columns = get_dataframe_columns_info(gdf)
+
+        setup = self._setup_table(table_name, df_columns, if_exists)
+        format = _setup_table_copy_format(table_name, df_columns, setup, format)
 
-    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True, retry_times=DEFAULT_RETRY_TIMES):
+        self._copy_from(gdf, table_name, df_columns, retry_times=retry_times, format=format, compress=compress,
+                        max_bytes=max_upload_size)
+
+        if cartodbfy and _setup_table_needs_cartodbfy(setup):
+            self._cartodbfy_table(table_name, setup['schema'])
+        return table_name
+
+    def parallel_copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True,
+                           retry_times=DEFAULT_RETRY_TIMES, parallel_uploads=2, format='csv', compress=True,
+                           max_upload_size=None):
+        """Upload the data through several concurrent COPY streams, one per range of rows.
+        The data is loaded into a staging table first, so the target table is only modified
+        if all the ranges are uploaded correctly."""
         schema = self.get_schema()
         table_name = self.normalize_table_name(table_name)
         df_columns = get_dataframe_columns_info(gdf)
+        table_exists = self.has_table(table_name, schema)
 
-        if self.has_table(table_name, schema):
-            if if_exists == 'replace':
+        if table_exists and if_exists == 'fail':
+            raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
+                            'Please choose a different `table_name` or use '
+                            'if_exists="replace" to overwrite it.'.format(
+                                table_name=table_name, schema=schema))
+
+        staging_table_name = _staging_table_name(table_name)
+        self._create_table_from_columns(staging_table_name, schema, df_columns, False)
+
+        try:
+            self._parallel_copy_from(gdf, staging_table_name, df_columns, retry_times, parallel_uploads, format,
+                                     compress, max_upload_size)
+
+            if not table_exists:
+                self._rename_staging_table(staging_table_name, table_name, schema, cartodbfy)
+            elif if_exists == 'replace':
                 table_query = self._compute_query_from_table(table_name, schema)
                 table_columns = self._get_query_columns_info(table_query)
+                self._replace_from_staging_table(staging_table_name, table_name, schema, df_columns,
+                                                 table_columns, cartodbfy)
+            else:  # 'append'
+                self._append_from_staging_table(staging_table_name, table_name, df_columns)
+        except Exception:
+            log.debug('Removing staging table "{}"'.format(staging_table_name))
+            self.delete_table(staging_table_name)
+            raise
+
+        return table_name
 
-                if self._compare_columns(df_columns, table_columns):
-                    # Equal columns: truncate table
-                    self._truncate_table(table_name, schema, cartodbfy)
-                else:
-                    # Diff columns: truncate table and drop + add columns
-                    self._truncate_and_drop_add_columns(table_name, schema, df_columns, table_columns, cartodbfy)
+    def upsert_from(self, gdf, table_name, key, cartodbfy=True, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                    compress=True, max_upload_size=None):
+        """Upload the new and modified rows of the data, identified by the `key` column, and
+        remove the rows of the table whose key is not in the data. The rows are compared by a
+        hash of their values, stored in the `cartoframes_hash` column of the table, so only the
+        keys and the hashes of the table are downloaded. The changes are uploaded to a staging
+        table and applied to the table in a single transaction.
 
-            elif if_exists == 'fail':
-                raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
-                                'Please choose a different `table_name` or use '
-                                'if_exists="replace" to overwrite it.'.format(
-                                    table_name=table_name, schema=schema))
-            else:  # 'append'
-                pass
+        The `cartoframes_hash` column is added to the existing tables without it, and all their
+        rows are uploaded by the first upsert."""
+        table_name = self.normalize_table_name(table_name)
+        df_columns = [c for c in get_dataframe_columns_info(gdf) if c.dbname != ROW_HASH_COLUMN]
+        key_column = _upsert_key_column(gdf, df_columns, key)
+
+        gdf = gdf.assign(**{ROW_HASH_COLUMN: _row_hashes(gdf, df_columns)})
+        hash_column = ColumnInfo(ROW_HASH_COLUMN, ROW_HASH_COLUMN, 'text', False)
+        columns = df_columns + [hash_column]
+
+        setup = self._setup_table(table_name, columns, 'upsert')
+        schema = setup['schema']
+
+        if setup['action'] == 'create':
+            remote = pd.DataFrame({key_column.dbname: [], ROW_HASH_COLUMN: []})
         else:
-            self._create_table_from_columns(table_name, schema, df_columns, cartodbfy)
+            missing_columns = [c.dbname for c in columns if c.dbname not in (setup['types'] or {})]
+            if missing_columns:
+                raise ValueError('Table "{schema}.{table_name}" can not be upserted. It does not have the '
+                                 'columns: {columns}.'.format(schema=schema, table_name=table_name,
+                                                              columns=', '.join(missing_columns)))
+            remote_columns = [ColumnInfo(key_column.dbname, key_column.dbname, key_column.dbtype, False), hash_column]
+            remote_query = 'SELECT {key},{hash} FROM ({query}) _q'.format(
+                key=key_column.quoted_dbname, hash=double_quote(ROW_HASH_COLUMN),
+                query=self._compute_query_from_table(table_name, schema))
+            remote = self._copy_to(remote_query, remote_columns, retry_times=retry_times, compress=compress)
+
+        changed, removed_keys = _upsert_changes(gdf, key_column, remote)
+        log.debug('UPSERT {} new or modified rows and {} removed rows'.format(len(changed), len(removed_keys)))
+
+        if len(changed) or len(removed_keys):
+            staging_table_name = _staging_table_name(table_name)
+            self._create_table_from_columns(staging_table_name, schema, columns, False)
 
-        self._copy_from(gdf, table_name, df_columns, retry_times)
+            try:
+                if len(changed):
+                    self._copy_from(changed, staging_table_name, columns, retry_times=retry_times, format=format,
+                                    compress=compress, max_bytes=max_upload_size)
+                if len(removed_keys):
+                    self._copy_from(removed_keys.to_frame(key_column.name), staging_table_name, [key_column],
+                                    retry_times=retry_times, compress=compress, max_bytes=max_upload_size)
+                self.execute_long_running_query(
+                    _upsert_from_table_query(staging_table_name, table_name, columns, key_column))
+            except Exception:
+                log.debug('Removing staging table "{}"'.format(staging_table_name))
+                self.delete_table(staging_table_name)
+                raise
+
+        if cartodbfy and setup['action'] == 'create':
+            self._cartodbfy_table(table_name, schema)
         return table_name
 
     def create_table_from_query(self, query, table_name, if_exists, cartodbfy=True):
@@ -150,7 +351,7 @@ class ContextManager:
 
     def has_table(self, table_name, schema=None):
         query = self.compute_query(table_name, schema)
-        return self._check_exists(query)
+        return self._cached('has_table', query, lambda: self._check_exists(query))
 
     def delete_table(self, table_name):
         query = _drop_table_query(table_name)
@@ -188,8 +389,11 @@ class ContextManager:
 
     def get_schema(self):
         """Get user schema from current credentials"""
+        return self._cached('schema', None, self._get_schema)
+
+    def _get_schema(self):
         query = 'SELECT current_schema()'
-        result = self.execute_query(query, do_post=False)
+        result = self._execute_read_query(query, do_post=False)
         return result['rows'][0]['current_schema']
 
     def get_geom_type(self, query):
@@ -238,11 +442,11 @@ class ContextManager:
     def is_public(self, query):
         # Used to detect public tables in queries in the publication,
         # because privacy only works for tables.
-        public_auth_client = _create_auth_client(self.credentials, public=True)
-        public_sql_client = SQLClient(public_auth_client)
+        if self._public_sql_client is None:
+            self._public_sql_client = SQLClient(_create_auth_client(self.credentials, public=True))
         exists_query = 'EXPLAIN {}'.format(query)
         try:
-            public_sql_client.send(exists_query, do_post=False)
+            self._public_sql_client.send(exists_query, do_post=False)
             return True
         except CartoException:
             return False
@@ -250,13 +454,28 @@ class ContextManager:
     def get_table_names(self, query):
         # Used to detect tables in queries in the publication.
         query = 'SELECT CDB_QueryTablesText($q${}$q$) as tables'.format(query)
-        result = self.execute_query(query)
+        result = self._execute_read_query(query)
         tables = []
         if result['total_rows'] > 0 and result['rows'][0]['tables']:
             # Dataset_info only works with tables without schema
             tables = [table.split('.')[1] if '.' in table else table for table in result['rows'][0]['tables']]
         return tables
 
+    def _setup_table(self, table_name, columns, if_exists):
+        """Check the existence and the columns of the table and create, truncate or alter it,
+        all in one statement. It returns the result of the setup: the schema, the action
+        performed, the column types of the table and whether it was already cartodbfied."""
+        log.debug('SETUP table "{}"'.format(table_name))
+        output = self.execute_query(_setup_table_query(table_name, columns, if_exists))
+
+        setup = _parse_setup_table_output(output)
+        if setup['action'] == 'fail':
+            raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
+                            'Please choose a different `table_name` or use '
+                            'if_exists="replace" to overwrite it.'.format(
+                                table_name=table_name, schema=setup['schema']))
+        return setup
+
     def _compare_columns(self, a, b):
         a_copy = [i for i in a if _not_reserved(i.name)]
         b_copy = [i for i in b if _not_reserved(i.name)]
@@ -266,6 +485,10 @@ class ContextManager:
 
         return a_copy == b_copy
 
+    def _cartodbfy_table(self, table_name, schema):
+        log.debug('CARTODBFY table "{}"'.format(table_name))
+        self.execute_long_running_query(_cartodbfy_query(table_name, schema))
+
     def _drop_create_table_from_query(self, table_name, schema, query, cartodbfy):
         log.debug('DROP + CREATE table "{}"'.format(table_name))
         query = 'BEGIN; {drop}; {create}; {cartodbfy}; COMMIT;'.format(
@@ -276,25 +499,37 @@ class ContextManager:
 
     def _create_table_from_columns(self, table_name, schema, columns, cartodbfy):
         log.debug('CREATE table "{}"'.format(table_name))
-        query = 'BEGIN; {create}; {cartodbfy}; COMMIT;'.format(
-            create=_create_table_from_columns_query(table_name, columns),
+        self.execute_long_running_query(_create_table_transaction_query(table_name, schema, columns, cartodbfy))
+
+    def _rename_staging_table(self, staging_table_name, table_name, schema, cartodbfy):
+        log.debug('RENAME staging table to "{}"'.format(table_name))
+        query = 'BEGIN; {rename}; {cartodbfy}; COMMIT;'.format(
+            rename=_rename_table_query(staging_table_name, table_name).rstrip(';'),
             cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else '')
         self.execute_long_running_query(query)
 
-    def _truncate_table(self, table_name, schema, cartodbfy):
-        log.debug('TRUNCATE table "{}"'.format(table_name))
-        query = 'BEGIN; {truncate}; {cartodbfy}; COMMIT;'.format(
+    def _replace_from_staging_table(self, staging_table_name, table_name, schema, df_columns, table_columns,
+                                    cartodbfy):
+        log.debug('REPLACE table "{}" from staging table'.format(table_name))
+        if self._compare_columns(df_columns, table_columns):
+            alter_columns = ''
+        else:
+            alter_columns = '{drop_columns}; {add_columns};'.format(
+                drop_columns=_drop_columns_query(table_name, table_columns),
+                add_columns=_add_columns_query(table_name, df_columns))
+        query = 'BEGIN; {truncate}; {alter_columns} {insert}; {drop}; {cartodbfy}; COMMIT;'.format(
             truncate=_truncate_table_query(table_name),
+            alter_columns=alter_columns,
+            insert=_insert_from_table_query(staging_table_name, table_name, df_columns),
+            drop=_drop_table_query(staging_table_name),
             cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else '')
         self.execute_long_running_query(query)
 
-    def _truncate_and_drop_add_columns(self, table_name, schema, df_columns, table_columns, cartodbfy):
-        log.debug('TRUNCATE AND DROP + ADD columns table "{}"'.format(table_name))
-        query = 'BEGIN; {truncate}; {drop_columns}; {add_columns}; {cartodbfy}; COMMIT;'.format(
-            truncate=_truncate_table_query(table_name),
-            drop_columns=_drop_columns_query(table_name, table_columns),
-            add_columns=_add_columns_query(table_name, df_columns),
-            cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else '')
+    def _append_from_staging_table(self, staging_table_name, table_name, df_columns):
+        log.debug('APPEND staging table to "{}"'.format(table_name))
+        query = 'BEGIN; {insert}; {drop}; COMMIT;'.format(
+            insert=_insert_from_table_query(staging_table_name, table_name, df_columns),
+            drop=_drop_table_query(staging_table_name))
         self.execute_long_running_query(query)
 
     def compute_query(self, source, schema=None):
@@ -312,21 +547,84 @@ class ContextManager:
     def _check_exists(self, query):
         exists_query = 'EXPLAIN {}'.format(query)
         try:
-            self.execute_query(exists_query, do_post=False)
+            self._execute_read_query(exists_query, do_post=False)
             return True
         except CartoException:
             return False
 
     def _get_query_columns_info(self, query):
+        return list(self._cached('columns', query, lambda: self._request_query_columns_info(query)))
+
+    def _cached_copy_to(self, query, copy_query, format, download):
+        """Return the cached result of the copy query, or download and cache it. The results
+        are keyed by the credentials, the copy query and the last update of the tables of the
+        query, so the data of a modified table is downloaded again."""
+        updated_at = self._get_tables_updated_at(query)
+        if updated_at is None:
+            log.debug('The result can not be cached: the last update of the tables is unknown')
+            return download()
+
+        cache_key = (self.cache_namespace, format, copy_query, updated_at)
+        df = result_cache.get(cache_key)
+        if df is None:
+            df = download()
+            # The geometries are stored as EWKB bytes, half the size of the hexadecimal values
+            result_cache.set(cache_key, _encode_cached_geometries(df))
+        else:
+            log.debug('Result loaded from the cache')
+            df = _decode_cached_geometries(df)
+        return df
+
+    def _get_tables_updated_at(self, query):
+        """Returns the last update of the tables of the query, or None if any of them has no
+        update time registered (e.g. the table is not cartodbfied) or the query has no tables."""
+        result = self._execute_read_query(_tables_updated_at_query(query))
+        rows = result.get('rows')
+        if not rows:
+            return None
+        row = rows[0]
+        if not row.get('tables') or row.get('versions') != row.get('tables'):
+            return None
+        return row.get('updated_at')
+
+    def _request_query_columns_info(self, query):
         query = 'SELECT * FROM ({}) _q LIMIT 0'.format(query)
-        table_info = self.execute_query(query)
+        table_info = self._execute_read_query(query)
         return get_query_columns_info(table_info['fields'])
 
-    def _get_copy_query(self, query, columns, limit):
-        query_columns = [
-            double_quote(column.name) for column in columns
-            if (column.name != 'the_geom_webmercator')
-        ]
+    def _cached(self, kind, key, request):
+        cache_key = (self.cache_namespace, kind, key)
+        value = metadata_cache.get(cache_key)
+        if value is None:
+            value = request()
+            metadata_cache.set(cache_key, value)
+        return value
+
+    def _invalidate_table_metadata(self):
+        metadata_cache.invalidate(self.cache_namespace, TABLE_METADATA)
+
+    def _get_partition_bounds(self, query, column):
+        bounds_query = 'SELECT MIN({column}) AS min, MAX({column}) AS max FROM ({query}) _q'.format(
+            column=double_quote(column), query=query)
+        result = self.execute_query(bounds_query)
+        row = result.get('rows')[0]
+        if row.get('min') is None:
+            return None
+        return row.get('min'), row.get('max')
+
+    def _get_copy_query(self, query, columns, limit, format='csv', simplify=None, precision=None):
+        query_columns = []
+        for column in _copy_columns(columns):
+            name = double_quote(column.name)
+            value = _geom_expression(name, simplify, precision) if column.name == GEOM_COLUMN else name
+
+            if format == 'binary':
+                # Cast the columns to the types decoded by the binary format
+                query_columns.append('{0}::{1} AS {2}'.format(value, binary_type(column), name))
+            elif value != name:
+                query_columns.append('{0} AS {1}'.format(value, name))
+            else:
+                query_columns.append(name)
 
         query = 'SELECT {columns} FROM ({query}) _q'.format(
             query=query,
@@ -341,33 +639,74 @@ class ContextManager:
         return query
 
     @retry_copy
-    def _copy_to(self, query, columns, retry_times=DEFAULT_RETRY_TIMES):
+    def _copy_to(self, query, columns, retry_times=DEFAULT_RETRY_TIMES, chunksize=None, format='csv', compress=True,
+                 copy_client=None):
         log.debug('COPY TO')
-        copy_query = 'COPY ({0}) TO stdout WITH (FORMAT csv, HEADER true, NULL \'{1}\')'.format(query, PG_NULL)
-
-        raw_result = self.copy_client.copyto_stream(copy_query)
-
-        converters = obtain_converters(columns)
-        parse_dates = date_columns_names(columns)
-
-        df = pd.read_csv(
-            raw_result,
-            converters=converters,
-            parse_dates=parse_dates)
-
-        return df
+        copy_client = copy_client or self.copy_client
+        raw_result = copy_client.copyto_stream(_copy_to_query(query, format), compress)
+        return _read_copy_data(raw_result, columns, chunksize, format)
+
+    def _worker_copy_client(self):
+        """CopyClient for the COPY streams run in a worker thread. Its HTTP session is not shared
+        with other threads, but it reuses the connections of the session of the credentials."""
+        return CopyClient(_create_auth_client(self.credentials, session=get_worker_session(self.credentials)))
+
+    def _parallel_copy_to(self, queries, columns, retry_times, parallel_downloads, format='csv', compress=True):
+        log.debug('COPY TO ({} streams)'.format(parallel_downloads))
+
+        def copy_partition(query):
+            # The retries are applied per partition, so the rest of partitions are not restarted
+            return self._copy_to(query, columns, retry_times=retry_times, format=format, compress=compress,
+                                 copy_client=self._worker_copy_client())
+
+        with ThreadPoolExecutor(max_workers=parallel_downloads) as executor:
+            dfs = list(executor.map(copy_partition, queries))
+
+        return pd.concat(dfs, ignore_index=True)
+
+    def _copy_from(self, dataframe, table_name, columns, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                   compress=True, max_bytes=None, encoders=None, copy_client=None):
+        if format != 'binary' and encoders is None:
+            # The encoders are reused by all the streams and their retries
+            encoders = _column_encoders(dataframe, columns)
+
+        start = 0
+        while True:
+            end = self._copy_from_range(dataframe, table_name, columns, start, max_bytes,
+                                        retry_times=retry_times, format=format, compress=compress,
+                                        encoders=encoders, copy_client=copy_client)
+            if end >= len(dataframe):
+                break
+            if end == start:
+                raise CartoException('The COPY FROM data was not read by the client.')
+            start = end
 
     @retry_copy
-    def _copy_from(self, dataframe, table_name, columns, retry_times=DEFAULT_RETRY_TIMES):
-        log.debug('COPY FROM')
-        query = """
-            COPY {table_name}({columns}) FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '{null}');
-        """.format(
-            table_name=table_name, null=PG_NULL,
-            columns=','.join(double_quote(column.dbname) for column in columns)).strip()
-        data = _compute_copy_data(dataframe, columns)
-
-        self.copy_client.copyfrom(query, data)
+    def _copy_from_range(self, dataframe, table_name, columns, start, max_bytes, retry_times=DEFAULT_RETRY_TIMES,
+                         format='csv', compress=True, encoders=None, copy_client=None):
+        """Upload the rows from `start` in a COPY stream of up to `max_bytes` bytes. It returns
+        the first row not uploaded, so a retry replays the same range of rows."""
+        log.debug('COPY FROM (row {})'.format(start))
+        data = CopyData(dataframe, columns, format, start, max_bytes, encoders)
+        copy_client = copy_client or self.copy_client
+        copy_client.copyfrom(_copy_from_query(table_name, columns, format), data, compress)
+        return data.end
+
+    def _parallel_copy_from(self, dataframe, table_name, columns, retry_times, parallel_uploads, format='csv',
+                            compress=True, max_bytes=None):
+        log.debug('COPY FROM ({} streams)'.format(parallel_uploads))
+        encoders = _column_encoders(dataframe, columns) if format != 'binary' else None
+
+        def copy_range(bounds):
+            self._copy_from(dataframe.iloc[bounds[0]:bounds[1]], table_name, columns,
+                            retry_times=retry_times, format=format, compress=compress, max_bytes=max_bytes,
+                            encoders=encoders, copy_client=self._worker_copy_client())
+
+        bounds = np.linspace(0, len(dataframe), parallel_uploads + 1).astype(int)
+        with ThreadPoolExecutor(max_workers=parallel_uploads) as executor:
+            futures = [executor.submit(copy_range, (start, end)) for start, end in zip(bounds[:-1], bounds[1:])]
+            for future in futures:
+                future.result()
 
     def _rename_table(self, table_name, new_table_name):
         query = _rename_table_query(table_name, new_table_name)
@@ -380,6 +719,83 @@ class ContextManager:
         return norm_table_name
 
 
+_context_managers = OrderedDict()
+_context_managers_lock = Lock()
+
+
+def get_context_manager(credentials=None):
+    """Returns the ContextManager of the credentials. It is shared by all the calls with the same
+    credentials, so they reuse its clients and the connections of their pooled HTTP session.
+    Only the `MAX_CONTEXT_MANAGERS` most recently used instances are kept."""
+    credentials = credentials or get_default_credentials()
+    check_credentials(credentials)
+    key = _credentials_key(credentials)
+
+    with _context_managers_lock:
+        context_manager = _context_managers.get(key)
+        if context_manager is None or _credentials_key(context_manager.credentials) != key:
+            # The credentials of the cached instance could have been modified
+            context_manager = ContextManager(credentials)
+            _context_managers[key] = context_manager
+
+        _context_managers.move_to_end(key)
+        while len(_context_managers) > MAX_CONTEXT_MANAGERS:
+            _context_managers.popitem(last=False)
+
+    # Refreshes the pooled session, closing its connections if they have been idle too long
+    get_session(credentials)
+    return context_manager
+
+
+def clear_context_managers():
+    with _context_managers_lock:
+        _context_managers.clear()
+
+
+def _credentials_key(credentials):
+    return credentials.base_url, credentials.api_key, credentials.session
+
+
+def _upsert_key_column(df, columns, key):
+    key_column = next((column for column in columns if column.name == key), None)
+
+    if key_column is None:
+        raise ValueError('Wrong key. You should provide the name of a column of the dataframe.')
+
+    if df[key].isnull().any() or df[key].duplicated().any():
+        raise ValueError('Wrong key. The values of the "{}" column must be unique and not null.'.format(key))
+
+    return key_column
+
+
+def _upsert_index_name(table_name, key):
+    return '{}_upsert_{}'.format(table_name[:MAX_LENGTH - 15], get_hash(key)[:8])
+
+
+def _upsert_from_table_query(staging_table_name, table_name, columns, key):
+    # The staging rows without hash are the keys removed from the data
+    names = [c.quoted_dbname for c in columns]
+    key_name = key.quoted_dbname
+    hash_name = double_quote(ROW_HASH_COLUMN)
+    return """
+        BEGIN;
+        CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table_name} ({key});
+        DELETE FROM {table_name} _t USING {staging} _s WHERE _t.{key} = _s.{key} AND _s.{hash} IS NULL;
+        INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging} WHERE {hash} IS NOT NULL
+        ON CONFLICT ({key}) DO UPDATE SET {update};
+        {drop};
+        COMMIT;
+    """.format(
+        index=_upsert_index_name(table_name, key.dbname),
+        table_name=table_name,
+        staging=staging_table_name,
+        key=key_name,
+        hash=hash_name,
+        columns=','.join(names),
+        update=','.join('{0} = EXCLUDED.{0}'.format(name) for name in names if name != key_name),
+        drop=_drop_table_query(staging_table_name)).strip()
+
+
 def _drop_table_query(table_name, if_exists=True):
     return 'DROP TABLE {if_exists} {table_name}'.format(
         table_name=table_name,
@@ -392,7 +808,7 @@ def _truncate_table_query(table_name):
 
 
 def _drop_columns_query(table_name, columns):
-    columns = ['DROP COLUMN {name}'.format(name=double_quote(c.dbname))
+    columns = ['DROP COLUMN {name}'.format(name=c.quoted_dbname)
                for c in columns if _not_reserved(c.dbname)]
     return 'ALTER TABLE {table_name} {drop_columns}'.format(
         table_name=table_name,
@@ -400,7 +816,7 @@ def _drop_columns_query(table_name, columns):
 
 
 def _add_columns_query(table_name, columns):
-    columns = ['ADD COLUMN {name} {type}'.format(name=double_quote(c.dbname), type=c.dbtype)
+    columns = ['ADD COLUMN {name} {type}'.format(name=c.quoted_dbname, type=c.dbtype)
                for c in columns if _not_reserved(c.dbname)]
     return 'ALTER TABLE {table_name} {add_columns}'.format(
         table_name=table_name,
@@ -408,12 +824,11 @@ def _add_columns_query(table_name, columns):
 
 
 def _not_reserved(column):
-    RESERVED_COLUMNS = ['cartodb_id', 'the_geom', 'the_geom_webmercator']
     return column not in RESERVED_COLUMNS
 
 
 def _create_table_from_columns_query(table_name, columns):
-    columns = ['{name} {type}'.format(name=double_quote(c.dbname), type=c.dbtype) for c in columns]
+    columns = ['{name} {type}'.format(name=c.quoted_dbname, type=c.dbtype) for c in columns]
     return 'CREATE TABLE {table_name} ({columns})'.format(
         table_name=table_name,
         columns=','.join(columns))
@@ -423,37 +838,493 @@ def _create_table_from_query_query(table_name, query):
     return 'CREATE TABLE {table_name} AS ({query})'.format(table_name=table_name, query=query)
 
 
+def _tables_updated_at_query(query):
+    return '''
+        SELECT array_length(_t.tables, 1) AS tables, count(_m.updated_at) AS versions,
+               max(_m.updated_at) AS updated_at
+        FROM (SELECT CDB_QueryTablesText($cartoframes${query}$cartoframes$) AS tables) _t
+        LEFT JOIN CDB_TableMetadata _m ON _m.tabname = ANY(_t.tables::regclass[])
+        GROUP BY _t.tables
+    '''.format(query=query)
+
+
+def _encode_cached_geometries(df):
+    if GEOM_COLUMN not in df:
+        return df
+    return df.assign(**{GEOM_COLUMN: np.array(
+        [None if pd.isnull(value) else bytes.fromhex(value) for value in df[GEOM_COLUMN]], dtype=object)})
+
+
+def _decode_cached_geometries(df):
+    if GEOM_COLUMN not in df:
+        return df
+    return df.assign(**{GEOM_COLUMN: np.array(
+        [None if pd.isnull(value) else value.hex().upper() for value in df[GEOM_COLUMN]], dtype=object)})
+
+
+def _filter_query(query, bbox=None, where=None):
+    """Returns the query filtered by the `where` condition and the rows whose geometry
+    intersects the `bbox` (west, south, east, north)."""
+    conditions = []
+
+    if where is not None:
+        conditions.append('({})'.format(where))
+
+    if bbox is not None:
+        conditions.append('ST_Intersects({geom}, ST_MakeEnvelope({bbox}, 4326))'.format(
+            geom=double_quote(GEOM_COLUMN), bbox=', '.join(str(value) for value in bbox)))
+
+    if not conditions:
+        return query
+
+    return 'SELECT * FROM ({query}) _f WHERE {conditions}'.format(query=query, conditions=' AND '.join(conditions))
+
+
+def _select_columns(columns, names):
+    if names is None:
+        return columns
+
+    column_names = [column.name for column in columns]
+    missing_names = [name for name in names if name not in column_names]
+    if missing_names:
+        raise ValueError('Wrong columns. The columns {} are not in the source.'.format(
+            ', '.join('"{}"'.format(name) for name in missing_names)))
+
+    return [column for column in columns if column.name in names]
+
+
+def _geom_expression(geom, simplify=None, precision=None):
+    if simplify is not None:
+        geom = 'ST_SimplifyPreserveTopology({}, {})'.format(geom, simplify)
+    if precision is not None:
+        # The quantized coordinates are compressed better
+        geom = 'ST_QuantizeCoordinates({}, {})'.format(geom, precision)
+    return geom
+
+
+def _compute_partition_ranges(min_value, max_value, partitions, is_integer):
+    if is_integer:
+        step = max(int(np.ceil((max_value - min_value + 1) / partitions)), 1)
+        starts = list(range(min_value, max_value + 1, step))
+    else:
+        step = (max_value - min_value) / partitions
+        starts = [min_value + step * i for i in range(partitions)] if step > 0 else [min_value]
+
+    ends = starts[1:] + [None]
+    return list(zip(starts, ends))
+
+
+def _partition_query(query, column, start, end, last=False):
+    column = double_quote(column)
+    condition = '{column} >= {start}'.format(column=column, start=start)
+
+    if end is not None:
+        condition += ' AND {column} < {end}'.format(column=column, end=end)
+
+    if last:
+        # Rows with null values are downloaded in the last partition
+        condition = '{condition} OR {column} IS NULL'.format(condition=condition, column=column)
+
+    return 'SELECT * FROM ({query}) _p WHERE {condition}'.format(query=query, condition=condition)
+
+
+def _insert_from_table_query(from_table_name, table_name, columns):
+    columns = ','.join(c.quoted_dbname for c in columns)
+    return 'INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {from_table_name}'.format(
+        table_name=table_name, columns=columns, from_table_name=from_table_name)
+
+
+def _staging_table_name(table_name):
+    return '{}_staging_{}'.format(table_name[:MAX_LENGTH - 17], uuid.uuid4().hex[:8])
+
+
 def _cartodbfy_query(table_name, schema):
     return 'SELECT CDB_CartodbfyTable(\'{schema}\', \'{table_name}\')'.format(
         schema=schema, table_name=table_name)
 
 
+def _create_table_transaction_query(table_name, schema, columns, cartodbfy):
+    return 'BEGIN; {create}; {cartodbfy}; COMMIT;'.format(
+        create=_create_table_from_columns_query(table_name, columns),
+        cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else '')
+
+
+def _setup_table_query(table_name, columns, if_exists):
+    # The setup is reported in a notice, as a DO block can not return rows. The table
+    # is not cartodbfied here, but after the upload (see `_setup_table_needs_cartodbfy`)
+    if if_exists == 'replace':
+        exists = """TRUNCATE TABLE {table_name};
+        _action := 'truncate';
+        IF EXISTS ({diff_columns}) THEN
+            FOR _column IN {table_columns} LOOP
+                EXECUTE format('ALTER TABLE %s DROP COLUMN %I', _table, _column);
+            END LOOP;
+            {add_columns}
+            _action := 'alter';
+        END IF;""".format(
+            table_name=table_name,
+            diff_columns=_diff_columns_query(columns),
+            table_columns=_table_columns_query('_table'),
+            add_columns=_add_columns_query(table_name, columns) + ';' if any(
+                _not_reserved(c.dbname) for c in columns) else '')
+    elif if_exists == 'upsert':
+        # The tables uploaded without upserts do not have the hashes. Their rows have a NULL
+        # hash, so they are uploaded again by the first upsert
+        exists = """ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {hash} text;
+        _action := 'append';""".format(table_name=table_name, hash=double_quote(ROW_HASH_COLUMN))
+    else:
+        exists = "_action := '{}';".format(if_exists)
+
+    return """
+DO $cartoframes$
+DECLARE
+    _schema text := current_schema();
+    _table regclass := to_regclass(format('%I.%I', current_schema(), '{table_name}'));
+    _action text;
+    _column text;
+    _types json;
+    _cartodbfied boolean := false;
+BEGIN
+    IF _table IS NULL THEN
+        {create};
+        _action := 'create';
+    ELSE
+        _cartodbfied := {cartodbfied};
+        {exists}
+    END IF;
+    SELECT json_object_agg(attname, format_type(atttypid, atttypmod)) INTO _types FROM pg_attribute
+    WHERE attrelid = to_regclass(format('%I.%I', _schema, '{table_name}')) AND attnum > 0 AND NOT attisdropped;
+    RAISE NOTICE '{prefix}%', json_build_object(
+        'schema', _schema, 'action', _action, 'types', _types, 'cartodbfied', _cartodbfied);
+END
+$cartoframes$;
+""".format(
+        table_name=table_name,
+        create=_create_table_from_columns_query(table_name, columns),
+        exists=exists,
+        cartodbfied=_cartodbfied_query('_table'),
+        prefix=SETUP_NOTICE_PREFIX).strip()
+
+
+def _table_columns_query(table):
+    return ('SELECT attname FROM pg_attribute WHERE attrelid = {table} AND attnum > 0 AND NOT attisdropped '
+            'AND attname NOT IN ({reserved})').format(
+                table=table, reserved=','.join("'{}'".format(c) for c in RESERVED_COLUMNS))
+
+
+def _cartodbfied_query(table):
+    # A cartodbfied table has the reserved columns, with cartodb_id as primary key
+    return """(
+            SELECT count(*) = {count} FROM pg_attribute
+            WHERE attrelid = {table} AND attnum > 0 AND NOT attisdropped AND attname IN ({reserved})
+        ) AND EXISTS (
+            SELECT 1 FROM pg_index JOIN pg_attribute ON attrelid = indrelid AND attnum = ANY(indkey)
+            WHERE indrelid = {table} AND indisprimary AND attname = 'cartodb_id'
+        )""".format(
+        table=table, count=len(RESERVED_COLUMNS), reserved=','.join("'{}'".format(c) for c in RESERVED_COLUMNS))
+
+
+def _diff_columns_query(columns):
+    # Symmetric difference between the (name, type) pairs of the table and the columns
+    values = ','.join("('{name}', '{type}'::regtype::oid)".format(name=c.dbname, type=c.dbtype)
+                      for c in columns if _not_reserved(c.dbname))
+    columns_query = 'SELECT * FROM (VALUES {}) _c'.format(values) if values else 'SELECT NULL, NULL::oid WHERE false'
+    table_columns_query = _table_columns_query('_table').replace('SELECT attname', 'SELECT attname::text, atttypid')
+    return '({table} EXCEPT {columns}) UNION ALL ({columns} EXCEPT {table})'.format(
+        table=table_columns_query, columns=columns_query)
+
+
+def _parse_setup_table_output(output):
+    for notice in output.get('notices', []):
+        if notice.startswith(SETUP_NOTICE_PREFIX):
+            return json.loads(notice[len(SETUP_NOTICE_PREFIX):])
+    raise CartoException('The setup of the table did not return its result: {}'.format(output))
+
+
+def _setup_table_needs_cartodbfy(setup):
+    # The truncated tables keep their layout, so they are only cartodbfied if they were not
+    # already. The appended tables are never cartodbfied, as before the setup in one request
+    return setup['action'] in ('create', 'alter') or (setup['action'] == 'truncate' and not setup['cartodbfied'])
+
+
+def _setup_table_copy_format(table_name, columns, setup, format):
+    # The created and altered tables have the types of the columns
+    if format == 'binary' and setup['action'] in ('append', 'truncate'):
+        return _table_copy_format(table_name, columns, setup['types'] or {})
+    return format
+
+
+def _table_copy_format(table_name, columns, table_types):
+    # The binary format requires the exact column types, and the types of an existing
+    # table can differ from the ones of the DataFrame (e.g. numeric vs double precision)
+    if not all(is_binary_compatible(column, table_types.get(column.dbname)) for column in columns):
+        log.debug('Binary COPY is not available for the columns of "{}", using CSV'.format(table_name))
+        return 'csv'
+    return 'binary'
+
+
 def _rename_table_query(table_name, new_table_name):
     return 'ALTER TABLE {table_name} RENAME TO {new_table_name};'.format(
         table_name=table_name, new_table_name=new_table_name)
 
 
-def _create_auth_client(credentials, public=False):
+def _create_auth_client(credentials, public=False, session=None):
     return APIKeyAuthClient(
         base_url=credentials.base_url,
         api_key='default_public' if public else credentials.api_key,
-        session=credentials.session,
+        session=session or get_session(credentials),
         client_id='cartoframes_{}'.format(__version__),
         user_agent='cartoframes_{}'.format(__version__))
 
 
+def _copy_columns(columns):
+    return [column for column in columns if column.name != 'the_geom_webmercator']
+
+
 def _compute_copy_data(df, columns):
-    for index, _ in df.iterrows():
-        row_data = []
-        for column in columns:
-            val = df.at[index, column.name]
+    """Encode the dataframe in the COPY FROM format, yielding one buffer per batch of rows."""
+    encoders = _column_encoders(df, columns)
+    for start in range(0, len(df), COPY_BATCH_ROWS):
+        yield _encode_copy_batch(df.iloc[start:start + COPY_BATCH_ROWS], columns, encoders)
+
+
+class CopyData:
+    """Encoded COPY FROM data of the rows from `start`, limited to `max_bytes` bytes.
+
+    The rows are encoded in batches while the data is iterated. When a batch does not fit
+    in the remaining bytes, it is encoded again with the number of rows that fit according
+    to its size, so the limit is kept with rows of very different sizes. Every stream contains
+    at least one row. After the iteration, `end` is the first row not included.
+
+    The `encoders` of the CSV columns can be chosen once for all the streams of an upload
+    with `_column_encoders`.
+    """
+
+    def __init__(self, dataframe, columns, format='csv', start=0, max_bytes=None, encoders=None):
+        self.dataframe = dataframe
+        self.columns = columns
+        self.format = format
+        self.encoders = encoders
+        self.start = start
+        self.end = start
+        self.max_bytes = max_bytes or float('inf')
+        self.size = 0
+
+    def __iter__(self):
+        binary = self.format == 'binary'
+        if binary:
+            encode = _encode_binary_batch
+        else:
+            encoders = self.encoders or _column_encoders(self.dataframe, self.columns)
+            encode = functools.partial(_encode_copy_batch, encoders=encoders)
+        reserved = len(BINARY_TRAILER) if binary else 0
+        total_rows = len(self.dataframe)
+
+        if binary:
+            yield self._add(BINARY_HEADER)
+
+        while self.end < total_rows:
+            rows = min(COPY_BATCH_ROWS, total_rows - self.end)
+            data = encode(self.dataframe.iloc[self.end:self.end + rows], self.columns)
+            remaining = self.max_bytes - self.size - reserved
+
+            while len(data) > remaining and rows > 1:
+                rows = max(1, min(rows - 1, int(rows * remaining / len(data))))
+                data = encode(self.dataframe.iloc[self.end:self.end + rows], self.columns)
+
+            if len(data) > remaining and self.end > self.start:
+                # The rest of rows are uploaded in the next stream
+                break
+
+            self.end += rows
+            yield self._add(data)
+
+        if binary:
+            yield self._add(BINARY_TRAILER)
+
+    def _add(self, data):
+        self.size += len(data)
+        return data
+
+
+def _encode_copy_batch(df, columns, encoders=None):
+    if not columns:
+        return b'\n' * len(df)
+
+    return ('\n'.join(_encode_rows(df, columns, encoders)) + '\n').encode('utf-8')
+
+
+def _encode_rows(df, columns, encoders=None):
+    encoders = encoders or _column_encoders(df, columns)
+    encoded_columns = [encode(df[column.name]) for column, encode in zip(columns, encoders)]
+
+    rows = encoded_columns[0]
+    for values in encoded_columns[1:]:
+        rows = rows + '|' + values
+
+    return rows
+
+
+def _row_hashes(df, columns):
+    """Hash of the encoded values of every row. It is stored in the rows uploaded by the
+    upserts to find the modified rows in the next ones."""
+    rows = pd.Series(_encode_rows(df, columns), index=df.index)
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    return pd.Series(np.char.mod('%016x', hashes).astype(object), index=df.index)
+
+
+def _upsert_changes(df, key, remote):
+    """Returns the rows of the dataframe that are new or modified in the remote table, and
+    the keys of the remote table that are not in the dataframe."""
+    # The keys can be nullable integers (Int64), so the masks are built from plain numpy values
+    remote_hashes = pd.Series(remote[ROW_HASH_COLUMN].to_numpy(dtype=object),
+                              index=remote[key.dbname].to_numpy(dtype=object))
+    hashes = df[key.name].map(remote_hashes).to_numpy(dtype=object)
+    changed = np.array(hashes != df[ROW_HASH_COLUMN].to_numpy(dtype=object), dtype=bool)
+    removed = (~remote[key.dbname].isin(df[key.name])).to_numpy(dtype=bool)
+    return df[changed], remote[key.dbname][removed]
+
+
+def _encode_column(values, is_geom=False):
+    """Encode a column as an array of strings, matching `encode_row` for every value."""
+    return _column_encoder(values, is_geom)(values)
+
+
+def _column_encoders(df, columns):
+    """Returns the encoder of every column. They are chosen once for the whole dataframe,
+    and applied to each of its batches of rows."""
+    return [_column_encoder(df[column.name], column.is_geom) for column in columns]
+
+
+def _column_encoder(values, is_geom=False):
+    if is_geom:
+        return _encode_geom_column
+
+    dtype = values.dtype
+
+    if isinstance(dtype, np.dtype):
+        if is_float_dtype(dtype):
+            return _encode_float_column
+
+        if is_integer_dtype(dtype) or is_bool_dtype(dtype):
+            return _encode_number_column
+
+        if dtype == object and infer_dtype(values, skipna=True) in ('string', 'empty'):
+            # Any batch of a text column only has text and nulls too
+            return _encode_text_column
+
+    if is_integer_dtype(dtype) or is_bool_dtype(dtype):
+        return _encode_nullable_column
+
+    return _encode_object_column
+
+
+def _copy_to_query(query, format='csv'):
+    if format == 'binary':
+        return 'COPY ({0}) TO stdout WITH (FORMAT binary)'.format(query)
+    return 'COPY ({0}) TO stdout WITH (FORMAT csv, HEADER true, NULL \'{1}\')'.format(query, PG_NULL)
+
+
+def _copy_from_query(table_name, columns, format='csv'):
+    columns = ','.join(column.quoted_dbname for column in columns)
+    if format == 'binary':
+        return 'COPY {table_name}({columns}) FROM stdin WITH (FORMAT binary);'.format(
+            table_name=table_name, columns=columns)
+    return """
+        COPY {table_name}({columns}) FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '{null}');
+    """.format(table_name=table_name, null=PG_NULL, columns=columns).strip()
+
+
+def _read_copy_data(stream, columns, chunksize=None, format='csv'):
+    """Decode the COPY TO data of the stream into a DataFrame, or an iterator of DataFrames
+    of `chunksize` rows."""
+    if format == 'binary':
+        return decode_binary_copy(stream, _copy_columns(columns), chunksize)
+
+    decode_columns = (int_columns_names(columns), bool_columns_names(columns), text_columns_names(columns))
+
+    # Typed columns keep pandas on its C parser instead of calling a Python converter per cell
+    result = pd.read_csv(
+        stream,
+        dtype=obtain_dtypes(columns),
+        na_values=obtain_na_values(columns),
+        keep_default_na=False,
+        parse_dates=date_columns_names(columns),
+        float_precision='round_trip',
+        chunksize=chunksize)
+
+    if chunksize:
+        # The iterator parses the stream while it is read
+        return (_decode_columns(df, *decode_columns) for df in result)
+
+    return _decode_columns(result, *decode_columns)
+
+
+def _decode_columns(df, int_columns, bool_columns, text_columns):
+    for name in int_columns:
+        df[name] = _decode_int_column(df[name])
+    for name in bool_columns:
+        df[name] = df[name].map(BOOL_VALUES).astype('boolean')
+    for name in text_columns:
+        # Null text values are None, so they are uploaded again as nulls by `to_carto`
+        df[name] = df[name].astype(object).where(df[name].notnull(), None)
+    return df
+
+
+def _decode_int_column(values):
+    if values.dtype != object:
+        return values.astype('Int64')
+
+    # The bigints are read as text and converted without going through float64, which can
+    # not represent the integers above 2**53 (the C parser casts the columns with nulls to float)
+    nulls = values.isna().to_numpy()
+    array = np.zeros(len(values), dtype=np.int64)
+    array[~nulls] = values.to_numpy()[~nulls].astype(np.int64)
+    return pd.Series(pd.arrays.IntegerArray(array, nulls), index=values.index, name=values.name)
+
+
+def _encode_geom_column(values):
+    encoded = encode_geometries_ewkb(values)
+    encoded[pd.isnull(encoded)] = PG_NULL
+    return encoded
+
+
+def _encode_float_column(values):
+    array = values.to_numpy()
+    encoded = array.astype(str).astype(object)
+    encoded[np.isnan(array)] = 'NaN'
+    encoded[np.isposinf(array)] = 'Infinity'
+    encoded[np.isneginf(array)] = '-Infinity'
+    return encoded
+
+
+def _encode_text_column(values):
+    array = values.to_numpy()
+    encoded = array.copy()
+    nulls = pd.isnull(array)
+
+    for index in np.flatnonzero(nulls):
+        encoded[index] = encode_value(array[index])
+
+    if not nulls.all():
+        text = pd.Series(array[~nulls])
+        special = text.str.contains('["|\n]', regex=True).to_numpy(dtype=bool)
+        if special.any():
+            text[special] = '"' + text[special].str.replace('"', '""', regex=False) + '"'
+        encoded[~nulls] = text.to_numpy(dtype=object)
+
+    return encoded
+
+
+def _encode_number_column(values):
+    return values.to_numpy().astype(str).astype(object)
 
-            if column.is_geom:
-                val = encode_geometry_ewkb(val)
 
-            row_data.append(encode_row(val))
+def _encode_nullable_column(values):
+    # Nullable extension types (Int64, boolean)
+    return values.to_numpy(dtype=object, na_value=PG_NULL).astype(str).astype(object)
 
-        csv_row = b'|'.join(row_data)
-        csv_row += b'\n'
 
-        yield csv_row
+def _encode_object_column(values):
+    # Fallback for any other type (dates, mixed objects, extension types)
+    return np.array([encode_value(value) for value in values], dtype=object)
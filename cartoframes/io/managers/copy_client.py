@@ -0,0 +1,147 @@
+"""COPY client with gzip compressed transfers.
+
+The uploads are compressed in a background thread, so the compression of a chunk overlaps
+with the encoding of the next one. The downloads accept a gzip encoded response, as every
+request of the HTTP session, which is decoded while the stream is read.
+"""
+
+import zlib
+
+from queue import Queue
+from threading import Thread
+
+from carto.exceptions import CartoException, CartoRateLimitException
+from carto.sql import CopySQLClient, DEFAULT_COMPRESSION_LEVEL, MAX_GET_QUERY_LEN
+from carto.utils import ResponseStream
+from requests import HTTPError
+
+from ...utils.logger import log
+
+# Encoded chunks waiting to be compressed
+COMPRESSION_QUEUE_SIZE = 4
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+_END = object()
+
+
+class CopyClient(CopySQLClient):
+
+    def _compress_chunks(self, chunk_generator, compression_level):
+        # Used by `copyfrom` to compress the uploaded chunks
+        return compress_chunks(chunk_generator, compression_level)
+
+    def copyto(self, query, compress=True):
+        """Same as `CopySQLClient.copyto`, requesting a response without encoding if not `compress`.
+        The session already accepts the gzip encoding by default."""
+        url = self.api_url + '/copyto'
+        params = {'api_key': self.api_key, 'q': query}
+        headers = None if compress else {'Accept-Encoding': 'identity'}
+        http_method = 'GET' if len(query) < MAX_GET_QUERY_LEN else 'POST'
+
+        try:
+            response = self.client.send(url,
+                                        http_method=http_method,
+                                        params=params,
+                                        headers=headers,
+                                        stream=True)
+            response.raise_for_status()
+        except CartoRateLimitException as e:
+            raise e
+        except HTTPError as e:
+            if 400 <= response.status_code < 500:
+                # Client error, provide better reason
+                reason = response.json()['error'][0]
+                raise CartoException('{} Client Error: {}'.format(response.status_code, reason))
+            else:
+                raise CartoException(e)
+        except Exception as e:
+            raise CartoException(e)
+
+        return response
+
+    def copyto_stream(self, query, compress=True):
+        return CopyToStream(self.copyto(query, compress))
+
+
+class CopyToStream(ResponseStream):
+    """Stream of a COPY TO response that logs the received and decoded bytes at the end."""
+
+    def __init__(self, response):
+        super(CopyToStream, self).__init__(response)
+        self.response = response
+        self.decoded_bytes = 0
+        self.finished = False
+
+    def readinto(self, b):
+        length = super(CopyToStream, self).readinto(b)
+        self.decoded_bytes += length
+        if length == 0 and not self.finished:
+            self.finished = True
+            _log_transfer('COPY TO', self.decoded_bytes, self.response.raw.tell())
+        return length
+
+
+def compress_chunks(chunks, level=DEFAULT_COMPRESSION_LEVEL):
+    """Compresses the chunks as a gzip stream. The chunks are compressed in a background
+    thread while the next ones are encoded by the iteration of `chunks`."""
+    pending = Queue(maxsize=COMPRESSION_QUEUE_SIZE)
+    compressed = Queue()
+    thread = Thread(target=_compress_queue, args=(pending, compressed, level), daemon=True)
+    thread.start()
+
+    raw_bytes = 0
+    compressed_bytes = 0
+
+    try:
+        for chunk in chunks:
+            raw_bytes += len(chunk)
+            pending.put(chunk)
+            while not compressed.empty():
+                data = _get_compressed(compressed)
+                compressed_bytes += len(data)
+                if data:
+                    yield data
+    finally:
+        pending.put(_END)
+
+    while True:
+        data = _get_compressed(compressed)
+        if data is _END:
+            break
+        compressed_bytes += len(data)
+        if data:
+            # An empty chunk would end the chunked request body
+            yield data
+
+    _log_transfer('COPY FROM', raw_bytes, compressed_bytes)
+
+
+def _compress_queue(pending, compressed, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    error = None
+
+    while True:
+        chunk = pending.get()
+        if chunk is _END:
+            break
+        if error is None:
+            try:
+                compressed.put(compressor.compress(chunk))
+            except Exception as e:
+                # The pending chunks are still consumed, so the encoding is not blocked
+                error = e
+
+    compressed.put(error or compressor.flush())
+    compressed.put(_END)
+
+
+def _get_compressed(compressed):
+    data = compressed.get()
+    if isinstance(data, Exception):
+        raise data
+    return data
+
+
+def _log_transfer(name, decoded_bytes, transferred_bytes):
+    log.debug('{}: {} bytes transferred for {} bytes of data ({} bytes saved)'.format(
+        name, transferred_bytes, decoded_bytes, decoded_bytes - transferred_bytes))
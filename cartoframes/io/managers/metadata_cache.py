@@ -0,0 +1,62 @@
+"""Cache of the metadata requested by the ContextManager: the schema, the table existence
+and the column info of the queries. It is shared by all the instances with the same
+credentials, so repeated calls do not request the same metadata again."""
+
+import time
+
+from collections import OrderedDict
+from threading import Lock
+
+DEFAULT_TTL = 60  # seconds
+DEFAULT_MAXSIZE = 1024
+
+
+class MetadataCache:
+    """Thread-safe cache of values that expire after `ttl` seconds. When it holds more than
+    `maxsize` values, the least recently used ones are removed.
+
+    The keys are tuples whose first item is the namespace (the credentials) and the second
+    one is the kind of metadata, so the entries of a namespace can be invalidated together.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the value of `key`, or None if it is not cached or it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expiration = entry
+            if expiration <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace, kinds=None):
+        """Removes the entries of the namespace, only the ones of `kinds` if it is set."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == namespace and (kinds is None or key[1] in kinds):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+metadata_cache = MetadataCache()
@@ -1,7 +1,7 @@
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 
-from .context_manager import ContextManager
+from .context_manager import get_context_manager
 from ...utils.utils import is_sql_query
 from ...utils.geom_utils import has_geometry
 
@@ -13,7 +13,7 @@ class SourceManager:
         if isinstance(source, str):
             # Table, SQL query
             self._remote_data = True
-            self._context_manager = ContextManager(credentials)
+            self._context_manager = get_context_manager(credentials)
             self._query = self._context_manager.compute_query(source)
         elif isinstance(source, DataFrame):
             # DataFrame, GeoDataFrame
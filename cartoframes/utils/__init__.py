@@ -1,9 +1,17 @@
 from .logger import set_log_level
 from .geom_utils import decode_geometry
 from .metrics import setup_metrics
+from .result_cache import setup_result_cache, clear_result_cache
+from .retry_policy import RetryPolicy, get_retry_metrics
+from .session_pool import setup_session_pool
 
 __all__ = [
     'setup_metrics',
+    'setup_session_pool',
+    'setup_result_cache',
+    'clear_result_cache',
+    'RetryPolicy',
+    'get_retry_metrics',
     'set_log_level',
     'decode_geometry'
 ]
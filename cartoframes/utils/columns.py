@@ -2,15 +2,21 @@
 
 import re
 
+from functools import lru_cache
 from unidecode import unidecode
 
-from .utils import dtypes2pg, pg2dtypes, PG_NULL
+from .geom_utils import is_wkb_array
+from .utils import deprecated, double_quote, dtypes2pg, pg2dtypes, PG_NULL
 
 BOOL_DBTYPES = ['bool', 'boolean']
 INT_DBTYPES = ['int2', 'int4', 'int2', 'int', 'int8', 'smallint', 'integer', 'bigint']
+BIGINT_DBTYPES = ['int8', 'bigint']
 FLOAT_DBTYPES = ['float4', 'float8', 'real', 'double precision', 'numeric', 'decimal']
-DATETIME_DBTYPES = ['date', 'timestamp', 'timestampz']
+FLOAT32_DBTYPES = ['float4', 'real']
+DATETIME_DBTYPES = ['date', 'timestamp', 'timestamptz']
+TIMESTAMPTZ_PGTYPES = ['timestamptz', 'timestamp with time zone']
 FORBIDDEN_COLUMN_NAMES = ['the_geom_webmercator']
+GEOM_COLUMN_NAME = 'the_geom'
 MAX_LENGTH = 63
 MAX_COLLISION_LENGTH = MAX_LENGTH - 4
 RESERVED_WORDS = ('ALL', 'ANALYSE', 'ANALYZE', 'AND', 'ANY', 'ARRAY', 'AS', 'ASC', 'ASYMMETRIC', 'AUTHORIZATION',
@@ -24,15 +30,28 @@ RESERVED_WORDS = ('ALL', 'ANALYSE', 'ANALYZE', 'AND', 'ANY', 'ARRAY', 'AS', 'ASC
                   'REFERENCES', 'RIGHT', 'SELECT', 'SESSION_USER', 'SIMILAR', 'SOME', 'SYMMETRIC', 'TABLE', 'THEN',
                   'TO', 'TRAILING', 'TRUE', 'UNION', 'UNIQUE', 'USER', 'USING', 'VERBOSE', 'WHEN', 'WHERE',
                   'XMIN', 'XMAX', 'FORMAT', 'CONTROLLER', 'ACTION')
+NORMALIZE_CACHE_SIZE = 4096
+COLUMNS_INFO_CACHE_SIZE = 256
+
+# Compiled once, since the names of every column are normalized on each upload and download
+TAG_RE = re.compile(r'<[^>]+>')
+ENTITY_RE = re.compile(r'&.+?;')
+INVALID_CHARS_RE = re.compile(r'[^a-z0-9 _-]')
+SEPARATORS_RE = re.compile(r'[ -]+')
+VALID_SLUG_RE = re.compile(r'[a-z0-9_]*')
+SUPPORTED_NAME_RE = re.compile(r'[a-z_]+[a-z_0-9]*')
 
 
 class ColumnInfo:
+    # The instances are shared by the cached column plans, so they must not be modified
+    __slots__ = ('name', 'dbname', 'dbtype', 'is_geom', 'quoted_dbname')
 
     def __init__(self, name, dbname, dbtype, is_geom):
         self.name = name
         self.dbname = dbname
         self.dbtype = dbtype
         self.is_geom = is_geom
+        self.quoted_dbname = double_quote(dbname)
 
     def __repr__(self):
         params = ', '.join([self.name, self.dbname, self.dbtype, str(self.is_geom)])
@@ -57,14 +76,25 @@ class ColumnInfo:
 
 
 def get_dataframe_columns_info(df):
+    # The columns only depend on the names and types of the dataframe, so the same plan is
+    # reused by the quota estimate, the table setup and the COPY encoding of an upload
+    layout = tuple(
+        (name, type(name), str(dtype), name == GEOM_COLUMN_NAME and is_wkb_array(df[name].values))
+        for name, dtype in zip(df.columns, df.dtypes) if _is_valid_column(name))
+
+    return list(_get_dataframe_columns_info(layout))
+
+
+@lru_cache(maxsize=COLUMNS_INFO_CACHE_SIZE)
+def _get_dataframe_columns_info(layout):
     columns = []
 
-    for name in df.columns:
-        if _is_valid_column(name):
-            dbtype = dtypes2pg(str(df.dtypes[name]))
-            columns.append(_create_column_info(name, dbtype))
+    for name, _, dtype, is_wkb in layout:
+        # WKB geometries (e.g. from Arrow data) are uploaded without decoding them
+        dbtype = 'geometry' if is_wkb else dtypes2pg(dtype)
+        columns.append(_create_column_info(name, dbtype))
 
-    return columns
+    return tuple(columns)
 
 
 def get_query_columns_info(fields):
@@ -73,7 +103,11 @@ def get_query_columns_info(fields):
     for name in fields:
         field = fields[name]
         pgtype = field.get('pgtype')
-        dbtype = dtypes2pg(pg2dtypes(pgtype)) if pgtype else field.get('type')
+        if pgtype in TIMESTAMPTZ_PGTYPES:
+            # The time zone is kept, so the values are read as UTC timestamps
+            dbtype = 'timestamptz'
+        else:
+            dbtype = dtypes2pg(pg2dtypes(pgtype)) if pgtype else field.get('type')
         columns.append(_create_column_info(name, dbtype))
 
     return columns
@@ -129,15 +163,18 @@ def normalize_names(column_names):
             list: List of SQL-normalized column names
     """
     result = []
+    used_names = set()
 
     for column_name in column_names:
-        result.append(_normalize(column_name, forbidden_column_names=result))
+        column_name = _normalize(column_name, forbidden_column_names=used_names)
+        result.append(column_name)
+        used_names.add(column_name)
 
     return result
 
 
 def _normalize(column_name, forbidden_column_names=None):
-    column_name = _truncate(_sanitize(_slugify(column_name)))
+    column_name = _normalize_name(column_name)
 
     if forbidden_column_names:
         i = 1
@@ -148,16 +185,24 @@ def _normalize(column_name, forbidden_column_names=None):
     return column_name
 
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _normalize_name(column_name):
+    # Typed, so 1 and 1.0 are normalized separately
+    return _truncate(_sanitize(_slugify(column_name)))
+
+
 def _slugify(value):
-    value = unidecode(str(value).lower())
-    value = re.sub(r'<[^>]+>', '', value)
-    value = re.sub(r'&.+?;', '-', value)
-    value = re.sub(r'[^a-z0-9 _-]', '-', value).strip().lower()
-    value = re.sub(r'\s+', '-', value)
-    value = re.sub(r' ', '-', value)
-    value = re.sub(r'-+', '-', value)
-    value = re.sub(r'-', '_', value)
-    return value
+    value = str(value).lower()
+    if VALID_SLUG_RE.fullmatch(value):
+        # Most of the names do not need any replacement
+        return value
+
+    value = unidecode(value)
+    value = TAG_RE.sub('', value)
+    value = ENTITY_RE.sub('-', value)
+    # The only whitespace left are spaces, which are joined with the hyphens in a single separator
+    value = INVALID_CHARS_RE.sub('-', value).strip()
+    return SEPARATORS_RE.sub('_', value)
 
 
 def _sanitize(value):
@@ -173,9 +218,39 @@ def _is_reserved(value):
 
 
 def _is_unsupported(value):
-    return not re.match(r'^[a-z_]+[a-z_0-9]*$', value)
+    return not SUPPORTED_NAME_RE.fullmatch(value)
+
+
+def obtain_dtypes(columns):
+    dtypes = {}
+
+    for column in columns:
+        if column.dbtype in INT_DBTYPES and column.dbtype not in BIGINT_DBTYPES:
+            # Integers are inferred by the C parser and cast to Int64 later, which is faster than the Int64 dtype.
+            # With nulls they are parsed as floats, which are exact up to 2**53, so bigints are read as text
+            continue
+        elif column.dbtype in FLOAT_DBTYPES:
+            dtypes[column.name] = 'float32' if column.dbtype in FLOAT32_DBTYPES else 'float64'
+        elif column.dbtype not in DATETIME_DBTYPES:
+            # Booleans are read as text and mapped later: pandas can not parse 't' / 'f' as nullable booleans
+            dtypes[column.name] = 'object'
+
+    return dtypes
+
+
+def obtain_na_values(columns):
+    na_values = {}
 
+    for column in columns:
+        if column.dbtype in FLOAT_DBTYPES:
+            na_values[column.name] = [PG_NULL, 'NaN']
+        else:
+            na_values[column.name] = [PG_NULL]
+
+    return na_values
 
+
+@deprecated(message='The COPY data is parsed with the types of `obtain_dtypes` instead of converters.')
 def obtain_converters(columns):
     converters = {}
 
@@ -192,10 +267,6 @@ def obtain_converters(columns):
     return converters
 
 
-def date_columns_names(columns):
-    return [x.name for x in columns if x.dbtype in DATETIME_DBTYPES]
-
-
 def _convert_int(x):
     if _is_none_null(x):
         return None
@@ -226,3 +297,19 @@ def _convert_generic(x):
 
 def _is_none_null(x):
     return x is None or x == PG_NULL
+
+
+def date_columns_names(columns):
+    return [x.name for x in columns if x.dbtype in DATETIME_DBTYPES]
+
+
+def int_columns_names(columns):
+    return [x.name for x in columns if x.dbtype in INT_DBTYPES]
+
+
+def bool_columns_names(columns):
+    return [x.name for x in columns if x.dbtype in BOOL_DBTYPES]
+
+
+def text_columns_names(columns):
+    return [x.name for x in columns if x.dbtype not in INT_DBTYPES + FLOAT_DBTYPES + BOOL_DBTYPES + DATETIME_DBTYPES]
@@ -1,9 +1,15 @@
 import re
 import json
+import numbers
+import struct
 import shapely
 import binascii as ba
+import numpy as np
+import pandas as pd
 
-from geopandas import GeoSeries, GeoDataFrame, points_from_xy
+from geopandas import GeoSeries, GeoDataFrame, points_from_xy, _compat as geopandas_compat
+from geopandas.array import GeometryArray, from_shapely, from_wkb, from_wkt, to_wkb
+from pandas.api.types import infer_dtype
 
 ENC_SHAPELY = 'shapely'
 ENC_WKB = 'wkb'
@@ -13,6 +19,7 @@ ENC_WKT = 'wkt'
 ENC_EWKT = 'ewkt'
 SPHERICAL_TOLERANCE = 0.0001
 SIMPLIFY_TOLERANCE = 0.001
+EWKB_SRID_FLAG = 0x20000000
 
 
 def set_geometry(gdf, col, drop=False, inplace=False, crs=None):
@@ -129,14 +136,108 @@ def decode_geometry(geom_col):
     """
     if geom_col.size > 0:
         enc_type = None
-        if any(geom_col):
-            first_geom = next(item for item in geom_col if item is not None)
-            enc_type = detect_encoding_type(first_geom)
-        return GeoSeries(geom_col.apply(lambda g: decode_geometry_item(g, enc_type)))
+        values = geom_col.to_numpy(dtype=object, copy=True)
+        # Null and empty values are decoded as None
+        nulls = pd.isnull(values) | ~values.astype(bool)
+        values[nulls] = None
+        if not nulls.all():
+            enc_type = detect_encoding_type(values[~nulls][0])
+        geoms = _decode_geometries(values, nulls, enc_type)
+        return GeoSeries(geoms, index=geom_col.index, name=geom_col.name)
     else:
         return geom_col
 
 
+def decode_geometry_lazy(geom_col):
+    """Returns a GeoSeries of the hexadecimal EWKB or WKB values of the column that keeps them
+    as WKB bytes until the geometries are used. See :py:class:`LazyGeometryArray`.
+
+    Args:
+        geom_col (Series): Column containing the hexadecimal EWKB or WKB values.
+
+    """
+    values = geom_col.to_numpy(dtype=object)
+    if not is_wkb_array(values):
+        values = decode_ewkb_hex_to_wkb(values)
+    return GeoSeries(LazyGeometryArray(values), index=geom_col.index, name=geom_col.name)
+
+
+class LazyGeometryArray(GeometryArray):
+    """GeometryArray that keeps the geometries as WKB bytes until they are used. The rows
+    can be selected, copied and concatenated without decoding them, and `to_carto` uploads
+    the WKB values directly. Any other access to the geometries decodes all of them, and then
+    it behaves as a regular GeometryArray.
+
+    Args:
+        wkbs (numpy.ndarray): array of WKB bytes, with None for the null geometries.
+        crs (optional): Coordinate Reference System of the geometries.
+
+    """
+
+    def __init__(self, wkbs, crs=None):
+        self._wkbs = wkbs
+        self._data = None
+        self._sindex = None
+        self._crs = None
+        self.crs = crs
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = from_wkb(self._wkbs).data
+            # The decoded geometries can be modified, so the WKB values are not valid anymore
+            self._wkbs = None
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._wkbs = None
+
+    @property
+    def wkbs(self):
+        """WKB values of the geometries, or None if they have been decoded."""
+        return self._wkbs
+
+    @property
+    def size(self):
+        return self.data.size if self._wkbs is None else self._wkbs.size
+
+    def __getitem__(self, idx):
+        if self._wkbs is None:
+            return super().__getitem__(idx)
+        if isinstance(idx, numbers.Integral):
+            # Only the requested geometry is decoded
+            wkb = self._wkbs[idx]
+            return None if wkb is None else shapely.wkb.loads(wkb)
+        if not isinstance(idx, slice):
+            # Lists and boolean or integer arrays, with the same checks as the other arrays
+            idx = pd.api.indexers.check_array_indexer(self, idx)
+        return LazyGeometryArray(self._wkbs[idx], crs=self.crs)
+
+    def copy(self, *args, **kwargs):
+        if self._wkbs is None:
+            return super().copy(*args, **kwargs)
+        return LazyGeometryArray(self._wkbs.copy(), crs=self.crs)
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        if self._wkbs is None or (allow_fill and not pd.isna(fill_value)):
+            return super().take(indices, allow_fill=allow_fill, fill_value=fill_value)
+        wkbs = pd.api.extensions.take(self._wkbs, indices, allow_fill=allow_fill, fill_value=None)
+        return LazyGeometryArray(wkbs, crs=self.crs)
+
+    def isna(self):
+        if self._wkbs is None:
+            return super().isna()
+        return np.array([wkb is None for wkb in self._wkbs], dtype='bool')
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        if any(getattr(array, 'wkbs', None) is None for array in to_concat):
+            return GeometryArray._concat_same_type(to_concat)
+        return LazyGeometryArray(np.concatenate([array.wkbs for array in to_concat]), crs=to_concat[0].crs)
+
+
 def detect_encoding_type(input_geom):
     """
     Detect geometry encoding type:
@@ -189,6 +290,38 @@ def decode_geometry_item(geom, enc_type):
     return None
 
 
+def _decode_geometries(values, nulls, enc_type):
+    """Decode an array of geometries with the same encoding in a single call.
+    The decoding is vectorized by geopandas when pygeos is installed.
+    """
+    if enc_type == ENC_WKB:
+        return from_wkb(values)
+    if enc_type == ENC_WKB_HEX or enc_type == ENC_WKB_BHEX:
+        values[~nulls] = [ba.unhexlify(value) for value in values[~nulls]]
+        return from_wkb(values)
+    if enc_type == ENC_WKT:
+        return from_wkt(values)
+    if enc_type == ENC_EWKT:
+        parts = pd.Series(values).str.extract(r'^(?:SRID=(\d+);)?(.*)$')
+        wkts = parts[1].to_numpy(dtype=object)
+        wkts[nulls] = None
+        geoms = from_wkt(wkts)
+        _set_srids(geoms, parts[0].to_numpy(dtype=object))
+        return geoms
+    return values
+
+
+def _set_srids(geoms, srids):
+    """Set the SRID extracted from the EWKT values, as `_load_ewkt` does."""
+    mask = pd.notnull(srids)
+    if geopandas_compat.USE_PYGEOS:
+        import pygeos
+        geoms.data[mask] = pygeos.set_srid(geoms.data[mask], srids[mask].astype(int))
+    else:
+        for geom, srid in zip(geoms.data[mask], srids[mask]):
+            shapely.geos.lgeos.GEOSSetSRID(geom._geom, int(srid))
+
+
 def _load_wkb(geom):
     """Load WKB or EWKB geometry."""
     return shapely.wkb.loads(geom)
@@ -241,8 +374,101 @@ def encode_geometry_ewkt(geom, srid=4326):
 
 def encode_geometry_ewkb(geom, srid=4326):
     if isinstance(geom, shapely.geometry.base.BaseGeometry):
-        shapely.geos.lgeos.GEOSSetSRID(geom._geom, srid)
-        return shapely.wkb.dumps(geom, hex=True, include_srid=True)
+        return _encode_ewkb_hex(geom.wkb, srid)
+
+
+def encode_geometries_ewkb(geoms, srid=4326, hex=True):
+    """Encodes a column of geometries as EWKB in a single pass.
+    The SRID is written in the WKB headers, so the geometries are not modified.
+
+    Args:
+        geoms (GeoSeries, Series or array): Column containing the geometries. It can contain
+            WKB bytes, which are encoded without decoding them.
+        srid (int, optional): SRID of the geometries. Default 4326.
+        hex (bool, optional): Return hexadecimal strings instead of bytes. Default True.
+
+    Returns:
+        numpy.ndarray: Array of EWKB values, with None for the null geometries.
+
+    """
+    if isinstance(geoms, pd.Series):
+        geoms = geoms.values
+
+    if isinstance(geoms, LazyGeometryArray) and geoms.wkbs is not None:
+        # The geometries have not been decoded
+        wkbs = geoms.wkbs.copy()
+    elif is_wkb_array(geoms):
+        wkbs = np.array(geoms, dtype=object)
+        wkbs[pd.isnull(wkbs)] = None
+    else:
+        if not isinstance(geoms, GeometryArray):
+            geoms = from_shapely(geoms)
+        ewkbs = _to_ewkb(geoms.data, srid, hex)
+        if ewkbs is not None:
+            return ewkbs
+        wkbs = to_wkb(geoms)
+
+    encode = _encode_ewkb_hex if hex else _encode_ewkb
+    for index, wkb in enumerate(wkbs):
+        if wkb is not None:
+            wkbs[index] = encode(wkb, srid)
+    return wkbs
+
+
+def _to_ewkb(data, srid, hex):
+    """Encodes the geometries as EWKB in a vectorized way with pygeos or shapely >= 2.0.
+    It returns None if none of them is available, so the SRID is written in each WKB header."""
+    if geopandas_compat.USE_PYGEOS:
+        import pygeos as geos
+    elif hasattr(shapely, 'to_wkb'):
+        geos = shapely
+    else:
+        return None
+    # `set_srid` returns new geometries, the original ones are not modified
+    return geos.to_wkb(geos.set_srid(data, srid), hex=hex, include_srid=True)
+
+
+def _encode_ewkb(wkb, srid):
+    # The first byte is the byte order (1: little endian) followed by the geometry type
+    byte_order = '<' if wkb[0] == 1 else '>'
+    geom_type = struct.unpack(byte_order + 'I', wkb[1:5])[0]
+    if geom_type & EWKB_SRID_FLAG:
+        # Already EWKB
+        return bytes(wkb)
+    header = struct.pack(byte_order + 'II', geom_type | EWKB_SRID_FLAG, srid)
+    return wkb[:1] + header + wkb[5:]
+
+
+def _encode_ewkb_hex(wkb, srid):
+    return ba.hexlify(_encode_ewkb(wkb, srid)).decode('ascii').upper()
+
+
+def is_wkb_array(values):
+    """Returns True if the values are WKB bytes (or nulls), instead of geometries."""
+    return getattr(values, 'dtype', None) == object and infer_dtype(values, skipna=True) == 'bytes'
+
+
+def decode_ewkb_hex_to_wkb(values):
+    """Converts hexadecimal EWKB values, as returned by the COPY queries, to WKB bytes without
+    the SRID. The geometries are not decoded.
+
+    Args:
+        values (Series or array): Column containing the hexadecimal EWKB values.
+
+    Returns:
+        numpy.ndarray: Array of WKB bytes, with None for the null values.
+
+    """
+    return np.array([None if pd.isnull(value) else _decode_ewkb(ba.unhexlify(value)) for value in values],
+                    dtype=object)
+
+
+def _decode_ewkb(ewkb):
+    byte_order = '<' if ewkb[0] == 1 else '>'
+    geom_type = struct.unpack(byte_order + 'I', ewkb[1:5])[0]
+    if not geom_type & EWKB_SRID_FLAG:
+        return ewkb
+    return ewkb[:1] + struct.pack(byte_order + 'I', geom_type & ~EWKB_SRID_FLAG) + ewkb[9:]
 
 
 def to_geojson(geom, buffer_simplify=True):
@@ -0,0 +1,138 @@
+"""Persistent cache of the data downloaded by `read_carto`. The results are stored as Parquet
+files, so a cached query is loaded from the disk instead of downloading it again."""
+
+import os
+import uuid
+
+from threading import Lock
+
+from .utils import USER_CONFIG_DIR, check_package, get_hash
+
+DEFAULT_PATH = os.path.join(USER_CONFIG_DIR, 'cache')
+DEFAULT_MAX_SIZE = 1024 ** 3  # 1GB
+FILE_EXTENSION = '.parquet'
+
+
+class ResultCache:
+    """Cache of DataFrames stored in the `path` directory, one Parquet file per key. When the
+    files take more than `max_size` bytes, the least recently used ones are removed.
+
+    It requires the optional package `pyarrow`.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the DataFrame of `key`, or None if it is not cached."""
+        check_package('pyarrow', is_optional=True)
+        import pandas as pd
+
+        filename = self._filename(key)
+        try:
+            df = pd.read_parquet(filename)
+            # The modification time of the files is their last use
+            os.utime(filename)
+        except FileNotFoundError:
+            return None
+        return df
+
+    def set(self, key, df):
+        check_package('pyarrow', is_optional=True)
+
+        os.makedirs(self.path, exist_ok=True)
+        filename = self._filename(key)
+
+        # The file is written with a temporary name, so the readers never get a partial file
+        temp_filename = '{}.{}.tmp'.format(filename, uuid.uuid4().hex[:8])
+        try:
+            df.to_parquet(temp_filename, index=False)
+            os.replace(temp_filename, filename)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+
+        self._evict()
+
+    def configure(self, path=DEFAULT_PATH, max_size=DEFAULT_MAX_SIZE):
+        with self._lock:
+            self.path = path
+            self.max_size = max_size
+        self._evict()
+
+    def clear(self):
+        with self._lock:
+            for filename, _, _ in self._entries():
+                _remove(filename)
+
+    def _filename(self, key):
+        return os.path.join(self.path, get_hash(repr(key)) + FILE_EXTENSION)
+
+    def _entries(self):
+        if not os.path.isdir(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(FILE_EXTENSION):
+                filename = os.path.join(self.path, name)
+                try:
+                    stat = os.stat(filename)
+                except FileNotFoundError:
+                    continue
+                entries.append((filename, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            size = sum(entry[1] for entry in entries)
+            for filename, file_size, _ in entries:
+                if size <= self.max_size:
+                    break
+                _remove(filename)
+                size -= file_size
+
+
+def _remove(filename):
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        # Removed by another process
+        pass
+
+
+result_cache = ResultCache()
+
+
+def setup_result_cache(path=DEFAULT_PATH, max_size=DEFAULT_MAX_SIZE):
+    """Set up the persistent cache used by `read_carto(..., cache=True)`. It requires
+    the optional package `pyarrow`.
+
+    Args:
+        path (str, optional): directory of the cached files. Default is the "cache" directory
+            in the cartoframes config directory.
+        max_size (int, optional): maximum size in bytes of the cached files. The least recently
+            used files are removed when it is exceeded. Default is 1GB.
+
+    Raises:
+        ValueError: if the path or the max size are not valid.
+
+    Example:
+        >>> setup_result_cache(max_size=10 * 1024 ** 3)
+
+    """
+    if not isinstance(path, str) or not path:
+        raise ValueError('Wrong path. You should provide a valid directory path.')
+
+    if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 0:
+        raise ValueError('Wrong max_size. You should provide a non-negative number of bytes.')
+
+    result_cache.configure(path, max_size)
+
+
+def clear_result_cache():
+    """Remove all the files of the persistent cache used by `read_carto(..., cache=True)`."""
+    result_cache.clear()
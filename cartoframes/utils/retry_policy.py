@@ -0,0 +1,174 @@
+"""Retry policy of the COPY requests. The rate-limited requests are retried after a jittered
+exponential backoff, so the concurrent streams do not retry at the same time."""
+
+import asyncio
+import random
+import time
+
+from threading import Lock
+from warnings import warn
+
+from carto.exceptions import CartoRateLimitException
+
+from .logger import log
+
+DEFAULT_RETRY_TIMES = 3
+DEFAULT_BASE_DELAY = 1  # seconds
+DEFAULT_MAX_DELAY = 60  # seconds
+DEFAULT_BACKOFF = 2
+
+
+class RetryPolicy:
+    """Policy to retry the rate-limited COPY requests of `read_carto` and `to_carto`. It can be
+    passed as the `retry_times` param instead of a number of attempts.
+
+    Every retry waits the time requested by the server (Retry-After) or the exponential
+    backoff delay, whichever is greater, plus a random jitter of up to `jitter` times the
+    backoff delay.
+
+    Args:
+        retry_times (int, optional): maximum number of attempts of each request. Default is 3.
+        base_delay (float, optional): backoff delay of the first retry, in seconds. Default is 1.
+        max_delay (float, optional): maximum backoff delay, in seconds. Default is 60.
+        backoff (float, optional): factor applied to the delay on each retry. Default is 2.
+        jitter (float, optional): maximum random delay added to each retry, as a fraction of the
+            backoff delay. Default is 1.
+        max_wait_time (float, optional): budget of seconds to wait for the retries of each request.
+            The request is not retried when the next wait exceeds it. Default is no limit.
+
+    Raises:
+        ValueError: if any of the params is not valid.
+
+    Example:
+        >>> read_carto('table_name', retry_times=RetryPolicy(retry_times=10, max_wait_time=300))
+
+    """
+
+    def __init__(self, retry_times=DEFAULT_RETRY_TIMES, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 backoff=DEFAULT_BACKOFF, jitter=1, max_wait_time=None):
+        if not isinstance(retry_times, int) or isinstance(retry_times, bool) or retry_times < 0:
+            raise ValueError('Wrong retry_times. You should provide a non-negative integer.')
+
+        for name, value in (('base_delay', base_delay), ('max_delay', max_delay), ('jitter', jitter)):
+            if not _is_non_negative(value):
+                raise ValueError('Wrong {}. You should provide a non-negative number.'.format(name))
+
+        if not _is_non_negative(backoff) or backoff < 1:
+            raise ValueError('Wrong backoff. You should provide a number greater than or equal to 1.')
+
+        if max_wait_time is not None and not _is_non_negative(max_wait_time):
+            raise ValueError('Wrong max_wait_time. You should provide a non-negative number.')
+
+        self.retry_times = retry_times
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_wait_time = max_wait_time
+
+    def call(self, request):
+        """Call `request` until it is not rate-limited, waiting between the attempts."""
+        attempt = 1
+        wait_time = 0
+        while True:
+            try:
+                return request()
+            except CartoRateLimitException as err:
+                delay = self._retry_delay(err, attempt, wait_time)
+            time.sleep(delay)
+            attempt += 1
+            wait_time += delay
+
+    async def call_async(self, request):
+        """Same as `call`, awaiting the coroutine returned by `request` on each attempt."""
+        attempt = 1
+        wait_time = 0
+        while True:
+            try:
+                return await request()
+            except CartoRateLimitException as err:
+                delay = self._retry_delay(err, attempt, wait_time)
+            await asyncio.sleep(delay)
+            attempt += 1
+            wait_time += delay
+
+    def delay(self, attempt, retry_after=None):
+        """Returns the seconds to wait before the retry of the `attempt` (starting at 1)."""
+        backoff_delay = min(self.base_delay * self.backoff ** (attempt - 1), self.max_delay)
+        return max(backoff_delay, retry_after or 0) + random.uniform(0, self.jitter * backoff_delay)
+
+    def _retry_delay(self, err, attempt, wait_time):
+        """Returns the delay of the next retry, or raises the error if the attempts or the
+        wait time budget are exhausted."""
+        if attempt >= self.retry_times:
+            warn(('Read call was rate-limited. '
+                  'This usually happens when there are multiple queries being read at the same time.'))
+            raise err
+
+        delay = self.delay(attempt, err.retry_after)
+        if self.max_wait_time is not None and wait_time + delay > self.max_wait_time:
+            warn('Read call was rate-limited. The retries exceed the max wait time of {} seconds.'.format(
+                self.max_wait_time))
+            raise err
+
+        warn('Read call rate limited. Waiting {:.1f} seconds'.format(delay))
+        retry_metrics.add(delay)
+        return delay
+
+    def __repr__(self):
+        return ('RetryPolicy(retry_times={}, base_delay={}, max_delay={}, backoff={}, jitter={}, '
+                'max_wait_time={})').format(self.retry_times, self.base_delay, self.max_delay, self.backoff,
+                                            self.jitter, self.max_wait_time)
+
+
+class RetryMetrics:
+    """Number of retries and seconds waited for them since the metrics were reset."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.retries = 0
+        self.wait_time = 0
+
+    def add(self, wait_time):
+        with self._lock:
+            self.retries += 1
+            self.wait_time += wait_time
+        log.debug('Retry {} after {:.1f} seconds'.format(self.retries, wait_time))
+
+    def get(self, reset=False):
+        with self._lock:
+            metrics = {'retries': self.retries, 'wait_time': self.wait_time}
+            if reset:
+                self.retries = 0
+                self.wait_time = 0
+        return metrics
+
+
+retry_metrics = RetryMetrics()
+
+
+def get_retry_policy(retry_times=None):
+    """Returns the policy of the `retry_times` param: a RetryPolicy or a number of attempts."""
+    if isinstance(retry_times, RetryPolicy):
+        return retry_times
+    if retry_times is None:
+        return RetryPolicy()
+    return RetryPolicy(retry_times)
+
+
+def get_retry_metrics(reset=False):
+    """Returns the number of retries of the rate-limited COPY requests and the seconds waited
+    for them, since the start or the last reset.
+
+    Args:
+        reset (bool, optional): reset the metrics after reading them. Default is False.
+
+    Returns:
+        dict: with the "retries" and "wait_time" keys.
+
+    """
+    return retry_metrics.get(reset)
+
+
+def _is_non_negative(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
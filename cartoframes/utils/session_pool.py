@@ -0,0 +1,124 @@
+"""Pool of HTTP sessions shared by all the clients of the same CARTO server, so the
+requests reuse the open connections instead of doing a new TCP/TLS handshake."""
+
+import time
+
+from threading import Lock
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEP_ALIVE = 300  # seconds
+
+
+class SessionPool:
+    """Thread-safe registry of `requests.Session` instances by base URL.
+
+    Each session keeps up to `pool_size` open connections to the server. When a session has
+    not been requested for more than `keep_alive` seconds, its connections are closed before
+    using it again, because the server has probably closed them already.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keep_alive=DEFAULT_KEEP_ALIVE):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._sessions = {}
+        self._lock = Lock()
+
+    def get(self, base_url):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._sessions.get(base_url)
+            if entry is None:
+                session = self._create_session()
+            else:
+                session, last_used = entry
+                if self.keep_alive is not None and now - last_used > self.keep_alive:
+                    # The session is still usable, new connections are opened on demand
+                    session.close()
+            self._sessions[base_url] = (session, now)
+            return session
+
+    def configure(self, pool_size=DEFAULT_POOL_SIZE, keep_alive=DEFAULT_KEEP_ALIVE):
+        """Sets the pool options. The current sessions are closed, the clients that use them
+        open new connections on demand."""
+        with self._lock:
+            self.pool_size = pool_size
+            self.keep_alive = keep_alive
+            for session, _ in self._sessions.values():
+                _mount_adapter(session, pool_size)
+
+    def clear(self):
+        with self._lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _create_session(self):
+        session = Session()
+        _mount_adapter(session, self.pool_size)
+        return session
+
+
+def _mount_adapter(session, pool_size):
+    for prefix in ('https://', 'http://'):
+        previous_adapter = session.adapters.get(prefix)
+        session.mount(prefix, HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        if previous_adapter is not None:
+            previous_adapter.close()
+
+
+session_pool = SessionPool()
+
+
+def get_session(credentials):
+    """Returns the session of the credentials if it is set, or the pooled session of its base URL."""
+    return credentials.session or session_pool.get(credentials.base_url)
+
+
+def get_worker_session(credentials):
+    """Returns a new session for a worker thread, with the settings of the session of the
+    credentials. A `requests.Session` is not thread-safe, but its adapters are, so the new
+    session shares them to reuse the same connections."""
+    session = get_session(credentials)
+    worker_session = Session()
+    worker_session.headers = session.headers.copy()
+    worker_session.cookies = session.cookies.copy()
+    worker_session.auth = session.auth
+    worker_session.proxies = session.proxies.copy()
+    worker_session.hooks = {event: list(hooks) for event, hooks in session.hooks.items()}
+    worker_session.params = session.params.copy()
+    worker_session.verify = session.verify
+    worker_session.cert = session.cert
+    worker_session.adapters = session.adapters.copy()
+    worker_session.stream = session.stream
+    worker_session.trust_env = session.trust_env
+    worker_session.max_redirects = session.max_redirects
+    return worker_session
+
+
+def setup_session_pool(pool_size=DEFAULT_POOL_SIZE, keep_alive=DEFAULT_KEEP_ALIVE):
+    """Set up the pool of HTTP sessions shared by the requests to the same CARTO server.
+    It does not apply to the credentials with a custom `session`.
+
+    Args:
+        pool_size (int, optional): maximum number of open connections to each server. It should
+            not be lower than the `parallel_uploads` of `to_carto`. Default is 10.
+        keep_alive (int, optional): seconds that the idle connections are reused. If None, they
+            are always reused. Default is 300.
+
+    Raises:
+        ValueError: if the pool size or the keep alive are not valid.
+
+    Example:
+        >>> setup_session_pool(pool_size=20, keep_alive=60)
+
+    """
+    if not isinstance(pool_size, int) or isinstance(pool_size, bool) or pool_size < 1:
+        raise ValueError('Wrong pool_size. You should provide a positive integer.')
+
+    if keep_alive is not None and (not isinstance(keep_alive, (int, float)) or keep_alive < 0):
+        raise ValueError('Wrong keep_alive. You should provide a non-negative number of seconds or None.')
+
+    session_pool.configure(pool_size, keep_alive)
@@ -4,6 +4,7 @@ import os
 import re
 import gzip
 import json
+import math
 import time
 import base64
 import appdirs
@@ -33,6 +34,8 @@ GEOM_TYPE_LINE = 'line'
 GEOM_TYPE_POLYGON = 'polygon'
 
 PG_NULL = '__null'
+# Values of the COPY FROM data that must be quoted
+SPECIAL_CHARS_RE = re.compile('["|\n]')
 
 USER_CONFIG_DIR = appdirs.user_config_dir('cartoframes')
 
@@ -123,10 +126,15 @@ def dtypes2pg(dtype):
         'int16': 'smallint',
         'int32': 'integer',
         'int64': 'bigint',
+        'Int16': 'smallint',
+        'Int32': 'integer',
+        'Int64': 'bigint',
         'float32': 'real',
         'float64': 'double precision',
         'object': 'text',
         'bool': 'boolean',
+        'boolean': 'boolean',
+        'datetime64[D]': 'date',
         'datetime64[ns]': 'timestamp',
         'datetime64[ns, UTC]': 'timestamp',
         'geometry': 'geometry'
@@ -372,29 +380,64 @@ def remove_column_from_dataframe(dataframe, name):
 
 
 def encode_row(row):
-    if row is None:
-        row = PG_NULL
-
-    elif isinstance(row, float):
-        if str(row) == 'inf':
-            row = 'Infinity'
-        elif str(row) == '-inf':
-            row = '-Infinity'
-        elif str(row) == 'nan':
-            row = 'NaN'
-
-    elif isinstance(row, type(b'')):
-        # Decode the input if it's a bytestring
-        row = row.decode('utf-8')
-
-    special_keys = ['"', '|', '\n']
-    if isinstance(row, str) and any(key in row for key in special_keys):
+    return encode_value(row).encode('utf-8')
+
+
+def encode_value(row):
+    """Same as `encode_row`, returning the encoded value as a str."""
+    encoder = VALUE_ENCODERS.get(type(row), _encode_any_value)
+    return encoder(row)
+
+
+def _encode_null_value(row):
+    return PG_NULL
+
+
+def _encode_float_value(row):
+    if math.isfinite(row):
+        return '{}'.format(row)
+    if math.isnan(row):
+        return 'NaN'
+    return 'Infinity' if row > 0 else '-Infinity'
+
+
+def _encode_str_value(row):
+    if SPECIAL_CHARS_RE.search(row):
         # If the input contains any special key:
         # - replace " by ""
         # - cover the row with "..."
-        row = '"{}"'.format(row.replace('"', '""'))
-
-    return '{}'.format(row).encode('utf-8')
+        return '"{}"'.format(row.replace('"', '""'))
+    return row
+
+
+def _encode_bytes_value(row):
+    # Decode the input if it's a bytestring
+    return _encode_str_value(row.decode('utf-8'))
+
+
+def _encode_any_value(row):
+    # Subclasses of the dispatched types (and any other type) are checked one by one
+    if isinstance(row, float):
+        return _encode_float_value(row)
+    if isinstance(row, bytes):
+        return _encode_bytes_value(row)
+    if isinstance(row, str) and SPECIAL_CHARS_RE.search(row):
+        return '"{}"'.format(row.replace('"', '""'))
+    return '{}'.format(row)
+
+
+# Encoders by the exact type of the value, the most common ones in the uploaded data
+VALUE_ENCODERS = {
+    type(None): _encode_null_value,
+    str: _encode_str_value,
+    float: _encode_float_value,
+    np.float64: _encode_float_value,
+    int: str,
+    bool: str,
+    np.int64: str,
+    np.bool_: str,
+    bytes: _encode_bytes_value
+}
 
 
 def create_hash(value):
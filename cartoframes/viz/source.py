@@ -1,7 +1,7 @@
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 
-from ..io.managers.context_manager import ContextManager
+from ..io.managers.context_manager import get_context_manager
 from ..utils.geom_utils import check_crs, has_geometry, set_geometry
 from ..utils.utils import get_geodataframe_data, get_geodataframe_bounds, \
                           get_geodataframe_geom_type, get_datetime_column_names
@@ -69,7 +69,7 @@ class Source:
         if isinstance(source, str):
             # Table, SQL query
             self.type = SourceType.QUERY
-            self.manager = ContextManager(credentials)
+            self.manager = get_context_manager(credentials)
             self.query = self.manager.compute_query(source)
             self.credentials = self.manager.credentials
         elif isinstance(source, DataFrame):
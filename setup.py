@@ -27,7 +27,7 @@ REQUIRES = [
     'appdirs>=1.4.3,<2.0',
     'carto>=1.11.2,<2.0',
     'jinja2>=2.10.1,<3.0',
-    'pandas>=0.25.0',
+    'pandas>=1.0.0',
     'geopandas>=0.6.0,<1.0',
     'unidecode>=1.1.0,<2.0',
     'semantic_version>=2.8.0,<3'
@@ -82,7 +82,6 @@ setup(
         'License :: OSI Approved :: BSD License',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8'
@@ -98,5 +97,5 @@ setup(
     extras_requires={
         'tests': EXTRAS_REQUIRES_TESTS
     },
-    python_requires='>=3.5'
+    python_requires='>=3.6'
 )
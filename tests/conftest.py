@@ -1,3 +1,7 @@
+import pytest
+
+from cartoframes.io.managers.context_manager import clear_context_managers
+from cartoframes.io.managers.metadata_cache import metadata_cache
 from cartoframes.utils import setup_metrics
 
 
@@ -28,3 +32,13 @@ def pytest_unconfigure(config):
     """
     called before test process is exited.
     """
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    """The cached metadata and context managers of the mocked requests must not be shared between tests."""
+    metadata_cache.clear()
+    clear_context_managers()
+    yield
+    metadata_cache.clear()
+    clear_context_managers()
@@ -0,0 +1,72 @@
+"""Unit tests for cartoframes.aio.batch"""
+
+import pytest
+
+from carto.exceptions import CartoException
+
+from cartoframes.aio import BatchJob
+from cartoframes.aio.client import AsyncClient
+from cartoframes.auth import Credentials
+from ..mocks.context_manager_mock import run_async
+
+
+def _job_statuses(*statuses):
+    statuses = iter(statuses)
+
+    async def read_job(job_id):
+        return {'job_id': job_id, 'status': next(statuses)}
+
+    return read_job
+
+
+class TestBatchJob(object):
+
+    def setup_method(self):
+        self.client = AsyncClient(Credentials('fake_user', 'fake_api'))
+
+    def test_await(self, mocker):
+        # Given
+        mock = mocker.patch.object(AsyncClient, 'read_job', side_effect=_job_statuses('running', 'done'))
+        mocker.patch('cartoframes.aio.batch.MIN_POLL_INTERVAL', 0)
+        job = BatchJob(self.client, {'job_id': 'abc', 'status': 'pending'})
+
+        # When
+        data = run_async(job.wait())
+
+        # Then
+        assert data == {'job_id': 'abc', 'status': 'done'}
+        assert mock.call_count == 2
+
+    def test_await_job(self, mocker):
+        mocker.patch.object(AsyncClient, 'read_job', side_effect=_job_statuses('done'))
+        job = BatchJob(self.client, {'job_id': 'abc', 'status': 'done'})
+
+        async def wait():
+            return await job
+
+        assert run_async(wait()) == {'job_id': 'abc', 'status': 'done'}
+
+    def test_wait_failed(self, mocker):
+        mocker.patch.object(AsyncClient, 'read_job', side_effect=_job_statuses('failed'))
+        mocker.patch('cartoframes.aio.batch.MIN_POLL_INTERVAL', 0)
+        job = BatchJob(self.client, {'job_id': 'abc', 'status': 'running'})
+
+        with pytest.raises(CartoException) as e:
+            run_async(job.wait())
+
+        assert str(e.value) == "Batch SQL job failed with result: {'job_id': 'abc', 'status': 'failed'}"
+
+    def test_status_and_cancel(self, mocker):
+        # Given
+        mocker.patch.object(AsyncClient, 'read_job', side_effect=_job_statuses('running'))
+        mock_cancel = mocker.patch.object(AsyncClient, 'cancel_job', side_effect=_job_statuses('canceled'))
+        job = BatchJob(self.client, {'job_id': 'abc', 'status': 'pending'})
+
+        # When
+        status = run_async(job.status())
+        canceled_status = run_async(job.cancel())
+
+        # Then
+        assert status == 'running'
+        assert canceled_status == 'canceled'
+        mock_cancel.assert_called_once_with('abc')
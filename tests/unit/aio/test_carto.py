@@ -0,0 +1,69 @@
+"""Unit tests for cartoframes.aio.carto"""
+
+import pytest
+
+from geopandas import GeoDataFrame
+from pandas import DataFrame
+from shapely.geometry import Point
+
+from cartoframes.aio import AsyncContextManager, read_carto_async, to_carto_async
+from cartoframes.auth import Credentials
+from ..mocks.context_manager_mock import run_async
+
+
+def _returning(value):
+    async def coroutine(*args, **kwargs):
+        return value
+
+    return coroutine
+
+
+class TestCartoAsync(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+
+    def test_read_carto_async(self, mocker):
+        # Given
+        df = DataFrame({
+            'cartodb_id': [1],
+            'the_geom': ['0101000020E6100000000000000000F03F0000000000000040']
+        })
+        mock = mocker.patch.object(AsyncContextManager, 'copy_to', side_effect=_returning(df))
+
+        # When
+        gdf = run_async(read_carto_async('__source__', self.credentials, index_col='cartodb_id'))
+
+        # Then
+        mock.assert_called_once_with('__source__', None, None, 3, 'csv', True, None, None, None, None, None)
+        assert isinstance(gdf, GeoDataFrame)
+        assert gdf.index.name == 'cartodb_id'
+        assert gdf.geometry.tolist() == [Point(1, 2)]
+        assert gdf.crs == 'epsg:4326'
+
+    def test_read_carto_async_wrong_source(self):
+        with pytest.raises(ValueError) as e:
+            run_async(read_carto_async(1234, self.credentials))
+
+        assert str(e.value) == 'Wrong source. You should provide a valid table_name or SQL query.'
+
+    def test_to_carto_async(self, mocker):
+        # Given
+        mock = mocker.patch.object(AsyncContextManager, 'copy_from', side_effect=_returning('table_name'))
+        gdf = GeoDataFrame({'a': [1]}, geometry=[Point(1, 2)], crs='epsg:4326')
+
+        # When
+        table_name = run_async(to_carto_async(gdf, '__table_name__', self.credentials, skip_quota_warning=True))
+
+        # Then
+        assert table_name == 'table_name'
+        uploaded_gdf = mock.call_args[0][0]
+        assert uploaded_gdf.geometry.name == 'the_geom'
+        assert mock.call_args[0][1:] == ('__table_name__', 'fail', True, 3, 'csv', True, 2000000000)
+
+    def test_to_carto_async_wrong_if_exists(self):
+        with pytest.raises(ValueError) as e:
+            run_async(to_carto_async(DataFrame({'a': [1]}), '__table_name__', self.credentials, if_exists='keep'))
+
+        assert str(e.value) == ('Wrong option for the `if_exists` param. You should provide: '
+                                'fail, replace, append.')
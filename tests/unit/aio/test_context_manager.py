@@ -0,0 +1,210 @@
+"""Unit tests for cartoframes.aio.context_manager"""
+
+import pytest
+
+from carto.exceptions import CartoRateLimitException
+from pandas import DataFrame
+
+from cartoframes.aio import AsyncContextManager
+from cartoframes.aio.client import AsyncClient, ResponseInfo
+from cartoframes.auth import Credentials
+from cartoframes.io.managers.context_manager import ContextManager
+from ..mocks.context_manager_mock import run_async, setup_output
+
+RATE_LIMIT_HEADERS = {
+    'Carto-Rate-Limit-Limit': '1',
+    'Carto-Rate-Limit-Remaining': '0',
+    'Retry-After': '0',
+    'Carto-Rate-Limit-Reset': '1'
+}
+
+
+def _sql_responses(responses):
+    # Mock of `AsyncClient.send` that answers by the start of the query
+    async def send(query, do_post=True, format=None):
+        for prefix, response in responses.items():
+            if query.startswith(prefix):
+                if isinstance(response, Exception):
+                    raise response
+                return response
+        raise AssertionError('Unexpected query: {}'.format(query))
+
+    return send
+
+
+async def _done_job(query):
+    return {'job_id': 'abc', 'status': 'done', 'query': query}
+
+
+class TestAsyncContextManager(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+
+    def test_execute_query(self, mocker):
+        # Given
+        async def send(query, do_post=True, format=None):
+            return {'rows': [{'a': 1}]}
+
+        mock = mocker.patch.object(AsyncClient, 'send', side_effect=send)
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        result = run_async(cm.execute_query(' SELECT 1 '))
+
+        # Then
+        mock.assert_called_once_with('SELECT 1', True, None)
+        assert result == {'rows': [{'a': 1}]}
+
+    def test_execute_query_invalidates_table_metadata(self, mocker):
+        # Given
+        async def send(query, do_post=True, format=None):
+            return {'rows': [{'cdb_droptable': None}]}
+
+        mocker.patch.object(AsyncClient, 'send', side_effect=send)
+        mock_invalidate = mocker.patch.object(ContextManager, '_invalidate_table_metadata')
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        run_async(cm.execute_query("SELECT CDB_DropTable('table_name')"))
+
+        # Then
+        mock_invalidate.assert_called_once_with()
+
+    def test_execute_long_running_query(self, mocker):
+        # Given
+        mock = mocker.patch.object(AsyncClient, 'create_job', side_effect=_done_job)
+        mock_invalidate = mocker.patch.object(ContextManager, '_invalidate_table_metadata')
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        data = run_async(cm.execute_long_running_query(' DROP TABLE table_name '))
+
+        # Then
+        mock.assert_called_once_with('DROP TABLE table_name')
+        assert data['status'] == 'done'
+        mock_invalidate.assert_called_once_with()
+
+    def test_shared_metadata_cache(self, mocker):
+        # Given
+        mocker.patch.object(ContextManager, '_get_schema', return_value='schema')
+        mock = mocker.patch.object(AsyncClient, 'send')
+        ContextManager(self.credentials).get_schema()
+
+        # When
+        schema = run_async(AsyncContextManager(self.credentials).get_schema())
+
+        # Then
+        assert schema == 'schema'
+        mock.assert_not_called()
+
+    def test_copy_to(self, mocker):
+        # Given
+        mocker.patch.object(AsyncClient, 'send', side_effect=_sql_responses({
+            'SELECT current_schema()': {'rows': [{'current_schema': 'public'}]},
+            'SELECT * FROM (SELECT * FROM "public"."table_name")': {
+                'fields': {'a': {'type': 'number', 'pgtype': 'int4'}, 'b': {'type': 'string', 'pgtype': 'text'}}
+            }
+        }))
+
+        async def copyto(query, compress=True):
+            return b'a,b\n1,x\n2,__null\n'
+
+        mock = mocker.patch.object(AsyncClient, 'copyto', side_effect=copyto)
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        df = run_async(cm.copy_to('table_name'))
+
+        # Then
+        assert mock.call_args[0][0] == ('COPY (SELECT "a","b" FROM (SELECT * FROM "public"."table_name") _q) '
+                                        'TO stdout WITH (FORMAT csv, HEADER true, NULL \'__null\')')
+        assert df['a'].tolist() == [1, 2]
+        assert df['b'].tolist() == ['x', None]
+
+    def test_copy_to_retry(self, mocker):
+        # Given
+        mocker.patch.object(AsyncClient, 'send', side_effect=_sql_responses({
+            'SELECT * FROM (SELECT 1 AS a)': {'fields': {'a': {'type': 'number', 'pgtype': 'int4'}}}
+        }))
+        responses = iter([CartoRateLimitException(ResponseInfo(429, RATE_LIMIT_HEADERS, 'Rate limited')),
+                          b'a\n1\n'])
+
+        async def copyto(query, compress=True):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        mock = mocker.patch.object(AsyncClient, 'copyto', side_effect=copyto)
+        mock_sleep = mocker.patch('cartoframes.utils.retry_policy.asyncio.sleep')
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        with pytest.warns(UserWarning):
+            df = run_async(cm.copy_to('SELECT 1 AS a', retry_times=2))
+
+        # Then
+        assert mock.call_count == 2
+        mock_sleep.assert_called_once()
+        assert df['a'].tolist() == [1]
+
+    def test_copy_from_create_table(self, mocker):
+        # Given
+        mock = mocker.patch.object(AsyncClient, 'send', side_effect=_sql_responses({
+            'DO $cartoframes$': setup_output('create')
+        }))
+        uploaded = []
+
+        async def copyfrom(query, data, compress=True):
+            uploaded.append((query, b''.join(data)))
+
+        mocker.patch.object(AsyncClient, 'copyfrom', side_effect=copyfrom)
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        table_name = run_async(cm.copy_from(DataFrame({'a': [1, 2]}), 'table_name', cartodbfy=False))
+
+        # Then
+        assert table_name == 'table_name'
+        assert mock.call_count == 1
+        assert 'CREATE TABLE table_name ("a" bigint);' in mock.call_args[0][0]
+        assert uploaded == [(
+            'COPY table_name("a") FROM stdin WITH (FORMAT csv, DELIMITER \'|\', NULL \'__null\');',
+            b'1\n2\n'
+        )]
+
+    def test_copy_from_max_upload_size(self, mocker):
+        # Given
+        mocker.patch.object(AsyncClient, 'send', side_effect=_sql_responses({
+            'DO $cartoframes$': setup_output('append', {'a': 'bigint'})
+        }))
+        uploaded = []
+
+        async def copyfrom(query, data, compress=True):
+            uploaded.append(b''.join(data))
+
+        mocker.patch.object(AsyncClient, 'copyfrom', side_effect=copyfrom)
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        run_async(cm.copy_from(DataFrame({'a': [10, 20, 30]}), 'table_name', if_exists='append', max_upload_size=6))
+
+        # Then
+        assert uploaded == [b'10\n20\n', b'30\n']
+
+    def test_copy_from_table_exists(self, mocker):
+        # Given
+        mocker.patch.object(AsyncClient, 'send', side_effect=_sql_responses({
+            'DO $cartoframes$': setup_output('fail')
+        }))
+        cm = AsyncContextManager(self.credentials)
+
+        # When
+        with pytest.raises(Exception) as e:
+            run_async(cm.copy_from(DataFrame({'a': [1]}), 'table_name'))
+
+        # Then
+        assert str(e.value) == ('Table "schema.table_name" already exists in your CARTO account. '
+                                'Please choose a different `table_name` or use '
+                                'if_exists="replace" to overwrite it.')
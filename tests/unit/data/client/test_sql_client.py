@@ -1,8 +1,13 @@
 """Unit tests for cartoframes.client.SQLClient"""
 
+import asyncio
+
+from carto.sql import BatchSQLClient
+
+from cartoframes.aio import AsyncContextManager
 from cartoframes.auth import Credentials
 from cartoframes.io.managers.context_manager import ContextManager
-from cartoframes.data.clients import SQLClient
+from cartoframes.data.clients import BatchJob, SQLClient
 
 SQL_SELECT_RESPONSE = {
     'rows': [{
@@ -104,6 +109,39 @@ class TestSQLClient(object):
         assert output == SQL_BATCH_RESPONSE
         mock.assert_called_once_with('query')
 
+    def test_submit(self, mocker):
+        """client.SQLClient.submit"""
+        mock = mocker.patch.object(BatchSQLClient, 'create', return_value={'job_id': 'a', 'status': 'pending'})
+        job = SQLClient(self.credentials).submit(' query ')
+
+        assert isinstance(job, BatchJob)
+        assert job.job_id == 'a'
+        assert not job.done()
+        mock.assert_called_once_with('query')
+
+    def test_query_async(self, mocker):
+        """client.SQLClient.query_async"""
+        async def execute_query(query):
+            return SQL_SELECT_RESPONSE
+
+        mock = mocker.patch.object(AsyncContextManager, 'execute_query', side_effect=execute_query)
+        output = asyncio.get_event_loop().run_until_complete(SQLClient(self.credentials).query_async(' query '))
+
+        assert output == SQL_SELECT_RESPONSE['rows']
+        mock.assert_called_once_with('query')
+
+    def test_execute_async(self, mocker):
+        """client.SQLClient.execute_async"""
+        async def execute_long_running_query(query):
+            return SQL_BATCH_RESPONSE
+
+        mock = mocker.patch.object(AsyncContextManager, 'execute_long_running_query',
+                                   side_effect=execute_long_running_query)
+        output = asyncio.get_event_loop().run_until_complete(SQLClient(self.credentials).execute_async('query'))
+
+        assert output == SQL_BATCH_RESPONSE
+        mock.assert_called_once_with('query')
+
     def test_distinct(self, mocker):
         """client.SQLClient.distinct"""
         mock = mocker.patch.object(ContextManager, 'execute_query', return_value=SQL_DISTINCT_RESPONSE)
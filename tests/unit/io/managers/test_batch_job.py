@@ -0,0 +1,85 @@
+"""Unit tests for cartoframes.io.managers.batch_job"""
+
+import pytest
+
+from carto.auth import APIKeyAuthClient
+from carto.exceptions import CartoException
+from carto.sql import BatchSQLClient
+
+from cartoframes.io.managers.batch_job import BatchJob, wait_all
+
+
+def _job(job_id, status):
+    return {'job_id': job_id, 'status': status}
+
+
+class TestBatchJob(object):
+
+    def setup_method(self):
+        self.client = BatchSQLClient(APIKeyAuthClient('https://fake_user.carto.com', 'fake_api'))
+
+    def test_status(self, mocker):
+        # Given
+        mock = mocker.patch.object(BatchSQLClient, 'read', side_effect=[_job('a', 'running'), _job('a', 'done')])
+        mock_on_finish = mocker.Mock()
+        job = BatchJob(self.client, _job('a', 'pending'), mock_on_finish)
+
+        # When
+        statuses = [job.status(), job.status(), job.status()]
+
+        # Then
+        assert statuses == ['running', 'done', 'done']
+        assert mock.call_count == 2
+        mock_on_finish.assert_called_once_with()
+
+    def test_cancel(self, mocker):
+        # Given
+        mock = mocker.patch.object(BatchSQLClient, 'cancel', return_value='cancelled')
+        job = BatchJob(self.client, _job('a', 'running'))
+
+        # When
+        status = job.cancel()
+
+        # Then
+        mock.assert_called_once_with('a')
+        assert status == 'cancelled'
+        assert job.done()
+
+    def test_wait_all(self, mocker):
+        # Given
+        mocker.patch.object(BatchSQLClient, 'read', side_effect=[
+            _job('a', 'done'), _job('b', 'running'), _job('b', 'done')
+        ])
+        mock_sleep = mocker.patch('cartoframes.io.managers.batch_job.time.sleep')
+        jobs = [BatchJob(self.client, _job('a', 'pending')), BatchJob(self.client, _job('b', 'pending')),
+                BatchJob(self.client, _job('c', 'done'))]
+
+        # When
+        results = wait_all(jobs)
+
+        # Then
+        assert results == [_job('a', 'done'), _job('b', 'done'), _job('c', 'done')]
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [0.5, 0.75]
+
+    def test_wait_failed(self, mocker):
+        mocker.patch.object(BatchSQLClient, 'read', return_value=_job('a', 'failed'))
+        mocker.patch('cartoframes.io.managers.batch_job.time.sleep')
+
+        with pytest.raises(CartoException) as e:
+            BatchJob(self.client, _job('a', 'running')).wait()
+
+        assert str(e.value) == "Batch SQL job failed with result: {'job_id': 'a', 'status': 'failed'}"
+
+    def test_wait_timeout(self, mocker):
+        # Given
+        mocker.patch.object(BatchSQLClient, 'read', return_value=_job('a', 'running'))
+        mock_time = mocker.patch('cartoframes.io.managers.batch_job.time')
+        mock_time.monotonic.side_effect = [0, 0.5, 1.25, 2]
+
+        # When
+        with pytest.raises(TimeoutError) as e:
+            BatchJob(self.client, _job('a', 'running')).wait(timeout=2)
+
+        # Then
+        assert str(e.value) == 'The Batch SQL jobs a are not finished after 2 seconds.'
+        assert [call[0][0] for call in mock_time.sleep.call_args_list] == [0.5, 0.75]
@@ -0,0 +1,164 @@
+"""Unit tests for cartoframes.io.managers.binary_copy"""
+
+import struct
+
+from io import BytesIO
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from shapely.geometry import Point
+from geopandas import GeoSeries
+
+from cartoframes.io.managers.binary_copy import (BINARY_HEADER, BINARY_TRAILER, decode_binary_copy,
+                                                 encode_binary_copy, is_binary_compatible)
+from cartoframes.utils.columns import ColumnInfo
+
+
+def _field(value):
+    if value is None:
+        return struct.pack('>i', -1)
+    return struct.pack('>i', len(value)) + value
+
+
+def _row(*values):
+    return struct.pack('>h', len(values)) + b''.join(_field(value) for value in values)
+
+
+class TestBinaryCopy(object):
+
+    def setup_method(self):
+        self.columns = [
+            ColumnInfo('id', 'id', 'bigint', False),
+            ColumnInfo('name', 'name', 'text', False)
+        ]
+        # Stream in the format sent by PostgreSQL for: (1, 'a'), (2, NULL)
+        self.stream = BINARY_HEADER + \
+            _row(struct.pack('>q', 1), b'a') + \
+            _row(struct.pack('>q', 2), None) + \
+            BINARY_TRAILER
+
+    def test_encode_binary_copy(self):
+        df = pd.DataFrame({'id': [1, 2], 'name': ['a', None]})
+
+        data = b''.join(encode_binary_copy(df, self.columns))
+
+        assert data == self.stream
+
+    def test_decode_binary_copy(self):
+        df = decode_binary_copy(BytesIO(self.stream), self.columns)
+
+        assert df['id'].dtype == 'Int64'
+        assert df['id'].tolist() == [1, 2]
+        assert df['name'].tolist() == ['a', None]
+
+    def test_decode_binary_copy_fixed_types(self):
+        columns = [
+            ColumnInfo('a', 'a', 'smallint', False),
+            ColumnInfo('b', 'b', 'real', False),
+            ColumnInfo('c', 'c', 'boolean', False),
+            ColumnInfo('d', 'd', 'date', False),
+            ColumnInfo('e', 'e', 'timestamp', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry', True)
+        ]
+        ewkb = bytes.fromhex('0101000020E6100000000000000048934000000000009DB640')
+        stream = BINARY_HEADER + \
+            _row(struct.pack('>h', -3), struct.pack('>f', 1.5), b'\x01', struct.pack('>i', 1),
+                 struct.pack('>q', 1000000), ewkb) + \
+            _row(None, struct.pack('>f', float('nan')), None, struct.pack('>i', 2 ** 31 - 1), None, None) + \
+            BINARY_TRAILER
+
+        df = decode_binary_copy(BytesIO(stream), columns)
+
+        assert df['a'].tolist() == [-3, pd.NA]
+        assert df['b'].iloc[0] == 1.5
+        assert np.isnan(df['b'].iloc[1])
+        assert df['c'].tolist() == [True, pd.NA]
+        assert df['d'].tolist() == [pd.Timestamp('2000-01-02'), pd.NaT]
+        assert df['e'].tolist() == [pd.Timestamp('2000-01-01 00:00:01'), pd.NaT]
+        assert df['the_geom'].tolist() == ['0101000020E6100000000000000048934000000000009DB640', None]
+
+    def test_decode_binary_copy_timestamptz(self):
+        columns = [ColumnInfo('a', 'a', 'timestamptz', False)]
+        stream = BINARY_HEADER + _row(struct.pack('>q', 1500000)) + _row(None) + BINARY_TRAILER
+
+        df = decode_binary_copy(BytesIO(stream), columns)
+
+        assert str(df['a'].dtype) == 'datetime64[ns, UTC]'
+        assert df['a'].tolist() == [pd.Timestamp('2000-01-01 00:00:01.5', tz='UTC'), pd.NaT]
+
+    def test_binary_copy_timestamptz_round_trip(self):
+        columns = [ColumnInfo('a', 'a', 'timestamptz', False)]
+        df = pd.DataFrame({'a': pd.to_datetime(['2020-01-01 10:00:00+02:00', None], utc=True)})
+
+        result = decode_binary_copy(BytesIO(b''.join(encode_binary_copy(df, columns))), columns)
+
+        assert result['a'].tolist() == [pd.Timestamp('2020-01-01 08:00:00', tz='UTC'), pd.NaT]
+
+    def test_decode_binary_copy_chunks(self, mocker):
+        mocker.patch('cartoframes.io.managers.binary_copy.BINARY_READ_SIZE', 7)
+        df = pd.DataFrame({'id': range(5), 'name': ['a', 'bb', None, 'ccc', '']})
+        stream = b''.join(encode_binary_copy(df, self.columns))
+
+        chunks = list(decode_binary_copy(BytesIO(stream), self.columns, chunksize=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [chunk.index.tolist() for chunk in chunks] == [[0, 1], [2, 3], [4]]
+        result = pd.concat(chunks)
+        assert result['id'].tolist() == [0, 1, 2, 3, 4]
+        assert result['name'].tolist() == ['a', 'bb', None, 'ccc', '']
+
+    def test_binary_copy_round_trip(self):
+        columns = [
+            ColumnInfo('a', 'a', 'bigint', False),
+            ColumnInfo('b', 'b', 'double precision', False),
+            ColumnInfo('c', 'c', 'boolean', False),
+            ColumnInfo('d', 'd', 'text', False),
+            ColumnInfo('e', 'e', 'timestamp', False),
+            ColumnInfo('f', 'f', 'bigint', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry', True)
+        ]
+        df = pd.DataFrame({
+            'a': [1, -2, 3],
+            'b': [1.5, float('nan'), float('inf')],
+            'c': [True, False, True],
+            'd': ['a|b', 'ñ\n"', None],
+            'e': pd.to_datetime(['2020-01-01 10:00:00', None, '1999-12-31 23:59:59.5']),
+            'f': pd.array([1, None, 3], dtype='Int64'),
+            'the_geom': GeoSeries([Point(1, 2), None, Point(3, 4)])
+        })
+
+        result = decode_binary_copy(BytesIO(b''.join(encode_binary_copy(df, columns))), columns)
+
+        assert result['a'].tolist() == [1, -2, 3]
+        assert result['b'].iloc[0] == 1.5 and np.isnan(result['b'].iloc[1]) and np.isinf(result['b'].iloc[2])
+        assert result['c'].tolist() == [True, False, True]
+        assert result['d'].tolist() == ['a|b', 'ñ\n"', None]
+        assert result['e'].tolist() == df['e'].tolist()
+        assert result['f'].tolist() == [1, pd.NA, 3]
+        assert result['the_geom'].tolist() == [
+            '0101000020E6100000000000000000F03F0000000000000040',
+            None,
+            '0101000020E610000000000000000008400000000000001040'
+        ]
+
+    def test_decode_binary_copy_wrong_signature(self):
+        with pytest.raises(ValueError) as e:
+            decode_binary_copy(BytesIO(b'id,name\n1,a\n'), self.columns)
+
+        assert str(e.value) == 'The binary COPY stream has a wrong signature.'
+
+    def test_decode_binary_copy_incomplete(self):
+        with pytest.raises(ValueError) as e:
+            decode_binary_copy(BytesIO(self.stream[:-4]), self.columns)
+
+        assert str(e.value) == 'The binary COPY stream is incomplete.'
+
+    def test_is_binary_compatible(self):
+        assert is_binary_compatible(ColumnInfo('a', 'a', 'bigint', False), 'bigint')
+        assert not is_binary_compatible(ColumnInfo('a', 'a', 'bigint', False), 'numeric')
+        assert is_binary_compatible(ColumnInfo('a', 'a', 'text', False), 'character varying(10)')
+        assert is_binary_compatible(ColumnInfo('a', 'a', 'timestamp', False), 'timestamp without time zone')
+        assert is_binary_compatible(ColumnInfo('g', 'g', 'geometry', True), 'geometry(Geometry,4326)')
+        assert not is_binary_compatible(ColumnInfo('a', 'a', 'text', False), None)
@@ -1,16 +1,24 @@
+from io import BytesIO
 from collections import namedtuple
 
 import pytest
+import numpy as np
 
 from carto.datasets import DatasetManager
-from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
-from carto.exceptions import CartoRateLimitException
+from carto.sql import SQLClient, BatchSQLClient
+from carto.exceptions import CartoException, CartoRateLimitException
 
-from pandas import DataFrame
-from geopandas import GeoDataFrame
+from pandas import DataFrame, NaT, Series, Timestamp, concat, to_datetime
+from requests import Session
+from geopandas import GeoDataFrame, GeoSeries
+from shapely.geometry import Point
 from cartoframes.auth import Credentials
-from cartoframes.io.managers.context_manager import ContextManager, DEFAULT_RETRY_TIMES, retry_copy
-from cartoframes.utils.columns import ColumnInfo
+from cartoframes.io.managers.context_manager import (ContextManager, DEFAULT_RETRY_TIMES, get_context_manager,
+                                                     retry_copy, _compute_copy_data, _row_hashes)
+from cartoframes.io.managers.binary_copy import decode_binary_copy, encode_binary_copy
+from cartoframes.io.managers.copy_client import CopyClient
+from cartoframes.utils.columns import ColumnInfo, get_dataframe_columns_info
+from ...mocks.context_manager_mock import consume_copy_data, setup_output
 
 
 class TestContextManager(object):
@@ -33,14 +41,17 @@ class TestContextManager(object):
     def test_execute_long_running_query(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mock = mocker.patch.object(BatchSQLClient, 'create_and_wait_for_completion')
+        mock = mocker.patch.object(BatchSQLClient, 'create', return_value={'job_id': 'a', 'status': 'pending'})
+        mocker.patch.object(BatchSQLClient, 'read', return_value={'job_id': 'a', 'status': 'done'})
+        mocker.patch('cartoframes.io.managers.batch_job.time.sleep')
 
         # When
         cm = ContextManager(self.credentials)
-        cm.execute_long_running_query('query')
+        result = cm.execute_long_running_query('query')
 
         # Then
         mock.assert_called_once_with('query')
+        assert result == {'job_id': 'a', 'status': 'done'}
 
     def test_copy_to(self, mocker):
         # Given
@@ -55,15 +66,357 @@ class TestContextManager(object):
         cm.copy_to(query)
 
         # Then
-        mock.assert_called_once_with('SELECT "A" FROM (__query__) _q', columns, 3)
+        mock.assert_called_once_with('SELECT "A" FROM (__query__) _q', columns, retry_times=3, format='csv',
+                                     compress=True)
+
+    def test_copy_to_cache_miss(self, mocker):
+        # Given
+        df = DataFrame({'A': [1]})
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info',
+                            return_value=[ColumnInfo('A', 'a', 'bigint', False)])
+        mock_query = mocker.patch.object(ContextManager, '_execute_read_query', return_value={
+            'rows': [{'tables': 1, 'versions': 1, 'updated_at': '2020-01-01T00:00:00Z'}]})
+        mock_copy = mocker.patch.object(ContextManager, '_copy_to', return_value=df)
+        mock_get = mocker.patch('cartoframes.io.managers.context_manager.result_cache.get', return_value=None)
+        mock_set = mocker.patch('cartoframes.io.managers.context_manager.result_cache.set')
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.copy_to('__query__', cache=True)
+
+        # Then
+        assert 'CDB_QueryTablesText($cartoframes$__query__$cartoframes$)' in mock_query.call_args[0][0]
+        key = (cm.cache_namespace, 'csv', 'SELECT "A" FROM (__query__) _q', '2020-01-01T00:00:00Z')
+        mock_get.assert_called_once_with(key)
+        mock_set.assert_called_once_with(key, df)
+        mock_copy.assert_called_once()
+        assert result is df
+
+    def test_copy_to_cache_hit(self, mocker):
+        # Given
+        df = DataFrame({'A': [1]})
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info',
+                            return_value=[ColumnInfo('A', 'a', 'bigint', False)])
+        mocker.patch.object(ContextManager, '_execute_read_query', return_value={
+            'rows': [{'tables': 1, 'versions': 1, 'updated_at': '2020-01-01T00:00:00Z'}]})
+        mock_copy = mocker.patch.object(ContextManager, '_copy_to')
+        mocker.patch('cartoframes.io.managers.context_manager.result_cache.get', return_value=df)
+        mock_set = mocker.patch('cartoframes.io.managers.context_manager.result_cache.set')
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.copy_to('__query__', cache=True)
+
+        # Then
+        mock_copy.assert_not_called()
+        mock_set.assert_not_called()
+        assert result is df
+
+    def test_copy_to_cache_geometries(self, mocker):
+        # Given
+        ewkb = '0101000020E6100000000000000000F03F0000000000000040'
+        df = DataFrame({'A': [1, 2], 'the_geom': [ewkb, None]})
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry', True)
+        ])
+        mocker.patch.object(ContextManager, '_execute_read_query', return_value={
+            'rows': [{'tables': 1, 'versions': 1, 'updated_at': '2020-01-01T00:00:00Z'}]})
+        mocker.patch.object(ContextManager, '_copy_to', return_value=df)
+        mock_get = mocker.patch('cartoframes.io.managers.context_manager.result_cache.get', return_value=None)
+        mock_set = mocker.patch('cartoframes.io.managers.context_manager.result_cache.set')
+        cm = ContextManager(self.credentials)
+
+        # When
+        result = cm.copy_to('__query__', cache=True)
+        cached_df = mock_set.call_args[0][1]
+        mock_get.return_value = cached_df
+        cached_result = cm.copy_to('__query__', cache=True)
+
+        # Then
+        assert result is df
+        assert cached_df['the_geom'].tolist() == [bytes.fromhex(ewkb), None]
+        assert df['the_geom'].tolist() == [ewkb, None]
+        assert cached_result.equals(df)
+
+    def test_copy_to_cache_unknown_update(self, mocker):
+        # Given
+        df = DataFrame({'A': [1]})
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info',
+                            return_value=[ColumnInfo('A', 'a', 'bigint', False)])
+        # One of the two tables of the query has no update time
+        mocker.patch.object(ContextManager, '_execute_read_query', return_value={
+            'rows': [{'tables': 2, 'versions': 1, 'updated_at': '2020-01-01T00:00:00Z'}]})
+        mocker.patch.object(ContextManager, '_copy_to', return_value=df)
+        mock_get = mocker.patch('cartoframes.io.managers.context_manager.result_cache.get')
+        mock_set = mocker.patch('cartoframes.io.managers.context_manager.result_cache.set')
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.copy_to('__query__', cache=True)
+
+        # Then
+        mock_get.assert_not_called()
+        mock_set.assert_not_called()
+        assert result is df
+
+    def test_copy_to_chunks(self, mocker):
+        # Given
+        query = '__query__'
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'text', False)
+        ]
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'compute_query', return_value=query)
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mock = mocker.patch.object(CopyClient, 'copyto_stream')
+        mock.return_value = BytesIO(b'A,B\n1,a\n2,__null\n3,c\n')
+
+        # When
+        cm = ContextManager(self.credentials)
+        chunks = list(cm.copy_to_chunks(query, chunksize=2))
+
+        # Then
+        assert mock.call_args[0][0] == (
+            'COPY (SELECT "A","B" FROM (__query__) _q) TO stdout WITH (FORMAT csv, HEADER true, NULL \'__null\')')
+        assert len(chunks) == 2
+        assert chunks[0].equals(DataFrame({'A': Series([1, 2], dtype='Int64'), 'B': ['a', None]}))
+        assert chunks[1].equals(DataFrame({'A': Series([3], dtype='Int64', index=[2]), 'B': ['c']}, index=[2]))
+
+    def test_copy_to_dtypes(self, mocker):
+        # Given
+        query = '__query__'
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'double precision', False),
+            ColumnInfo('C', 'c', 'boolean', False),
+            ColumnInfo('D', 'd', 'text', False),
+            ColumnInfo('E', 'e', 'timestamp', False)
+        ]
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyto_stream')
+        mock.return_value = BytesIO(
+            b'A,B,C,D,E\n'
+            b'1,0.1,t,NA,2020-01-01 10:00:00\n'
+            b'__null,NaN,f,"",__null\n'
+            b'3,Infinity,__null,__null,2020-01-03 00:00:00\n')
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm._copy_to(query, columns)
+
+        # Then
+        assert df['A'].dtype == 'Int64'
+        assert df['A'].isna().tolist() == [False, True, False]
+        assert df['B'].dtype == 'float64'
+        assert df['B'].tolist()[0] == 0.1
+        assert np.isnan(df['B'][1]) and np.isposinf(df['B'][2])
+        assert df['C'].dtype == 'boolean'
+        assert df['C'].tolist()[:2] == [True, False] and df['C'].isna()[2]
+        assert df['D'].tolist() == ['NA', '', None]
+        assert df['E'].dtype == 'datetime64[ns]'
+        assert df['E'].isna().tolist() == [False, True, False]
+
+    def test_copy_to_big_integers(self, mocker):
+        # Given
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyto_stream')
+        mock.return_value = BytesIO(b'A\n9007199254740993\n__null\n-9223372036854775808\n')
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm._copy_to('__query__', columns)
+
+        # Then
+        assert df['A'].dtype == 'Int64'
+        assert df['A'][0] == 9007199254740993
+        assert df['A'].isna()[1]
+        assert df['A'][2] == -9223372036854775808
+
+    def test_copy_to_timestamptz(self, mocker):
+        # Given
+        columns = [ColumnInfo('A', 'a', 'timestamptz', False)]
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyto_stream')
+        mock.return_value = BytesIO(b'A\n2020-01-01 10:00:00+00\n__null\n')
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm._copy_to('__query__', columns)
+
+        # Then
+        assert str(df['A'].dtype) == 'datetime64[ns, UTC]'
+        assert df['A'].tolist() == [Timestamp('2020-01-01 10:00:00', tz='UTC'), NaT]
+
+    def test_copy_to_binary(self, mocker):
+        # Given
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'double precision', False),
+            ColumnInfo('C', 'c', 'boolean', False),
+            ColumnInfo('D', 'd', 'text', False),
+            ColumnInfo('E', 'e', 'timestamp', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry', True)
+        ]
+        data = DataFrame({
+            'A': Series([1, None, 3], dtype='Int64'),
+            'B': [0.1, float('nan'), float('inf')],
+            'C': Series([True, False, None], dtype='boolean'),
+            'D': ['NA', '', None],
+            'E': to_datetime(['2020-01-01 10:00:00', None, '2020-01-03']),
+            'the_geom': GeoSeries([Point(0, 0), None, Point(1, 1)])
+        })
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyto_stream')
+        mock.side_effect = [
+            BytesIO(
+                b'A,B,C,D,E,the_geom\n'
+                b'1,0.1,t,NA,2020-01-01 10:00:00,0101000020E610000000000000000000000000000000000000\n'
+                b'__null,NaN,f,"",__null,__null\n'
+                b'3,Infinity,__null,__null,2020-01-03 00:00:00,'
+                b'0101000020E6100000000000000000F03F000000000000F03F\n'),
+            BytesIO(b''.join(encode_binary_copy(data, columns)))
+        ]
+
+        # When
+        cm = ContextManager(self.credentials)
+        df_csv = cm._copy_to('__query__', columns)
+        df_binary = cm._copy_to('__query__', columns, format='binary')
+
+        # Then
+        assert mock.call_args[0][0] == 'COPY (__query__) TO stdout WITH (FORMAT binary)'
+        assert df_binary.equals(df_csv)
+
+    def test_get_copy_query_binary(self):
+        # Given
+        columns = [
+            ColumnInfo('cartodb_id', 'cartodb_id', 'bigint', False),
+            ColumnInfo('A', 'a', 'numeric', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry', True),
+            ColumnInfo('the_geom_webmercator', 'the_geom_webmercator', 'geometry', True)
+        ]
+
+        # When
+        cm = ContextManager(self.credentials)
+        query = cm._get_copy_query('__query__', columns, None, 'binary')
+
+        # Then
+        assert query == ('SELECT "cartodb_id"::bigint AS "cartodb_id","A"::text AS "A",'
+                         '"the_geom"::geometry AS "the_geom" FROM (__query__) _q')
+
+    def test_copy_to_pushdown(self, mocker):
+        # Given
+        columns = [
+            ColumnInfo('cartodb_id', 'cartodb_id', 'bigint', False),
+            ColumnInfo('A', 'a', 'text', False),
+            ColumnInfo('the_geom', 'the_geom', 'text', False)
+        ]
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mock_columns = mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mock = mocker.patch.object(ContextManager, '_copy_to')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_to('__source__', columns=['the_geom', 'A'], bbox=(-10, 35, 5, 44.5), where='a IS NOT NULL',
+                   simplify=0.01, precision=5)
+
+        # Then
+        query = ('SELECT * FROM (__query__) _f WHERE (a IS NOT NULL) AND '
+                 'ST_Intersects("the_geom", ST_MakeEnvelope(-10, 35, 5, 44.5, 4326))')
+        mock_columns.assert_called_once_with(query)
+        assert mock.call_args[0][0] == (
+            'SELECT "A",ST_QuantizeCoordinates(ST_SimplifyPreserveTopology("the_geom", 0.01), 5) AS "the_geom" '
+            'FROM ({}) _q'.format(query))
+        assert mock.call_args[0][1] == columns[1:]
+
+    def test_copy_to_pushdown_binary(self):
+        # Given
+        columns = [ColumnInfo('the_geom', 'the_geom', 'text', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        query = cm._get_copy_query('__query__', columns, None, 'binary', precision=6)
+
+        # Then
+        assert query == 'SELECT ST_QuantizeCoordinates("the_geom", 6)::text AS "the_geom" FROM (__query__) _q'
+
+    def test_copy_to_wrong_columns(self, mocker):
+        # Given
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[
+            ColumnInfo('A', 'a', 'text', False)])
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm = ContextManager(self.credentials)
+            cm.copy_to('__source__', columns=['A', 'B', 'C'])
+
+        # Then
+        assert str(e.value) == 'Wrong columns. The columns "B", "C" are not in the source.'
+
+    def test_parallel_copy_to(self, mocker):
+        # Given
+        query = '__query__'
+        columns = [
+            ColumnInfo('cartodb_id', 'cartodb_id', 'bigint', False),
+            ColumnInfo('A', 'a', 'text', False)
+        ]
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'compute_query', return_value=query)
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mock_bounds = mocker.patch.object(ContextManager, 'execute_query')
+        mock_bounds.return_value = {'rows': [{'min': 1, 'max': 4}]}
+
+        def copy_to(query, columns, retry_times, format, compress, copy_client):
+            start = int(query.split('>= ')[1].split(' ')[0])
+            return DataFrame({'cartodb_id': [start, start + 1], 'A': ['a', 'b']})
+        mock = mocker.patch.object(ContextManager, '_copy_to', side_effect=copy_to)
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.parallel_copy_to(query, parallel_downloads=2)
+
+        # Then
+        mock_bounds.assert_called_once_with(
+            'SELECT MIN("cartodb_id") AS min, MAX("cartodb_id") AS max FROM (__query__) _q')
+        assert sorted(call[0][0] for call in mock.call_args_list) == [
+            'SELECT "cartodb_id","A" FROM (SELECT * FROM (__query__) _p '
+            'WHERE "cartodb_id" >= 1 AND "cartodb_id" < 3) _q',
+            'SELECT "cartodb_id","A" FROM (SELECT * FROM (__query__) _p '
+            'WHERE "cartodb_id" >= 3 OR "cartodb_id" IS NULL) _q'
+        ]
+        assert df.equals(DataFrame({'cartodb_id': [1, 2, 3, 4], 'A': ['a', 'b', 'a', 'b']}))
+        copy_clients = [call[1]['copy_client'] for call in mock.call_args_list]
+        assert len(set(map(id, copy_clients))) == 2
+        assert cm.copy_client not in copy_clients
+
+    def test_parallel_copy_to_wrong_partition_column(self, mocker):
+        # Given
+        columns = [ColumnInfo('A', 'a', 'text', False)]
+        mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm = ContextManager(self.credentials)
+            cm.parallel_copy_to('__query__', partition_column='A')
+
+        # Then
+        assert str(e.value) == 'Wrong partition column. "A" must be a numeric column of the source.'
 
     def test_copy_from(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mocker.patch.object(ContextManager, 'has_table', return_value=False)
-        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
-        mock_create_table = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mock_setup = mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output('create'))
+        mock_cartodbfy = mocker.patch.object(ContextManager, 'execute_long_running_query')
         mock = mocker.patch.object(ContextManager, '_copy_from')
+        mock.side_effect = lambda *args, **kwargs: mock_cartodbfy.assert_not_called()
         df = DataFrame({'A': [1]})
         columns = [ColumnInfo('A', 'a', 'bigint', False)]
 
@@ -72,16 +425,55 @@ class TestContextManager(object):
         cm.copy_from(df, 'TABLE NAME')
 
         # Then
-        mock_create_table.assert_called_once_with('''
-            BEGIN; CREATE TABLE table_name ("a" bigint); SELECT CDB_CartodbfyTable(\'schema\', \'table_name\'); COMMIT;
-        '''.strip())
-        mock.assert_called_once_with(df, 'table_name', columns, DEFAULT_RETRY_TIMES)
+        setup_query = mock_setup.call_args[0][0]
+        assert mock_setup.call_count == 1
+        assert setup_query.startswith('DO $cartoframes$')
+        assert 'CREATE TABLE table_name ("a" bigint);' in setup_query
+        assert "_action := 'fail';" in setup_query
+        mock.assert_called_once_with(df, 'table_name', columns, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                                     compress=True, max_bytes=None)
+        mock_cartodbfy.assert_called_once_with('SELECT CDB_CartodbfyTable(\'schema\', \'table_name\')')
+
+    def test_copy_from_no_cartodbfy(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output('create'))
+        mock_cartodbfy = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(ContextManager, '_copy_from')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(DataFrame({'A': [1]}), 'table_name', cartodbfy=False)
+
+        # Then
+        mock_cartodbfy.assert_not_called()
+
+    @pytest.mark.parametrize('action, cartodbfied, expected', [
+        ('alter', True, True),
+        ('truncate', False, True),
+        ('truncate', True, False),
+        ('append', False, False)
+    ])
+    def test_copy_from_cartodbfy_existing_table(self, mocker, action, cartodbfied, expected):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            action, cartodbfied=cartodbfied))
+        mock_cartodbfy = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(ContextManager, '_copy_from')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(DataFrame({'A': [1]}), 'table_name', 'append' if action == 'append' else 'replace')
+
+        # Then
+        assert mock_cartodbfy.called == expected
 
     def test_copy_from_exists_fail(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mocker.patch.object(ContextManager, 'has_table', return_value=True)
-        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output('fail'))
+        mock = mocker.patch.object(ContextManager, '_copy_from')
         df = DataFrame({'A': [1]})
 
         # When
@@ -93,44 +485,62 @@ class TestContextManager(object):
         assert str(e.value) == ('Table "schema.table_name" already exists in your CARTO account. '
                                 'Please choose a different `table_name` or use '
                                 'if_exists="replace" to overwrite it.')
+        mock.assert_not_called()
 
-    def test_copy_from_exists_replace_truncate_and_drop_add_columns(self, mocker):
+    def test_copy_from_exists_replace(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mocker.patch.object(ContextManager, 'has_table', return_value=True)
-        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
-        mock = mocker.patch.object(ContextManager, '_truncate_and_drop_add_columns')
-        df = DataFrame({'A': [1]})
-        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+        mock_setup = mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output('alter'))
+        mocker.patch.object(ContextManager, '_copy_from')
+        mocker.patch.object(ContextManager, '_cartodbfy_table')
+        df = DataFrame({'A': [1], 'cartodb_id': [1]})
 
         # When
         cm = ContextManager(self.credentials)
         cm.copy_from(df, 'TABLE NAME', 'replace')
 
         # Then
-        mock.assert_called_once_with('table_name', 'schema', columns, [], True)
+        setup_query = mock_setup.call_args[0][0]
+        assert 'TRUNCATE TABLE table_name;' in setup_query
+        assert "(VALUES ('a', 'bigint'::regtype::oid)) _c" in setup_query
+        assert 'ALTER TABLE table_name ADD COLUMN "a" bigint;' in setup_query
 
-    def test_copy_from_exists_replace_truncate(self, mocker):
+    def test_copy_from_exists_replace_truncate_binary(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mocker.patch.object(ContextManager, 'has_table', return_value=True)
-        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
-        mocker.patch.object(ContextManager, '_compare_columns', return_value=True)
-        mock = mocker.patch.object(ContextManager, '_truncate_table')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'truncate', {'cartodb_id': 'integer', 'a': 'bigint'}))
+        mocker.patch.object(ContextManager, '_cartodbfy_table')
+        mock = mocker.patch.object(ContextManager, '_copy_from')
         df = DataFrame({'A': [1]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
 
         # When
         cm = ContextManager(self.credentials)
-        cm.copy_from(df, 'TABLE NAME', 'replace')
+        cm.copy_from(df, 'TABLE NAME', 'replace', format='binary')
+
+        # Then
+        mock.assert_called_once_with(df, 'table_name', columns, retry_times=DEFAULT_RETRY_TIMES, format='binary',
+                                     compress=True, max_bytes=None)
+
+    def test_copy_from_setup_without_result(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value={'rows': []})
+
+        # When
+        with pytest.raises(CartoException) as e:
+            cm = ContextManager(self.credentials)
+            cm.copy_from(DataFrame({'A': [1]}), 'table_name')
 
         # Then
-        mock.assert_called_once_with('table_name', 'schema', True)
+        assert str(e.value) == "The setup of the table did not return its result: {'rows': []}"
 
     def test_internal_copy_from(self, mocker):
         # Given
         from shapely.geometry import Point
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mock = mocker.patch.object(CopySQLClient, 'copyfrom')
+        mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
         gdf = GeoDataFrame({'A': [1, 2], 'B': [Point(0, 0), Point(1, 1)]})
         columns = [
             ColumnInfo('A', 'a', 'bigint', False),
@@ -145,11 +555,371 @@ class TestContextManager(object):
         assert mock.call_args[0][0] == '''
             COPY table_name("a","b") FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '__null');
         '''.strip()
-        assert list(mock.call_args[0][1]) == [
-            b'1|0101000020E610000000000000000000000000000000000000\n',
+        assert mock.call_args[0][1].data == [
+            b'1|0101000020E610000000000000000000000000000000000000\n'
             b'2|0101000020E6100000000000000000F03F000000000000F03F\n'
         ]
 
+    def test_internal_copy_from_binary(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
+        df = DataFrame({'A': [1, 2], 'B': ['a', None]})
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'text', False)
+        ]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm._copy_from(df, 'table_name', columns, format='binary')
+
+        # Then
+        assert mock.call_args[0][0] == 'COPY table_name("a","b") FROM stdin WITH (FORMAT binary);'
+        assert mock.call_args[0][1].data == list(encode_binary_copy(df, columns))
+
+    def test_internal_copy_from_max_bytes(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
+        df = DataFrame({'A': range(10), 'B': ['a' * 10] * 10})
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'text', False)
+        ]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm._copy_from(df, 'table_name', columns, format='binary', max_bytes=200)
+
+        # Then
+        streams = [b''.join(call[0][1].data) for call in mock.call_args_list]
+        assert [len(stream) for stream in streams] == [189, 133]
+        result = concat([decode_binary_copy(BytesIO(stream), columns) for stream in streams], ignore_index=True)
+        assert result['A'].tolist() == list(range(10))
+
+    def test_internal_copy_from_retry_range(self, mocker):
+        # Given
+        class ResponseMock:
+            text = 'Rate limited'
+            headers = {'Carto-Rate-Limit-Limit': 1, 'Carto-Rate-Limit-Remaining': 0,
+                       'Retry-After': 0, 'Carto-Rate-Limit-Reset': 1}
+
+        def copyfrom(query, data, compress=True):
+            consume_copy_data(query, data)
+            if len(uploads) == 1:
+                uploads.append(None)
+                raise CartoRateLimitException(ResponseMock())
+            uploads.append(b''.join(data.data))
+
+        uploads = []
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.utils.retry_policy.time.sleep')
+        mocker.patch.object(CopyClient, 'copyfrom', side_effect=copyfrom)
+        df = DataFrame({'A': range(6)})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        with pytest.warns(UserWarning):
+            cm._copy_from(df, 'table_name', columns, max_bytes=6)
+
+        # Then
+        assert uploads == [b'0\n1\n2\n', None, b'3\n4\n5\n']
+
+    def test_copy_from_exists_append_binary(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock_setup = mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'a': 'bigint'}))
+        mock = mocker.patch.object(ContextManager, '_copy_from')
+        df = DataFrame({'A': [1]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'TABLE NAME', 'append', format='binary')
+
+        # Then
+        assert "_action := 'append';" in mock_setup.call_args[0][0]
+        mock.assert_called_once_with(df, 'table_name', columns, retry_times=DEFAULT_RETRY_TIMES, format='binary',
+                                     compress=True, max_bytes=None)
+
+    def test_copy_from_exists_append_binary_incompatible(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'a': 'numeric'}))
+        mock = mocker.patch.object(ContextManager, '_copy_from')
+        df = DataFrame({'A': [1]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'TABLE NAME', 'append', format='binary')
+
+        # Then
+        mock.assert_called_once_with(df, 'table_name', columns, retry_times=DEFAULT_RETRY_TIMES, format='csv',
+                                     compress=True, max_bytes=None)
+
+    def test_compute_copy_data(self):
+        # Given
+        from shapely.geometry import Point
+        gdf = GeoDataFrame({
+            'A': [1, 2, 3],
+            'B': [1.5, np.nan, np.inf],
+            'C': [True, False, True],
+            'D': ['Hello', 'Hello "world"', None],
+            'E': ['a|b', 'a\nb', np.nan],
+            'F': [Point(0, 0), None, Point(1, 1)]
+        })
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'double precision', False),
+            ColumnInfo('C', 'c', 'boolean', False),
+            ColumnInfo('D', 'd', 'text', False),
+            ColumnInfo('E', 'e', 'text', False),
+            ColumnInfo('F', 'f', 'geometry', True)
+        ]
+
+        # When
+        data = list(_compute_copy_data(gdf, columns))
+
+        # Then
+        assert data == [
+            b'1|1.5|True|Hello|"a|b"|0101000020E610000000000000000000000000000000000000\n'
+            b'2|NaN|False|"Hello ""world"""|"a\nb"|__null\n'
+            b'3|Infinity|True|__null|NaN|0101000020E6100000000000000000F03F000000000000F03F\n'
+        ]
+
+    def test_compute_copy_data_batches(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager.COPY_BATCH_ROWS', 2)
+        df = DataFrame({'A': [1, 2, 3, 4, 5]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        data = list(_compute_copy_data(df, columns))
+
+        # Then
+        assert data == [b'1\n2\n', b'3\n4\n', b'5\n']
+
+    def test_compute_copy_data_batches_encoders(self, mocker):
+        # Given
+        from cartoframes.io.managers import context_manager
+        mocker.patch('cartoframes.io.managers.context_manager.COPY_BATCH_ROWS', 2)
+        spy = mocker.spy(context_manager, '_column_encoder')
+        df = DataFrame({'A': [1, 2, 3], 'B': ['a', 'b|c', 1]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False), ColumnInfo('B', 'b', 'text', False)]
+
+        # When
+        data = list(_compute_copy_data(df, columns))
+
+        # Then
+        assert data == [b'1|a\n2|"b|c"\n', b'3|1\n']
+        assert spy.call_count == 2
+
+    def test_upsert_from(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'id': 'bigint', 'value': 'text', 'cartoframes_hash': 'text'}))
+        df = DataFrame({'id': [1, 2, 3], 'value': ['a', 'b', 'c']})
+        hashes = _row_hashes(df, get_dataframe_columns_info(df))
+        mock_copy_to = mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({
+            'id': Series([1, 2, 4], dtype='Int64'), 'cartoframes_hash': [hashes[0], 'outdated', hashes[2]]}))
+        mock_create = mocker.patch.object(ContextManager, '_create_table_from_columns')
+        mock_copy_from = mocker.patch.object(ContextManager, '_copy_from')
+        mock_upsert = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        hash_column = ColumnInfo('cartoframes_hash', 'cartoframes_hash', 'text', False)
+        columns = [ColumnInfo('id', 'id', 'bigint', False), ColumnInfo('value', 'value', 'text', False), hash_column]
+
+        # When
+        cm = ContextManager(self.credentials)
+        table_name = cm.upsert_from(df, 'table_name', 'id')
+
+        # Then
+        assert table_name == 'table_name'
+        assert mock_copy_to.call_args[0][0] == ('SELECT "id","cartoframes_hash" FROM '
+                                                '(SELECT * FROM "schema"."table_name") _q')
+        mock_create.assert_called_once_with('staging', 'schema', columns, False)
+        changed, changed_columns = mock_copy_from.call_args_list[0][0][0], mock_copy_from.call_args_list[0][0][2]
+        assert changed['id'].tolist() == [2, 3]
+        assert changed['cartoframes_hash'].tolist() == hashes[1:].tolist()
+        assert changed_columns == columns
+        removed, removed_columns = mock_copy_from.call_args_list[1][0][0], mock_copy_from.call_args_list[1][0][2]
+        assert removed['id'].tolist() == [4]
+        assert removed_columns == columns[:1]
+        upsert_query = mock_upsert.call_args[0][0]
+        assert 'DELETE FROM table_name _t USING staging _s WHERE _t."id" = _s."id" AND _s."cartoframes_hash" IS NULL;' \
+            in upsert_query
+        assert ('ON CONFLICT ("id") DO UPDATE SET "value" = EXCLUDED."value","cartoframes_hash" = '
+                'EXCLUDED."cartoframes_hash";') in upsert_query
+
+    def test_upsert_from_unchanged(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'id': 'bigint', 'cartoframes_hash': 'text'}))
+        df = DataFrame({'id': [1, 2]})
+        hashes = _row_hashes(df, get_dataframe_columns_info(df))
+        mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({
+            'id': Series([2, 1], dtype='Int64'), 'cartoframes_hash': [hashes[1], hashes[0]]}))
+        mock_copy_from = mocker.patch.object(ContextManager, '_copy_from')
+        mock_upsert = mocker.patch.object(ContextManager, 'execute_long_running_query')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.upsert_from(df, 'table_name', 'id')
+
+        # Then
+        mock_copy_from.assert_not_called()
+        mock_upsert.assert_not_called()
+
+    def test_upsert_from_create_table(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output('create'))
+        mock_copy_to = mocker.patch.object(ContextManager, '_copy_to')
+        mocker.patch.object(ContextManager, '_create_table_from_columns')
+        mock_copy_from = mocker.patch.object(ContextManager, '_copy_from')
+        mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mock_cartodbfy = mocker.patch.object(ContextManager, '_cartodbfy_table')
+        df = DataFrame({'id': [1, 2]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.upsert_from(df, 'table_name', 'id')
+
+        # Then
+        mock_copy_to.assert_not_called()
+        assert mock_copy_from.call_count == 1
+        assert mock_copy_from.call_args[0][0]['id'].tolist() == [1, 2]
+        mock_cartodbfy.assert_called_once_with('table_name', 'schema')
+
+    def test_upsert_from_missing_columns(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'id': 'bigint', 'cartoframes_hash': 'text'}))
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm = ContextManager(self.credentials)
+            cm.upsert_from(DataFrame({'id': [1], 'value': ['a']}), 'table_name', 'id')
+
+        # Then
+        assert str(e.value) == ('Table "schema.table_name" can not be upserted. It does not have the columns: '
+                                'value.')
+
+    def test_upsert_from_without_hashes(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mock_setup = mocker.patch.object(ContextManager, 'execute_query', return_value=setup_output(
+            'append', {'id': 'bigint', 'cartoframes_hash': 'text'}))
+        mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({
+            'id': Series([1, 2], dtype='Int64'), 'cartoframes_hash': [None, None]}))
+        mocker.patch.object(ContextManager, '_create_table_from_columns')
+        mock_copy_from = mocker.patch.object(ContextManager, '_copy_from')
+        mocker.patch.object(ContextManager, 'execute_long_running_query')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.upsert_from(DataFrame({'id': [1, 2]}), 'table_name', 'id')
+
+        # Then
+        assert 'ALTER TABLE table_name ADD COLUMN IF NOT EXISTS "cartoframes_hash" text;' in \
+            mock_setup.call_args[0][0]
+        assert mock_copy_from.call_args[0][0]['id'].tolist() == [1, 2]
+
+    def test_upsert_from_wrong_key(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        df = DataFrame({'id': [1, 1]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        with pytest.raises(ValueError) as e:
+            cm.upsert_from(df, 'table_name', 'id')
+
+        with pytest.raises(ValueError) as e_missing:
+            cm.upsert_from(df, 'table_name', 'name')
+
+        # Then
+        assert str(e.value) == 'Wrong key. The values of the "id" column must be unique and not null.'
+        assert str(e_missing.value) == 'Wrong key. You should provide the name of a column of the dataframe.'
+
+    def test_parallel_copy_from(self, mocker):
+        # Given
+        mock_auth_client = mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock_session = mocker.patch('cartoframes.io.managers.context_manager.get_worker_session')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mock_query = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
+        df = DataFrame({'A': [1, 2, 3]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        table_name = cm.parallel_copy_from(df, 'TABLE NAME', parallel_uploads=2)
+
+        # Then
+        assert table_name == 'table_name'
+        assert mock.call_count == 2
+        assert sorted(b''.join(call[0][1].data) for call in mock.call_args_list) == [b'1\n', b'2\n3\n']
+        assert mock_auth_client.call_args_list[1:] == [
+            mocker.call(cm.credentials, session=mock_session.return_value)
+        ] * 2
+        assert mock_query.call_args_list[0][0][0] == 'BEGIN; CREATE TABLE staging ("a" bigint); ; COMMIT;'
+        assert mock_query.call_args_list[1][0][0] == (
+            'BEGIN; ALTER TABLE staging RENAME TO table_name; '
+            'SELECT CDB_CartodbfyTable(\'schema\', \'table_name\'); COMMIT;')
+
+    def test_parallel_copy_from_exists_replace(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_get_query_columns_info',
+                            return_value=[ColumnInfo('a', 'a', 'bigint', False)])
+        mock_query = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
+        df = DataFrame({'A': [1, 2, 3]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.parallel_copy_from(df, 'TABLE NAME', 'replace', cartodbfy=False, parallel_uploads=2)
+
+        # Then
+        assert mock_query.call_args_list[1][0][0] == (
+            'BEGIN; TRUNCATE TABLE table_name;  INSERT INTO table_name ("a") SELECT "a" FROM staging; '
+            'DROP TABLE IF EXISTS staging; ; COMMIT;')
+
+    def test_parallel_copy_from_error(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mock_query = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mock_delete = mocker.patch.object(ContextManager, 'delete_table')
+        mocker.patch.object(CopyClient, 'copyfrom', side_effect=Exception('COPY error'))
+        df = DataFrame({'A': [1, 2, 3]})
+
+        # When
+        with pytest.raises(Exception) as e:
+            cm = ContextManager(self.credentials)
+            cm.parallel_copy_from(df, 'TABLE NAME', parallel_uploads=2)
+
+        # Then
+        assert str(e.value) == 'COPY error'
+        assert mock_query.call_count == 1
+        mock_delete.assert_called_once_with('staging')
+
     def test_rename_table(self, mocker):
         # Given
         def has_table(table_name):
@@ -261,6 +1031,126 @@ class TestContextManager(object):
         # Then
         assert DataFrame(columns=['tables']).equals(tables)
 
+    def test_get_schema_cache(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, '_execute_read_query')
+        mock.return_value = {'rows': [{'current_schema': 'schema'}]}
+
+        # When
+        schemas = [ContextManager(self.credentials).get_schema() for _ in range(3)]
+        ContextManager(Credentials('other_user', 'fake_api')).get_schema()
+
+        # Then
+        assert schemas == ['schema', 'schema', 'schema']
+        assert mock.call_count == 2
+
+    def test_has_table_cache_invalidation(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, '_check_exists', return_value=False)
+        mocker.patch.object(BatchSQLClient, 'create', return_value={'job_id': 'a', 'status': 'done'})
+        mocker.patch.object(SQLClient, 'send', return_value={})
+        cm = ContextManager(self.credentials)
+
+        # When
+        cm.has_table('table_name', 'schema')
+        cm.has_table('table_name', 'schema')
+        cm.execute_long_running_query('CREATE TABLE table_name ()')
+        cm.has_table('table_name', 'schema')
+        cm.delete_table('table_name')
+        cm.has_table('table_name', 'schema')
+        cm.clear_cache()
+        cm.has_table('table_name', 'schema')
+
+        # Then
+        assert mock.call_count == 4
+
+    def test_query_columns_info_cache(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, '_execute_read_query')
+        mock.return_value = {'fields': {'a': {'type': 'number'}}}
+        cm = ContextManager(self.credentials)
+
+        # When
+        columns = cm._get_query_columns_info('__query__')
+        columns.append('modified')
+        cached_columns = cm._get_query_columns_info('__query__')
+
+        # Then
+        assert mock.call_count == 1
+        assert cached_columns == [ColumnInfo('a', 'a', 'number', False)]
+
+    def test_query_columns_info_cache_invalidation(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', return_value={'fields': {'a': {'type': 'number'}}})
+        cm = ContextManager(self.credentials)
+
+        # When
+        cm._get_query_columns_info('__query__')
+        cm.has_table('table_name', 'schema')
+        cm._get_query_columns_info('__query__')
+        cm.execute_query("SELECT CDB_DropTable('table_name')")
+        cm._get_query_columns_info('__query__')
+        cm.execute_query('ALTER TABLE table_name ADD COLUMN b int')
+        cm._get_query_columns_info('__query__')
+
+        # Then
+        assert mock.call_count == 6
+
+    def test_get_context_manager(self):
+        # When
+        cm = get_context_manager(self.credentials)
+
+        # Then
+        assert get_context_manager(Credentials('fake_user', 'fake_api')) is cm
+        assert get_context_manager(Credentials('fake_user', 'other_api')) is not cm
+        assert cm.auth_client.session is get_context_manager(Credentials('fake_user', 'other_api')).auth_client.session
+
+    def test_get_context_manager_lru(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager.MAX_CONTEXT_MANAGERS', 2)
+        cm = get_context_manager(Credentials('fake_user', 'api_1'))
+        other_cm = get_context_manager(Credentials('fake_user', 'api_2'))
+
+        # When
+        get_context_manager(Credentials('fake_user', 'api_1'))
+        get_context_manager(Credentials('fake_user', 'api_3'))
+
+        # Then
+        assert get_context_manager(Credentials('fake_user', 'api_1')) is cm
+        assert get_context_manager(Credentials('fake_user', 'api_2')) is not other_cm
+
+    def test_get_context_manager_modified_credentials(self):
+        # Given
+        cm = get_context_manager(self.credentials)
+
+        # When
+        self.credentials.session = Session()
+        new_cm = get_context_manager(Credentials('fake_user', 'fake_api'))
+
+        # Then
+        assert new_cm is not cm
+        assert new_cm.credentials.session is None
+
+    def test_is_public(self, mocker):
+        # Given
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=[{}, CartoException('Not found')])
+        cm = ContextManager(self.credentials)
+
+        # When
+        public = cm.is_public('SELECT * FROM table_name')
+        private = cm.is_public('SELECT * FROM private_table_name')
+
+        # Then
+        assert public is True
+        assert private is False
+        assert mock.call_count == 2
+        assert cm._public_sql_client.auth_client.api_key == 'default_public'
+        assert cm._public_sql_client.auth_client.session is cm.auth_client.session
+
     def test_retry_copy_decorator(self):
         @retry_copy
         def test_function(retry_times):
@@ -278,3 +1168,24 @@ class TestContextManager(object):
 
         with pytest.raises(CartoRateLimitException):
             test_function(retry_times=0)
+
+    def test_retry_copy_positional_retry_times(self, mocker):
+        # Given
+        class ResponseMock:
+            text = 'Rate limited'
+            headers = {'Carto-Rate-Limit-Limit': 1, 'Carto-Rate-Limit-Remaining': 0,
+                       'Retry-After': 0, 'Carto-Rate-Limit-Reset': 1}
+
+        mocker.patch('cartoframes.utils.retry_policy.time.sleep')
+        mock = mocker.Mock(side_effect=CartoRateLimitException(ResponseMock()))
+
+        @retry_copy
+        def test_function(query, retry_times=DEFAULT_RETRY_TIMES):
+            mock(query)
+
+        # When
+        with pytest.warns(UserWarning), pytest.raises(CartoRateLimitException):
+            test_function('query', 5)
+
+        # Then
+        assert mock.call_count == 5
@@ -0,0 +1,117 @@
+"""Unit tests for cartoframes.io.managers.copy_client"""
+
+import gzip
+
+from io import BytesIO
+
+import pytest
+
+from carto.auth import APIKeyAuthClient
+from requests import Response
+from urllib3 import HTTPResponse
+
+from cartoframes.io.managers.copy_client import CopyClient, compress_chunks
+
+
+def _response(body, content_encoding=None):
+    headers = {'Content-Encoding': content_encoding} if content_encoding else {}
+    response = Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(BytesIO(body), headers=headers, preload_content=False)
+    return response
+
+
+class TestCopyClient(object):
+
+    def setup_method(self):
+        self.auth_client = APIKeyAuthClient('https://fake_user.carto.com', 'fake_api')
+
+    def test_compress_chunks(self, mocker):
+        # Given
+        mock_log = mocker.patch('cartoframes.io.managers.copy_client.log.debug')
+        chunks = [b'0101000020E6100000000000000048934000000000009DB640\n' * 1000 for _ in range(10)]
+
+        # When
+        data = list(compress_chunks(iter(chunks)))
+
+        # Then
+        assert all(data)
+        assert gzip.decompress(b''.join(data)) == b''.join(chunks)
+        raw_bytes = sum(len(chunk) for chunk in chunks)
+        compressed_bytes = sum(len(d) for d in data)
+        mock_log.assert_called_once_with('COPY FROM: {} bytes transferred for {} bytes of data ({} bytes saved)'.format(
+            compressed_bytes, raw_bytes, raw_bytes - compressed_bytes))
+
+    def test_compress_chunks_empty(self):
+        data = list(compress_chunks(iter([])))
+
+        assert gzip.decompress(b''.join(data)) == b''
+
+    def test_compress_chunks_encoding_error(self):
+        # Given
+        def chunks():
+            yield b'a|b\n'
+            raise ValueError('Encoding error')
+
+        # When
+        with pytest.raises(ValueError) as e:
+            list(compress_chunks(chunks()))
+
+        # Then
+        assert str(e.value) == 'Encoding error'
+
+    def test_compress_chunks_compression_error(self):
+        with pytest.raises(TypeError):
+            list(compress_chunks(iter([b'a|b\n', 'not bytes', b'c|d\n'])))
+
+    def test_copyfrom_compress(self, mocker):
+        # Given
+        mock = mocker.patch.object(APIKeyAuthClient, 'send')
+        mocker.patch.object(APIKeyAuthClient, 'get_response_data')
+
+        # When
+        CopyClient(self.auth_client).copyfrom('__query__', iter([b'a|b\n']))
+
+        # Then
+        assert mock.call_args[1]['headers']['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(b''.join(mock.call_args[1]['data'])) == b'a|b\n'
+
+    def test_copyfrom_not_compress(self, mocker):
+        # Given
+        mock = mocker.patch.object(APIKeyAuthClient, 'send')
+        mocker.patch.object(APIKeyAuthClient, 'get_response_data')
+
+        # When
+        CopyClient(self.auth_client).copyfrom('__query__', iter([b'a|b\n']), False)
+
+        # Then
+        assert 'Content-Encoding' not in mock.call_args[1]['headers']
+        assert list(mock.call_args[1]['data']) == [b'a|b\n']
+
+    def test_copyto_stream_compress(self, mocker):
+        # Given
+        body = b'A,B\n' + b'1,0101000020E6100000000000000048934000000000009DB640\n' * 1000
+        compressed_body = gzip.compress(body)
+        mock = mocker.patch.object(APIKeyAuthClient, 'send', return_value=_response(compressed_body, 'gzip'))
+        mock_log = mocker.patch('cartoframes.io.managers.copy_client.log.debug')
+
+        # When
+        stream = CopyClient(self.auth_client).copyto_stream('__query__')
+        data = stream.read()
+
+        # Then
+        assert mock.call_args[1]['headers'] is None
+        assert data == body
+        mock_log.assert_called_once_with('COPY TO: {} bytes transferred for {} bytes of data ({} bytes saved)'.format(
+            len(compressed_body), len(body), len(body) - len(compressed_body)))
+
+    def test_copyto_stream_not_compress(self, mocker):
+        # Given
+        mock = mocker.patch.object(APIKeyAuthClient, 'send', return_value=_response(b'A,B\n1,a\n'))
+
+        # When
+        stream = CopyClient(self.auth_client).copyto_stream('__query__', False)
+
+        # Then
+        assert mock.call_args[1]['headers'] == {'Accept-Encoding': 'identity'}
+        assert stream.read() == b'A,B\n1,a\n'
@@ -0,0 +1,65 @@
+"""Unit tests for cartoframes.io.managers.metadata_cache"""
+
+from cartoframes.io.managers.metadata_cache import MetadataCache
+
+
+class TestMetadataCache(object):
+
+    def test_get_set(self):
+        cache = MetadataCache()
+        cache.set(('ns', 'has_table', 'a'), False)
+
+        assert cache.get(('ns', 'has_table', 'a')) is False
+        assert cache.get(('ns', 'has_table', 'b')) is None
+
+    def test_ttl(self, mocker):
+        # Given
+        mock_time = mocker.patch('cartoframes.io.managers.metadata_cache.time.monotonic', return_value=100)
+        cache = MetadataCache(ttl=10)
+        cache.set(('ns', 'schema', None), 'public')
+
+        # When
+        mock_time.return_value = 109
+        cached = cache.get(('ns', 'schema', None))
+        mock_time.return_value = 110
+        expired = cache.get(('ns', 'schema', None))
+
+        # Then
+        assert cached == 'public'
+        assert expired is None
+
+    def test_maxsize(self):
+        # Given
+        cache = MetadataCache(maxsize=2)
+        cache.set(('ns', 'columns', 'a'), [1])
+        cache.set(('ns', 'columns', 'b'), [2])
+
+        # When
+        cache.get(('ns', 'columns', 'a'))
+        cache.set(('ns', 'columns', 'c'), [3])
+
+        # Then
+        assert cache.get(('ns', 'columns', 'a')) == [1]
+        assert cache.get(('ns', 'columns', 'b')) is None
+        assert cache.get(('ns', 'columns', 'c')) == [3]
+
+    def test_invalidate(self):
+        # Given
+        cache = MetadataCache()
+        cache.set(('ns1', 'schema', None), 'public')
+        cache.set(('ns1', 'has_table', 'a'), True)
+        cache.set(('ns2', 'has_table', 'a'), True)
+
+        # When
+        cache.invalidate('ns1', ('has_table', 'columns'))
+
+        # Then
+        assert cache.get(('ns1', 'schema', None)) == 'public'
+        assert cache.get(('ns1', 'has_table', 'a')) is None
+        assert cache.get(('ns2', 'has_table', 'a')) is True
+
+        cache.invalidate('ns1')
+        assert cache.get(('ns1', 'schema', None)) is None
+
+        cache.clear()
+        assert cache.get(('ns2', 'has_table', 'a')) is None
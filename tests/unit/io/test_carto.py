@@ -2,7 +2,7 @@ import pytest
 
 import random
 
-from pandas import Index
+from pandas import DataFrame, Index
 from geopandas import GeoDataFrame
 from shapely.geometry import Point
 from shapely.geometry.base import BaseGeometry
@@ -11,10 +11,13 @@ from shapely import wkt
 from carto.exceptions import CartoException
 from cartoframes.auth import Credentials
 from cartoframes.io.managers.context_manager import ContextManager
+from cartoframes.io.managers.copy_client import CopyClient
 from cartoframes.io.carto import read_carto, to_carto, copy_table, create_table_from_query
+from ..mocks.context_manager_mock import consume_copy_data
 
 
 CREDENTIALS = Credentials('fake_user', 'fake_api_key')
+NO_PUSHDOWN = {'columns': None, 'bbox': None, 'where': None, 'simplify': None, 'precision': None}
 
 
 def test_read_carto(mocker):
@@ -41,7 +44,7 @@ def test_read_carto(mocker):
     gdf = read_carto('__source__', CREDENTIALS)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 3)
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 'csv', True, cache=False, **NO_PUSHDOWN)
     assert expected.equals(gdf)
     assert gdf.crs == 'epsg:4326'
 
@@ -67,7 +70,7 @@ def test_read_carto_none_as_null_geom_value(mocker):
         ]
     }, geometry='the_geom')
 
-    cm_mock.assert_called_once_with('__source__', None, None, 3)
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 'csv', True, cache=False, **NO_PUSHDOWN)
     assert expected.equals(gdf)
     assert gdf.crs == 'epsg:4326'
 
@@ -93,7 +96,7 @@ def test_read_carto_basegeometry_as_null_geom_value(mocker):
         ]
     }, geometry='the_geom')
 
-    cm_mock.assert_called_once_with('__source__', None, None, 3)
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 'csv', True, cache=False, **NO_PUSHDOWN)
     assert expected.equals(gdf)
     assert gdf.crs == 'epsg:4326'
 
@@ -126,7 +129,7 @@ def test_read_carto_limit(mocker):
     read_carto('__source__', CREDENTIALS, limit=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, 1, 3)
+    cm_mock.assert_called_once_with('__source__', None, 1, 3, 'csv', True, cache=False, **NO_PUSHDOWN)
 
 
 def test_read_carto_retry_times(mocker):
@@ -138,7 +141,7 @@ def test_read_carto_retry_times(mocker):
     read_carto('__source__', CREDENTIALS, retry_times=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 1)
+    cm_mock.assert_called_once_with('__source__', None, None, 1, 'csv', True, cache=False, **NO_PUSHDOWN)
 
 
 def test_read_carto_schema(mocker):
@@ -150,7 +153,7 @@ def test_read_carto_schema(mocker):
     read_carto('__source__', CREDENTIALS, schema='__schema__')
 
     # Then
-    cm_mock.assert_called_once_with('__source__', '__schema__', None, 3)
+    cm_mock.assert_called_once_with('__source__', '__schema__', None, 3, 'csv', True, cache=False, **NO_PUSHDOWN)
 
 
 def test_read_carto_index_col_exists(mocker):
@@ -233,6 +236,176 @@ def test_read_carto_decode_geom_false(mocker):
     assert expected.equals(gdf)
 
 
+def test_read_carto_chunksize(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to_chunks')
+    cm_mock.return_value = iter([
+        DataFrame({
+            'cartodb_id': [1, 2],
+            'the_geom': [
+                '010100000000000000000000000000000000000000',
+                '010100000000000000000024400000000000002e40'
+            ]
+        }),
+        DataFrame({
+            'cartodb_id': [3],
+            'the_geom': [
+                '010100000000000000000034400000000000003e40'
+            ]
+        }, index=[2])
+    ])
+    expected = [
+        GeoDataFrame({
+            'the_geom': [Point([0, 0]), Point([10, 15])]
+        }, geometry='the_geom', index=Index([1, 2], name='cartodb_id')),
+        GeoDataFrame({
+            'the_geom': [Point([20, 30])]
+        }, geometry='the_geom', index=Index([3], name='cartodb_id'))
+    ]
+
+    # When
+    gdfs = list(read_carto('__source__', CREDENTIALS, index_col='cartodb_id', chunksize=2))
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 2, 'csv', True, **NO_PUSHDOWN)
+    assert len(gdfs) == 2
+    assert expected[0].equals(gdfs[0])
+    assert expected[1].equals(gdfs[1])
+    assert gdfs[1].crs == 'epsg:4326'
+
+
+def test_read_carto_parallel(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'parallel_copy_to', return_value=DataFrame({
+        'id': [1, 2],
+        'the_geom': ['010100000000000000000000000000000000000000', '010100000000000000000024400000000000002e40']
+    }))
+
+    # When
+    gdf = read_carto('__source__', CREDENTIALS, parallel=4, partition_column='id')
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 4, 'id', 'csv', True, cache=False, **NO_PUSHDOWN)
+    assert gdf.geometry.tolist() == [Point(0, 0), Point(10, 15)]
+    assert gdf.crs == 'epsg:4326'
+
+
+def test_read_carto_pushdown(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to', return_value=DataFrame({
+        'a': [2],
+        'the_geom': ['010100000000000000000000000000000000000000']
+    }))
+
+    # When
+    gdf = read_carto('__source__', CREDENTIALS, columns=['a'], bbox=[-10, 35, 5, 44], where='a > 1', simplify=0.1,
+                     precision=4)
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 'csv', True, cache=False, columns=['a'],
+                                    bbox=[-10, 35, 5, 44], where='a > 1', simplify=0.1, precision=4)
+    assert gdf['a'].tolist() == [2]
+    assert gdf.geometry.tolist() == [Point(0, 0)]
+
+
+@pytest.mark.parametrize('params, message', [
+    ({'columns': 'a'}, 'Wrong columns. You should provide a list of column names.'),
+    ({'bbox': (1, 2, 3)}, 'Wrong bbox. You should provide a list of 4 numbers: west, south, east, north.'),
+    ({'where': ''}, 'Wrong where. You should provide a valid SQL condition.'),
+    ({'simplify': 0}, 'Wrong simplify. You should provide a positive number.'),
+    ({'precision': 1.5}, 'Wrong precision. You should provide an integer.')
+])
+def test_read_carto_wrong_pushdown(params, message):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, **params)
+
+    # Then
+    assert str(e.value) == message
+
+
+def test_read_carto_lazy_geom(mocker):
+    # Given
+    mocker.patch.object(ContextManager, 'copy_to', return_value=DataFrame({
+        'cartodb_id': [1, 2, 3],
+        'the_geom': ['0101000020E6100000000000000000F03F0000000000000040', None,
+                     '0101000020E6100000000000000000F03F0000000000000840']
+    }))
+    mock_copy_from = mocker.patch.object(ContextManager, 'copy_from', return_value='table_name')
+
+    # When
+    gdf = read_carto('__source__', CREDENTIALS, lazy_geom=True)
+    to_carto(gdf[gdf['cartodb_id'] > 1], 'table_name', CREDENTIALS, skip_quota_warning=True)
+
+    # Then
+    uploaded_geoms = mock_copy_from.call_args[0][0].geometry.values
+    assert uploaded_geoms.wkbs.tolist() == [None, Point(1, 3).wkb]
+    assert gdf.crs == 'epsg:4326'
+    assert gdf.geometry.tolist() == [Point(1, 2), None, Point(1, 3)]
+
+
+def test_read_carto_arrow(mocker):
+    pa = pytest.importorskip('pyarrow')
+
+    # Given
+    mocker.patch.object(ContextManager, 'copy_to', return_value=DataFrame({
+        'cartodb_id': [1, 2],
+        'the_geom': ['0101000020E6100000000000000000F03F0000000000000040', None]
+    }))
+
+    # When
+    table = read_carto('__source__', CREDENTIALS, index_col='cartodb_id', output='arrow')
+
+    # Then
+    assert isinstance(table, pa.Table)
+    assert table.schema.field('the_geom').type == pa.binary()
+    assert table.column('the_geom').to_pylist() == [Point(1, 2).wkb, None]
+    assert table.to_pandas().index.tolist() == [1, 2]
+
+
+def test_read_carto_wrong_output():
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, output='list')
+
+    assert str(e.value) == 'Wrong option for the `output` param. You should provide: geodataframe, arrow.'
+
+
+def test_read_carto_wrong_parallel(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, parallel=2, chunksize=10)
+
+    # Then
+    assert str(e.value) == 'The `chunksize` and `parallel` params can not be used together.'
+
+
+def test_read_carto_wrong_cache(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, cache=True, chunksize=10)
+
+    # Then
+    assert str(e.value) == 'The `chunksize` and `cache` params can not be used together.'
+
+
+def test_read_carto_wrong_chunksize(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, chunksize=0)
+
+    # Then
+    assert str(e.value) == 'Wrong chunksize. You should provide an integer greater than 0.'
+
+
+def test_read_carto_wrong_format(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, format='parquet')
+
+    # Then
+    assert str(e.value) == 'Wrong option for the `format` param. You should provide: csv, binary.'
+
+
 def test_to_carto(mocker):
     # Given
     table_name = '__table_name__'
@@ -250,6 +423,28 @@ def test_to_carto(mocker):
     assert norm_table_name == table_name
 
 
+def test_to_carto_arrow(mocker, tmpdir):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from', return_value='table_name')
+    table = pa.table({'a': pa.array([1, None]), 'geom': pa.array([Point(1, 2).wkb, None])})
+    filename = str(tmpdir.join('data.parquet'))
+    pq.write_table(table, filename)
+
+    for data in [table, filename]:
+        # When
+        to_carto(data, 'table_name', CREDENTIALS, geom_col='geom', skip_quota_warning=True)
+
+        # Then
+        gdf = cm_mock.call_args[0][0]
+        assert str(gdf['a'].dtype) == 'Int64'
+        assert gdf['a'].isna().tolist() == [False, True]
+        assert gdf['the_geom'].tolist() == [Point(1, 2).wkb, None]
+        assert 'geom' not in gdf
+
+
 def test_to_carto_quota_warning(mocker):
     class NoQuotaCredentials(Credentials):
         @property
@@ -337,8 +532,9 @@ def test_to_carto_two_geom_columns_and_geom_col(mocker):
 def test_to_carto_chunks(mocker):
     # Given
     table_name = '__table_name__'
-    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
-    cm_mock.return_value = table_name
+    mocker.patch.object(ContextManager, '_setup_table', return_value={'schema': 'schema', 'action': 'create'})
+    mocker.patch.object(ContextManager, '_cartodbfy_table')
+    cm_mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
 
     size = 4000  # About 1MB (1150000 bytes)
     gdf = GeoDataFrame([
@@ -357,12 +553,68 @@ def test_to_carto_chunks(mocker):
 
     # Then
     assert cm_mock.call_count == 12  # 12 chunks as max_upload_size is 100000 bytes and we are uploading 1150000 bytes
-    assert cm_mock.call_args[0][1] == table_name
-    assert cm_mock.call_args[0][2] in ['fail', 'append']
-    assert cm_mock.call_args[0][3] is True
+    assert all(call[0][1].size <= 100000 for call in cm_mock.call_args_list)
+    assert sum(call[0][1].end - call[0][1].start for call in cm_mock.call_args_list) == size
+    assert norm_table_name == table_name
+
+
+def test_to_carto_chunks_skewed_rows(mocker):
+    # Given
+    mocker.patch.object(ContextManager, '_setup_table', return_value={'schema': 'schema', 'action': 'create'})
+    mocker.patch.object(ContextManager, '_cartodbfy_table')
+    cm_mock = mocker.patch.object(CopyClient, 'copyfrom', side_effect=consume_copy_data)
+    df = DataFrame({'text': ['a'] * 1000 + ['b' * 1000] * 100})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, max_upload_size=10000, skip_quota_warning=True)
+
+    # Then
+    assert all(call[0][1].size <= 10000 for call in cm_mock.call_args_list)
+    assert cm_mock.call_count == 12
+    assert b''.join(b''.join(call[0][1].data) for call in cm_mock.call_args_list) == \
+        b'a\n' * 1000 + (b'b' * 1000 + b'\n') * 100
+
+
+def test_to_carto_parallel_uploads(mocker):
+    # Given
+    table_name = '__table_name__'
+    cm_mock = mocker.patch.object(ContextManager, 'parallel_copy_from')
+    cm_mock.return_value = table_name
+    df = GeoDataFrame({'geometry': [Point([0, 0]), Point([1, 1]), Point([2, 2])]})
+
+    # When
+    norm_table_name = to_carto(df, table_name, CREDENTIALS, skip_quota_warning=True, parallel_uploads=2)
+
+    # Then
+    assert len(cm_mock.call_args[0][0]) == 3
+    assert cm_mock.call_args[0][1:] == (table_name, 'fail', True, 3, 2, 'csv', True, 2000000000)
     assert norm_table_name == table_name
 
 
+def test_to_carto_wrong_parallel_uploads(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', CREDENTIALS, skip_quota_warning=True, parallel_uploads=0)
+
+    # Then
+    assert str(e.value) == 'Wrong parallel_uploads. You should provide an integer greater than 0.'
+
+
+def test_to_carto_wrong_format(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', CREDENTIALS, skip_quota_warning=True, format='parquet')
+
+    # Then
+    assert str(e.value) == 'Wrong option for the `format` param. You should provide: csv, binary.'
+
+
 def test_to_carto_wrong_dataframe(mocker):
     # When
     with pytest.raises(ValueError) as e:
@@ -406,7 +658,39 @@ def test_to_carto_wrong_if_exists(mocker):
         to_carto(df, '__table_name__', if_exists='keep_calm', skip_quota_warning=True)
 
     # Then
-    assert str(e.value) == 'Wrong option for the `if_exists` param. You should provide: fail, replace, append.'
+    assert str(e.value) == ('Wrong option for the `if_exists` param. You should provide: '
+                            'fail, replace, append, upsert.')
+
+
+def test_to_carto_if_exists_upsert(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'upsert_from', return_value='table_name')
+    df = GeoDataFrame({'id': [1], 'geometry': [Point([0, 0])]})
+
+    # When
+    norm_table_name = to_carto(df, '__table_name__', CREDENTIALS, if_exists='upsert', key='id',
+                               skip_quota_warning=True)
+
+    # Then
+    assert cm_mock.call_args[0][1:] == ('__table_name__', 'id', True, 3, 'csv', True, 2000000000)
+    assert norm_table_name == 'table_name'
+
+
+def test_to_carto_if_exists_upsert_wrong_params():
+    # Given
+    df = GeoDataFrame({'id': [1], 'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', CREDENTIALS, if_exists='upsert', skip_quota_warning=True)
+
+    with pytest.raises(ValueError) as e_parallel:
+        to_carto(df, '__table_name__', CREDENTIALS, if_exists='upsert', key='id', parallel_uploads=2,
+                 skip_quota_warning=True)
+
+    # Then
+    assert str(e.value) == 'Wrong key. You should provide the name of the column to upsert the data.'
+    assert str(e_parallel.value) == 'The `parallel_uploads` param can not be used with if_exists="upsert".'
 
 
 def test_to_carto_if_exists_replace(mocker):
@@ -53,4 +53,4 @@ def test_transform_crs_to_carto(mocker):
     to_carto(gdf, 'table_name', CREDENTIALS, skip_quota_warning=True)
 
     # Then
-    cm_mock.assert_called_once_with(mocker.ANY, 'table_name', 'fail', True, 3)
+    cm_mock.assert_called_once_with(mocker.ANY, 'table_name', 'fail', True, 3, 'csv', True, 2000000000)
@@ -0,0 +1,17 @@
+import json
+import asyncio
+
+
+def setup_output(action, types=None, cartodbfied=False, schema='schema'):
+    # Response of the table setup query, which reports its result in a notice
+    setup = {'schema': schema, 'action': action, 'types': types, 'cartodbfied': cartodbfied}
+    return {'rows': [], 'notices': ['cartoframes_setup {}'.format(json.dumps(setup))]}
+
+
+def consume_copy_data(query, data, compress=True):
+    # The COPY client reads the data while it is uploaded
+    data.data = list(data)
+
+
+def run_async(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
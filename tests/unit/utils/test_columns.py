@@ -2,13 +2,16 @@
 
 """Unit tests for cartoframes.data.columns"""
 
+import pytest
+
 from pandas import DataFrame
 from geopandas import GeoDataFrame
+from shapely.geometry import Point
 
 from cartoframes.utils.geom_utils import set_geometry
 from cartoframes.utils.columns import ColumnInfo, get_dataframe_columns_info, normalize_names, \
-                                      obtain_converters, _convert_int, _convert_float, \
-                                      _convert_bool, _convert_generic
+                                      get_query_columns_info, obtain_dtypes, obtain_na_values, obtain_converters, \
+                                      _convert_int, _convert_float, _convert_bool, _convert_generic
 
 
 class TestColumns(object):
@@ -62,6 +65,11 @@ class TestColumns(object):
     def test_normalize_names_unchanged(self):
         assert normalize_names(self.cols_ans) == self.cols_ans
 
+    def test_normalize_names_collisions(self):
+        names = normalize_names(['a'] * 3 + ['A', 'a_1', 'Tag <b>x</b> &amp; y'])
+
+        assert names == ['a', 'a_1', 'a_1_2', 'a_1_2_3', 'a_1_1', 'tag_x_y']
+
     def test_column_info_with_geom(self):
         gdf = GeoDataFrame(
             [['Gran Vía 46', 'Madrid', 'POINT (0 0)'], ['Ebro 1', 'Sevilla', 'POINT (1 1)']],
@@ -76,6 +84,16 @@ class TestColumns(object):
             ColumnInfo('the_geom', 'the_geom', 'geometry(Geometry, 4326)', True)
         ]
 
+    def test_column_info_with_wkb_geom(self):
+        df = DataFrame({'City': ['Madrid', 'Sevilla'], 'the_geom': [Point(0, 0).wkb, None]})
+
+        dataframe_columns_info = get_dataframe_columns_info(df)
+
+        assert dataframe_columns_info == [
+            ColumnInfo('City', 'city', 'text', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry(Geometry, 4326)', True)
+        ]
+
     def test_column_info_without_geom(self):
         df = DataFrame(
             [['Gran Vía 46', 'Madrid'], ['Ebro 1', 'Sevilla']],
@@ -102,6 +120,20 @@ class TestColumns(object):
             ColumnInfo('the_geom', 'the_geom', 'geometry(Geometry, 4326)', True)
         ]
 
+    def test_column_info_cached_plan(self):
+        df = DataFrame({'A': [1], 'B b': ['x']})
+
+        columns = get_dataframe_columns_info(df)
+
+        assert columns == [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B b', 'b_b', 'text', False)
+        ]
+        assert [c.quoted_dbname for c in columns] == ['"a"', '"b_b"']
+        assert not hasattr(columns[0], '__dict__')
+        assert all(a is b for a, b in zip(get_dataframe_columns_info(df.copy()), columns))
+        assert get_dataframe_columns_info(df.astype({'A': float}))[0].dbtype == 'double precision'
+
     def test_column_info_geometry_troubled_names(self):
         gdf = GeoDataFrame(
             [['POINT (0 0)', 'POINT (1 1)', 'POINT (2 2)']],
@@ -125,15 +157,65 @@ class TestColumns(object):
             ColumnInfo('number', 'number', 'double precision', False)
         ]
 
-        converters = obtain_converters(columns)
+        with pytest.warns(DeprecationWarning):
+            converters = obtain_converters(columns)
 
-        assert type(converters) == dict
+        assert isinstance(converters, dict)
         assert converters['cartodb_id'] == _convert_int
         assert converters['the_geom'] == _convert_generic
         assert converters['name'] == _convert_generic
         assert converters['flag'] == _convert_bool
         assert converters['number'] == _convert_float
 
+    def test_dtypes(self):
+        columns = [
+            ColumnInfo('cartodb_id', 'cartodb_id', 'integer', False),
+            ColumnInfo('the_geom', 'the_geom', 'geometry(Geometry, 4326)', True),
+            ColumnInfo('name', 'name', 'text', False),
+            ColumnInfo('flag', 'flag', 'boolean', False),
+            ColumnInfo('number', 'number', 'double precision', False),
+            ColumnInfo('small', 'small', 'real', False),
+            ColumnInfo('date', 'date', 'timestamp', False)
+        ]
+
+        dtypes = obtain_dtypes(columns)
+
+        assert dtypes == {
+            'the_geom': 'object',
+            'name': 'object',
+            'flag': 'object',
+            'number': 'float64',
+            'small': 'float32'
+        }
+
+    def test_na_values(self):
+        columns = [
+            ColumnInfo('name', 'name', 'text', False),
+            ColumnInfo('number', 'number', 'double precision', False)
+        ]
+
+        na_values = obtain_na_values(columns)
+
+        assert na_values == {
+            'name': ['__null'],
+            'number': ['__null', 'NaN']
+        }
+
+    def test_query_columns_info(self):
+        columns = get_query_columns_info({
+            'id': {'type': 'number', 'pgtype': 'int4'},
+            'created_at': {'type': 'date', 'pgtype': 'timestamptz'},
+            'updated_at': {'type': 'date', 'pgtype': 'timestamp'},
+            'the_geom': {'type': 'geometry'}
+        })
+
+        assert [(column.name, column.dbtype) for column in columns] == [
+            ('id', 'integer'),
+            ('created_at', 'timestamptz'),
+            ('updated_at', 'timestamp'),
+            ('the_geom', 'geometry(Geometry, 4326)')
+        ]
+
     def test_column_info_sort(self):
         columns = [
             ColumnInfo('cartodb_id', 'cartodb_id', 'integer', False),
@@ -1,14 +1,20 @@
 """Unit tests for cartoframes.data.utils"""
 
+import pytest
+import shapely
 import pandas as pd
 import geopandas as gpd
 
+from geopandas import _compat as geopandas_compat
+
 from shapely.geos import lgeos
 from shapely.geometry import Point
 
 from cartoframes.utils.geom_utils import (ENC_EWKT, ENC_SHAPELY, ENC_WKB,
                                           ENC_WKB_BHEX, ENC_WKB_HEX, ENC_WKT,
-                                          decode_geometry, decode_geometry_item, detect_encoding_type)
+                                          decode_geometry, decode_geometry_item, detect_encoding_type,
+                                          decode_ewkb_hex_to_wkb, decode_geometry_lazy, encode_geometry_ewkb,
+                                          encode_geometries_ewkb, _encode_ewkb_hex, _to_ewkb)
 
 
 class TestGeomUtils(object):
@@ -49,6 +55,24 @@ class TestGeomUtils(object):
         decoded_geom = decode_geometry(geom_none)
         assert str(decoded_geom) == str(expected_decoded_geom)
 
+    def test_decode_geometry_nulls(self):
+        geom = pd.Series([None, '0101000020E6100000000000000048934000000000009DB640', '', float('nan')],
+                         index=[3, 4, 5, 6], name='the_geom')
+
+        decoded_geom = decode_geometry(geom)
+        assert decoded_geom.name == 'the_geom'
+        assert decoded_geom.index.tolist() == [3, 4, 5, 6]
+        assert decoded_geom.tolist() == [None, Point([1234, 5789]), None, None]
+        assert lgeos.GEOSGetSRID(decoded_geom[4]._geom) == 4326
+
+    def test_decode_geometry_ewkt_series(self):
+        geom = pd.Series(['SRID=4326;POINT (1234 5789)', None, 'POINT (0 0)'])
+
+        decoded_geom = decode_geometry(geom)
+        assert decoded_geom.tolist() == [Point([1234, 5789]), None, Point([0, 0])]
+        assert lgeos.GEOSGetSRID(decoded_geom[0]._geom) == 4326
+        assert lgeos.GEOSGetSRID(decoded_geom[2]._geom) == 0
+
     def test_detect_encoding_type_shapely(self):
         enc_type = detect_encoding_type(Point(1234, 5789))
         assert enc_type == ENC_SHAPELY
@@ -127,3 +151,81 @@ class TestGeomUtils(object):
         geom = decode_geometry_item('SRID=4326;POINT (1234 5789)', ENC_EWKT)  # ext
         assert lgeos.GEOSGetSRID(geom._geom) == 4326
         assert geom.wkt == 'POINT (1234 5789)'
+
+    def test_encode_geometry_ewkb(self):
+        geom = Point(1234, 5789)
+        ewkb = encode_geometry_ewkb(geom)
+        assert ewkb == '0101000020E6100000000000000048934000000000009DB640'
+        assert lgeos.GEOSGetSRID(geom._geom) == 0
+
+    def test_encode_geometries_ewkb(self):
+        geoms = gpd.GeoSeries([Point(1234, 5789), None, Point(1234, 5789, 1)])
+        ewkbs = encode_geometries_ewkb(geoms)
+        assert ewkbs.tolist() == [
+            '0101000020E6100000000000000048934000000000009DB640',
+            None,
+            '01010000A0E6100000000000000048934000000000009DB640000000000000F03F'
+        ]
+        assert lgeos.GEOSGetSRID(geoms[0]._geom) == 0
+
+    def test_encode_geometries_ewkb_without_vectorization(self, mocker):
+        mocker.patch('cartoframes.utils.geom_utils._to_ewkb', return_value=None)
+        geoms = gpd.GeoSeries([Point(1234, 5789), None])
+        ewkbs = encode_geometries_ewkb(geoms, hex=False)
+        assert ewkbs.tolist() == [bytes.fromhex('0101000020E6100000000000000048934000000000009DB640'), None]
+
+    @pytest.mark.skipif(not (geopandas_compat.USE_PYGEOS or hasattr(shapely, 'to_wkb')),
+                        reason='The vectorized encoding requires pygeos or shapely >= 2.0')
+    def test_encode_geometries_ewkb_vectorized(self):
+        geoms = gpd.GeoSeries([Point(1234, 5789), None, Point(1234, 5789, 1)])
+        ewkbs = _to_ewkb(geoms.values.data, 4326, True)
+        assert ewkbs.tolist() == [
+            '0101000020E6100000000000000048934000000000009DB640',
+            None,
+            '01010000A0E6100000000000000048934000000000009DB640000000000000F03F'
+        ]
+
+    def test_encode_geometries_ewkb_wkb(self):
+        wkbs = pd.Series([Point(1234, 5789).wkb, None, bytes.fromhex('0101000020E6100000000000000000F03F'
+                                                                     '0000000000000040')])
+        ewkbs = encode_geometries_ewkb(wkbs)
+        assert ewkbs.tolist() == [
+            '0101000020E6100000000000000048934000000000009DB640',
+            None,
+            '0101000020E6100000000000000000F03F0000000000000040'
+        ]
+
+    def test_decode_ewkb_hex_to_wkb(self):
+        wkbs = decode_ewkb_hex_to_wkb(['0101000020E6100000000000000048934000000000009DB640', None])
+        assert wkbs.tolist() == [Point(1234, 5789).wkb, None]
+
+    def test_decode_geometry_lazy(self):
+        geoms = decode_geometry_lazy(pd.Series(['0101000020E6100000000000000048934000000000009DB640', None,
+                                                '010100000000000000000024400000000000002e40']))
+
+        selected = pd.concat([geoms[[True, False, True]], geoms.take([1])])
+        assert selected.values.wkbs.tolist() == [Point(1234, 5789).wkb, Point(10, 15).wkb, None]
+        assert encode_geometries_ewkb(selected).tolist() == [
+            '0101000020E6100000000000000048934000000000009DB640',
+            '0101000020E610000000000000000024400000000000002E40',
+            None
+        ]
+        assert geoms.tolist() == [Point(1234, 5789), None, Point(10, 15)]
+        assert geoms.values.wkbs is not None
+
+        assert geoms.x.tolist()[0] == 1234
+        assert geoms.values.wkbs is None
+
+    @pytest.mark.skipif(not (geopandas_compat.HAS_RTREE or geopandas_compat.USE_PYGEOS),
+                        reason='Spatial indexes require rtree or pygeos')
+    def test_decode_geometry_lazy_sindex(self):
+        gdf = gpd.GeoDataFrame({'a': [1, 2]}, geometry=decode_geometry_lazy(pd.Series([
+            '0101000020E6100000000000000048934000000000009DB640',
+            '010100000000000000000024400000000000002e40'
+        ])))
+
+        assert list(gdf.sindex.intersection((0, 0, 20, 20))) == [1]
+
+    def test_encode_ewkb_hex_big_endian(self):
+        ewkb = _encode_ewkb_hex(b'\x00\x00\x00\x00\x01@\x93H\x00\x00\x00\x00\x00@\xb6\x9d\x00\x00\x00\x00\x00', 4326)
+        assert ewkb == '0020000001000010E6409348000000000040B69D0000000000'
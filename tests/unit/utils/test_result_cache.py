@@ -0,0 +1,76 @@
+"""Unit tests for cartoframes.utils.result_cache"""
+
+import os
+
+import pytest
+
+from pandas import DataFrame
+
+from cartoframes.utils import setup_result_cache
+from cartoframes.utils.result_cache import ResultCache, result_cache
+
+
+def _write_entry(cache, key, size, mtime):
+    filename = cache._filename(key)
+    with open(filename, 'wb') as f:
+        f.write(b'0' * size)
+    os.utime(filename, (mtime, mtime))
+    return filename
+
+
+class TestResultCache(object):
+
+    def teardown_method(self):
+        setup_result_cache()
+
+    def test_get_set(self, tmpdir):
+        pytest.importorskip('pyarrow')
+
+        # Given
+        cache = ResultCache(str(tmpdir))
+        df = DataFrame({'a': [1, 2], 'the_geom': [b'\x01\x01', None]})
+
+        # When
+        cache.set('key', df)
+
+        # Then
+        assert cache.get('key').equals(df)
+        assert cache.get('other_key') is None
+
+    def test_evict(self, tmpdir):
+        # Given
+        cache = ResultCache(str(tmpdir), max_size=25)
+        oldest = _write_entry(cache, 'a', 10, 100)
+        used = _write_entry(cache, 'b', 10, 300)
+        newest = _write_entry(cache, 'c', 10, 200)
+
+        # When
+        cache._evict()
+
+        # Then
+        assert not os.path.exists(oldest)
+        assert os.path.exists(used)
+        assert os.path.exists(newest)
+
+    def test_clear(self, tmpdir):
+        # Given
+        cache = ResultCache(str(tmpdir))
+        filename = _write_entry(cache, 'a', 10, 100)
+
+        # When
+        cache.clear()
+
+        # Then
+        assert not os.path.exists(filename)
+
+    def test_setup(self, tmpdir):
+        setup_result_cache(str(tmpdir), max_size=100)
+
+        assert result_cache.path == str(tmpdir)
+        assert result_cache.max_size == 100
+
+    def test_setup_wrong_max_size(self):
+        with pytest.raises(ValueError) as e:
+            setup_result_cache(max_size=-1)
+
+        assert str(e.value) == 'Wrong max_size. You should provide a non-negative number of bytes.'
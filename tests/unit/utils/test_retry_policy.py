@@ -0,0 +1,116 @@
+"""Unit tests for cartoframes.utils.retry_policy"""
+
+import asyncio
+
+import pytest
+
+from carto.exceptions import CartoRateLimitException
+
+from cartoframes.utils import RetryPolicy, get_retry_metrics
+from cartoframes.utils.retry_policy import get_retry_policy
+
+
+class ResponseMock:
+    text = 'Rate limited'
+
+    def __init__(self, retry_after=0):
+        self.headers = {'Carto-Rate-Limit-Limit': 1, 'Carto-Rate-Limit-Remaining': 0,
+                        'Retry-After': retry_after, 'Carto-Rate-Limit-Reset': 1}
+
+
+def _rate_limited(responses):
+    responses = iter(responses)
+
+    def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return request
+
+
+class TestRetryPolicy(object):
+
+    def setup_method(self):
+        get_retry_metrics(reset=True)
+
+    def test_delay(self, mocker):
+        mocker.patch('cartoframes.utils.retry_policy.random.uniform', side_effect=lambda a, b: b)
+        policy = RetryPolicy(base_delay=1, max_delay=5, backoff=2, jitter=0.5)
+
+        assert [policy.delay(attempt) for attempt in range(1, 5)] == [1.5, 3, 6, 7.5]
+        assert policy.delay(1, retry_after=10) == 10.5
+
+    def test_call(self, mocker):
+        # Given
+        mock_sleep = mocker.patch('cartoframes.utils.retry_policy.time.sleep')
+        mocker.patch('cartoframes.utils.retry_policy.random.uniform', return_value=0)
+        request = _rate_limited([CartoRateLimitException(ResponseMock(3)), CartoRateLimitException(ResponseMock()),
+                                 'result'])
+
+        # When
+        with pytest.warns(UserWarning):
+            result = RetryPolicy(retry_times=3).call(request)
+
+        # Then
+        assert result == 'result'
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [3, 2]
+        assert get_retry_metrics() == {'retries': 2, 'wait_time': 5}
+
+    def test_call_retry_times(self, mocker):
+        mocker.patch('cartoframes.utils.retry_policy.time.sleep')
+        request = _rate_limited([CartoRateLimitException(ResponseMock())] * 2 + ['result'])
+
+        with pytest.warns(UserWarning), pytest.raises(CartoRateLimitException):
+            RetryPolicy(retry_times=2).call(request)
+
+        assert get_retry_metrics()['retries'] == 1
+
+    def test_call_max_wait_time(self, mocker):
+        mock_sleep = mocker.patch('cartoframes.utils.retry_policy.time.sleep')
+        request = _rate_limited([CartoRateLimitException(ResponseMock(10)), 'result'])
+
+        with pytest.warns(UserWarning), pytest.raises(CartoRateLimitException):
+            RetryPolicy(max_wait_time=5).call(request)
+
+        mock_sleep.assert_not_called()
+
+    def test_call_async(self, mocker):
+        # Given
+        mock_sleep = mocker.patch('cartoframes.utils.retry_policy.asyncio.sleep')
+        mocker.patch('cartoframes.utils.retry_policy.random.uniform', return_value=0)
+        responses = iter([CartoRateLimitException(ResponseMock()), 'result'])
+
+        async def request():
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        # When
+        with pytest.warns(UserWarning):
+            result = asyncio.get_event_loop().run_until_complete(RetryPolicy().call_async(request))
+
+        # Then
+        assert result == 'result'
+        mock_sleep.assert_called_once_with(1)
+
+    def test_get_retry_policy(self):
+        policy = RetryPolicy(retry_times=5)
+
+        assert get_retry_policy(policy) is policy
+        assert get_retry_policy(2).retry_times == 2
+        assert get_retry_policy().retry_times == 3
+
+    @pytest.mark.parametrize('params, message', [
+        ({'retry_times': -1}, 'Wrong retry_times. You should provide a non-negative integer.'),
+        ({'base_delay': '1'}, 'Wrong base_delay. You should provide a non-negative number.'),
+        ({'backoff': 0.5}, 'Wrong backoff. You should provide a number greater than or equal to 1.'),
+        ({'max_wait_time': -1}, 'Wrong max_wait_time. You should provide a non-negative number.')
+    ])
+    def test_wrong_params(self, params, message):
+        with pytest.raises(ValueError) as e:
+            RetryPolicy(**params)
+
+        assert str(e.value) == message
@@ -0,0 +1,87 @@
+"""Unit tests for cartoframes.utils.session_pool"""
+
+import pytest
+
+from requests import Session
+
+from cartoframes.auth import Credentials
+from cartoframes.utils import setup_session_pool
+from cartoframes.utils.session_pool import SessionPool, get_session, get_worker_session, session_pool
+
+
+class TestSessionPool(object):
+
+    def teardown_method(self):
+        setup_session_pool()
+
+    def test_get(self):
+        pool = SessionPool(pool_size=4)
+
+        session = pool.get('https://fake_user.carto.com')
+
+        assert pool.get('https://fake_user.carto.com') is session
+        assert pool.get('https://other_user.carto.com') is not session
+        assert session.get_adapter('https://fake_user.carto.com')._pool_maxsize == 4
+
+    def test_keep_alive(self, mocker):
+        # Given
+        mock_time = mocker.patch('cartoframes.utils.session_pool.time.monotonic', return_value=100)
+        pool = SessionPool(keep_alive=10)
+        session = pool.get('https://fake_user.carto.com')
+        mock_close = mocker.patch.object(session, 'close')
+
+        # When
+        mock_time.return_value = 110
+        pool.get('https://fake_user.carto.com')
+        mock_time.return_value = 121
+        reused_session = pool.get('https://fake_user.carto.com')
+
+        # Then
+        assert reused_session is session
+        mock_close.assert_called_once_with()
+
+    def test_get_session(self):
+        custom_session = Session()
+        credentials = Credentials('fake_user', 'fake_api')
+
+        assert get_session(credentials) is session_pool.get(credentials.base_url)
+        assert get_session(Credentials('fake_user', 'other_api')) is get_session(credentials)
+        assert get_session(Credentials('fake_user', 'fake_api', session=custom_session)) is custom_session
+
+    def test_get_worker_session(self):
+        custom_session = Session()
+        custom_session.headers['X-Custom'] = 'value'
+        custom_session.verify = False
+        credentials = Credentials('fake_user', 'fake_api', session=custom_session)
+
+        worker_session = get_worker_session(credentials)
+        worker_session.headers['X-Worker'] = 'value'
+        worker_session.cookies.set('worker', 'value')
+
+        assert worker_session is not custom_session
+        assert worker_session.headers['X-Custom'] == 'value'
+        assert worker_session.verify is False
+        assert worker_session.get_adapter('https://fake_user.carto.com') is \
+            custom_session.get_adapter('https://fake_user.carto.com')
+        assert 'X-Worker' not in custom_session.headers
+        assert 'worker' not in custom_session.cookies
+
+    def test_setup_session_pool(self):
+        session = session_pool.get('https://fake_user.carto.com')
+
+        setup_session_pool(pool_size=20, keep_alive=None)
+
+        assert session_pool.keep_alive is None
+        assert session.get_adapter('https://fake_user.carto.com')._pool_maxsize == 20
+        assert session_pool.get('https://fake_user.carto.com') is session
+
+    def test_setup_session_pool_wrong_params(self):
+        with pytest.raises(ValueError) as e:
+            setup_session_pool(pool_size=0)
+
+        assert str(e.value) == 'Wrong pool_size. You should provide a positive integer.'
+
+        with pytest.raises(ValueError) as e:
+            setup_session_pool(keep_alive=-1)
+
+        assert str(e.value) == 'Wrong keep_alive. You should provide a non-negative number of seconds or None.'
@@ -10,7 +10,7 @@ import numpy as np
 
 from cartoframes.utils.utils import (camel_dictionary, cssify, debug_print, dict_items,
                                      importify_params, snake_to_camel, dtypes2pg, pg2dtypes,
-                                     encode_row, extract_viz_columns, remove_comments, deprecated)
+                                     encode_row, encode_value, extract_viz_columns, remove_comments, deprecated)
 
 
 class TestUtils(unittest.TestCase):
@@ -211,6 +211,18 @@ class TestUtils(unittest.TestCase):
         assert encode_row(-np.inf) == b'-Infinity'
         assert encode_row(np.nan) == b'NaN'
 
+    def test_encode_row_types(self):
+        assert encode_row(None) == b'__null'
+        assert encode_row(1) == b'1'
+        assert encode_row(True) == b'True'
+        assert encode_row(1.5) == b'1.5'
+        assert encode_row(1e16) == b'1e+16'
+        assert encode_row(np.int64(2)) == b'2'
+        assert encode_row(np.float64('-inf')) == b'-Infinity'
+        assert encode_row('año') == 'año'.encode('utf-8')
+        assert encode_value('Hello | world') == '"Hello | world"'
+        assert encode_value(np.nan) == 'NaN'
+
     def test_extract_viz_columns(self):
         viz = "color: prop('hello') + prop('A_0123')"
         assert 'hello' in extract_viz_columns(viz)